@@ -9,6 +9,7 @@ from App.Core.Utils.Import import Import
 from config import CONFIG_FILE_SERVICES
 from config import ROOT
 from os import listdir
+from threading import RLock
 from config import CONTROLLERS_NAMESPACES
 from typing import Optional, List, Union
 
@@ -33,6 +34,7 @@ class Application(YamlDataFile, metaclass=SingletonMeta):
         super().__init__(CONFIG_FILE_SERVICES)
 
         self.__singletons = {}
+        self.__singletons_lock = RLock()
         self.__providers = {}
         self.__container = {}
         self.__aliases = {}
@@ -165,7 +167,11 @@ class Application(YamlDataFile, metaclass=SingletonMeta):
         namespace = f"{data['file']}.{data['class']}"
 
         if namespace not in self.__singletons:
-            self.__singletons[namespace] = self.new(namespace)
+            # Services are resolved by handlers threads at the same time. Lock is reentrant, because
+            # singleton may depend on other singletons
+            with self.__singletons_lock:
+                if namespace not in self.__singletons:
+                    self.__singletons[namespace] = self.new(namespace)
 
         return self.__singletons[namespace]
 
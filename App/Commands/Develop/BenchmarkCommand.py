@@ -0,0 +1,475 @@
+import argparse
+import json
+import os
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socket import socket, socketpair
+from threading import Thread
+from time import perf_counter
+from typing import Callable, Tuple, Union
+
+from App.Core.Abstract import AbstractCommand
+from App.Core.Network.Ipp import IppClient, IppMessage
+from App.Core.Network.Protocol import RCL, RCLProtocol
+from App.Core.Network.Protocol.ProtoBuilder import ProtoBuilder
+from App.Core.Network.Protocol.ProtoFileResolver import ProtoFileResolver
+from App.Core.Network.Protocol.Requests import AbstractRequest
+from App.Core.Network.Protocol.Resolvers import CallMessageResolver, ResponseMessageSuccessResolver
+from App.Core.Network.Server.MessageReceiver import MessageReceiver
+from App.Services.LibreofficePool import LibreofficePool
+from App.Services.PrinterService import PrinterService
+from App.Subprocesses import LibreofficePdfConvert
+from App.helpers import app, config
+from config import CWD
+
+
+class IppStandInHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in of CUPS: accepts every Print-Job. Mode of server changes behaviour after job is received:
+    'ok' - responds and keeps connection, 'close' - responds and closes kept connection,
+    'drop' - closes connection without response.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    # Response headers and body are separate writes, they are not delayed waiting for ack
+    disable_nagle_algorithm = True
+
+    # noinspection PyShadowingBuiltins
+    def log_message(self, format, *args):
+        pass
+
+    # noinspection PyPep8Naming
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+
+        server = self.server
+        server.jobs += 1
+        server.connections.add(self.client_address)
+
+        if server.mode == 'drop':
+            self.close_connection = True
+            return
+
+        message = IppMessage(0, int.from_bytes(body[4:8], 'big'))
+        message.add(IppMessage.TAG_OPERATION, IppMessage.TAG_CHARSET, 'attributes-charset', 'utf-8')
+        message.add(IppMessage.TAG_JOB, IppMessage.TAG_INTEGER, 'job-id', server.jobs)
+
+        data = message.encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/ipp')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+        # Client is not told about closing, so it finds closed connection in its pool
+        self.close_connection = server.mode == 'close'
+
+
+class BenchmarkCommand(AbstractCommand):
+    signature = 'bench'
+    help = 'Run performance benchmarks'
+
+    def __init__(self):
+        super(BenchmarkCommand, self).__init__()
+
+        self.__rcl: RCL = app().get('rcl')
+
+    def _parameters(self):
+        subparser = self._argument_parser.add_subparsers(title='benchmarks')
+
+        receive_parser = subparser.add_parser('receive', help='Receive and parse big print request')
+        receive_parser.add_argument('-s', '--size', help='File size in MB', type=int, default=50)
+        receive_parser.set_defaults(func=self._exec_receive)
+
+        headers_parser = subparser.add_parser('headers', help='Encode and decode message headers')
+        headers_parser.add_argument('-n', '--count', help='Count of headers', type=int, default=100000)
+        headers_parser.set_defaults(func=self._exec_headers)
+
+        proto_parser = subparser.add_parser('proto', help='Encode and decode parameters of print call by proto schema')
+        proto_parser.add_argument('-n', '--count', help='Count of calls', type=int, default=100000)
+        proto_parser.set_defaults(func=self._exec_proto)
+
+        response_parser = subparser.add_parser('response', help='Encode and decode printers list response')
+        response_parser.add_argument('-p', '--printers', help='Count of printers in list', type=int, default=20)
+        response_parser.add_argument('-n', '--count', help='Count of responses', type=int, default=10000)
+        response_parser.set_defaults(func=self._exec_response)
+
+        ipp_parser = subparser.add_parser('ipp', help='Send print jobs to stand-in IPP server and check failures')
+        ipp_parser.add_argument('-n', '--count', help='Count of jobs', type=int, default=200)
+        ipp_parser.set_defaults(func=self._exec_ipp)
+
+        libreoffice_parser = subparser.add_parser('libreoffice', help='Convert documents by soffice and warm daemons')
+        libreoffice_parser.add_argument('-d', '--document', help='Path of document', type=str, required=True)
+        libreoffice_parser.add_argument('-n', '--count', help='Count of conversions', type=int, default=10)
+        libreoffice_parser.set_defaults(func=self._exec_libreoffice)
+
+    @staticmethod
+    def __receive_concat(sock: socket, max_bytes: int) -> bytes:
+        data = b""
+
+        while len(data) < RCLProtocol.RCL_HEADERS_LENGTH:
+            data += sock.recv(max_bytes)
+
+        _len = RCLProtocol.get_message_length(data)
+
+        while len(data) < _len:
+            data += sock.recv(max_bytes)
+
+        return data
+
+    def __run(self, message: bytes, receive: Callable[[socket], Union[bytes, AbstractRequest]]) -> float:
+        sender, receiver = socketpair()
+
+        thread = Thread(target=sender.sendall, args=(message,))
+        thread.start()
+
+        start = perf_counter()
+
+        received = receive(receiver)
+
+        if not isinstance(received, AbstractRequest):
+            received = self.__rcl.parse_request(received)
+
+        received.close()
+
+        elapsed = perf_counter() - start
+
+        thread.join()
+        sender.close()
+        receiver.close()
+
+        return elapsed
+
+    def __measure(self, message: bytes, receive: Callable[[socket], Union[bytes, AbstractRequest]]) -> Tuple[float, int]:
+        elapsed = self.__run(message, receive)
+
+        # Memory is traced in separate run, tracing slows down allocations
+        tracemalloc.start()
+
+        self.__run(message, receive)
+
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return elapsed, peak
+
+    def _exec_receive(self, args: argparse.Namespace):
+        max_bytes = config('server.max_bytes_receive')
+
+        message = self.__rcl.call_request('print', [], {
+            'device': 'benchmark',
+            'file': os.urandom(args.size * 1024 * 1024),
+            'mime-type': 'PDF',
+        })
+
+        self._output.header(f"Receive {len(message) / 1024 / 1024:.1f} MB message by {max_bytes} bytes segments")
+
+        results = {
+            'concat': self.__measure(message, lambda sock: self.__receive_concat(sock, max_bytes)),
+            'receiver': self.__measure(message, lambda sock: MessageReceiver(sock, max_bytes, self.__rcl).receive()),
+        }
+
+        for name, (elapsed, peak) in results.items():
+            self._output.line(f"{name:<10} time: {elapsed:.3f} s; peak memory: {peak / 1024 / 1024:.1f} MB", 1)
+
+    @staticmethod
+    def __legacy_encode_header(parameters: dict) -> bytes:
+        """ Header encoding before struct codec: per field validation and copying byte by byte """
+        header = bytearray(RCLProtocol.RCL_HEADERS_LENGTH)
+
+        for _name, _pos, _len, _type, _not_null in RCLProtocol.RCL_HEADERS_STRUCT_DICT.values():
+            val = parameters.get(_name)
+
+            if _name not in RCLProtocol.RCL_HEADERS_STRUCT_LIST or (val is None and _not_null):
+                raise Exception(f"Parameter '{_name}' not define in protocol")
+
+            val = list(val.to_bytes(_len, byteorder="big") if type(val) is int else val)
+
+            for j in range(len(val)):
+                header[_pos + j] = int(val[j])
+
+        return bytes(header)
+
+    @staticmethod
+    def __legacy_decode_header(header: bytes) -> dict:
+        buffer = bytearray(header[:RCLProtocol.RCL_HEADERS_LENGTH])
+
+        data = {}
+
+        for _name, _pos, _len, _type, _not_null in RCLProtocol.RCL_HEADERS_STRUCT_DICT.values():
+            val = buffer[_pos:_pos + _len]
+            val = int.from_bytes(val, byteorder="big") if _type is int else bytes(val)
+
+            if _name not in RCLProtocol.RCL_HEADERS_STRUCT_LIST:
+                raise Exception(f"Parameter '{_name}' not define in protocol")
+
+            if type(val) is not int and len(val) != _len:
+                raise Exception(f"Len of parameter '{_name}' is {str(len(val))}. Must be {str(_len)}")
+
+            data.update({_name: val})
+
+        return data
+
+    def _exec_headers(self, args: argparse.Namespace):
+        parameters = {
+            RCLProtocol.RCL_HEADER_START_BYTES: RCLProtocol.RCL_PROTOCOL_START_BYTES,
+            RCLProtocol.RCL_HEADER_PROTOCOL_VERSION: 1,
+            RCLProtocol.RCL_HEADER_REQUEST_ID: 1,
+            RCLProtocol.RCL_HEADER_MESSAGE_TYPE: RCLProtocol.RCL_MESSAGE_TYPE_CALL,
+            RCLProtocol.RCL_HEADER_DATA_LENGTH: 0,
+        }
+
+        legacy = self.__legacy_encode_header(parameters)
+        message = RCLProtocol.create_message(RCLProtocol.RCL_MESSAGE_TYPE_CALL, b"", 0, 1)
+
+        if legacy != message[:RCLProtocol.RCL_HEADERS_LENGTH]:
+            self._output.error_message('Legacy and struct headers are not equal')
+            return
+
+        cases = {
+            'legacy encode': lambda: self.__legacy_encode_header(parameters),
+            'legacy decode': lambda: self.__legacy_decode_header(legacy),
+            'struct encode': lambda: RCLProtocol.create_message(RCLProtocol.RCL_MESSAGE_TYPE_CALL, b"", 0, 1),
+            'struct decode': lambda: RCLProtocol.get_headers(message),
+        }
+
+        self._output.header(f"Encode and decode {args.count} headers")
+
+        for name, case in cases.items():
+            start = perf_counter()
+
+            for _ in range(args.count):
+                case()
+
+            elapsed = perf_counter() - start
+
+            self._output.line(f"{name:<14} {args.count / elapsed:>12,.0f} ops/s", 1)
+
+    def _exec_proto(self, args: argparse.Namespace):
+        builder = ProtoBuilder(*ProtoFileResolver(config()).parse())
+        resolver = CallMessageResolver()
+
+        parameters = {
+            'device': 'HP_LaserJet_M428',
+            'file': b'%PDF-1.4' + b'\x00' * 1024,
+            'mime-type': 'PDF',
+            'copies': 2,
+            'paper-size': 'A4',
+            'pages': [1, 3],
+        }
+
+        # Decoding starts from parsed message as received by server
+        codes = resolver.parse(resolver.create(builder.prepare_command('print', [], parameters)))
+
+        decoded = builder.from_codes(**codes)['parameters']
+
+        # Decoded parameters contain defaults of not sent parameters too
+        if any(decoded.get(key) != value for key, value in parameters.items()):
+            self._output.error_message('Decoded parameters are not equal to encoded')
+            return
+
+        cases = {
+            'encode': lambda: builder.prepare_command('print', [], parameters),
+            'decode': lambda: builder.from_codes(**codes),
+        }
+
+        self._output.header(f"Encode and decode {args.count} print calls")
+
+        for name, case in cases.items():
+            start = perf_counter()
+
+            for _ in range(args.count):
+                case()
+
+            elapsed = perf_counter() - start
+
+            self._output.line(f"{name:<14} {args.count / elapsed:>12,.0f} ops/s", 1)
+
+    @staticmethod
+    def __printers_payload(count: int) -> list:
+        with open(os.path.join(CWD, "tests", "dictionaries", "devices.json")) as file:
+            devices = json.load(file)
+
+        fields = [
+            PrinterService.PRINTER_PARAMETER_AVAILABLE,
+            PrinterService.PRINTER_PARAMETER_DISPLAY_NAME,
+            PrinterService.PRINTER_PARAMETER_DEVICE,
+            PrinterService.PRINTER_PARAMETER_NAME,
+            PrinterService.PRINTER_PARAMETER_SCOPE,
+            PrinterService.PRINTER_PARAMETER_HIDDEN,
+        ]
+
+        # Same fields as PrinterService creates from lpstat output
+        return [{field: devices[i % len(devices)][field] for field in fields} for i in range(count)]
+
+    def _exec_response(self, args: argparse.Namespace):
+        objects = ProtoFileResolver(config()).parse()[2]
+        payload = self.__printers_payload(args.printers)
+
+        resolvers = {
+            'json': ResponseMessageSuccessResolver(objects, False),
+            'binary': ResponseMessageSuccessResolver(objects, True),
+        }
+
+        self._output.header(f"Encode and decode {args.count} responses with {args.printers} printers")
+
+        for name, resolver in resolvers.items():
+            data = resolver.create(payload)
+
+            if resolver.parse(data) != payload:
+                self._output.error_message(f"Decoded {name} response is not equal to payload")
+                return
+
+            cases = {
+                'encode': lambda: resolver.create(payload),
+                'decode': lambda: resolver.parse(data),
+            }
+
+            for case_name, case in cases.items():
+                start = perf_counter()
+
+                for _ in range(args.count):
+                    case()
+
+                elapsed = perf_counter() - start
+
+                self._output.line(f"{name + ' ' + case_name:<14} {args.count / elapsed:>12,.0f} ops/s", 1)
+
+            self._output.line(f"{name + ' size':<14} {len(data):>12,} bytes", 1)
+
+    @staticmethod
+    def __ipp_client(server: ThreadingHTTPServer) -> IppClient:
+        printing = config('printing')
+        address = printing['ipp_server']
+
+        printing['ipp_server'] = f"127.0.0.1:{server.server_address[1]}"
+
+        try:
+            return IppClient(app().get('log'), config())
+        finally:
+            printing['ipp_server'] = address
+
+    def __check(self, name: str, ok: bool):
+        if ok:
+            self._output.success_message(name)
+        else:
+            self._output.error_message(name)
+
+    def _exec_ipp(self, args: argparse.Namespace):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), IppStandInHandler)
+        server.daemon_threads = True
+        server.mode, server.jobs, server.connections = 'ok', 0, set()
+
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        client = self.__ipp_client(server)
+
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as document:
+            document.write(os.urandom(64 * 1024))
+            document.flush()
+
+            def job():
+                return client.print_job('benchmark', document.name, {'copies': 1})
+
+            self._output.header(f"Send {args.count} jobs of 64 KB to stand-in IPP server")
+
+            start = perf_counter()
+
+            for _ in range(args.count):
+                job()
+
+            elapsed = perf_counter() - start
+
+            self._output.line(f"{'jobs':<14} {args.count / elapsed:>12,.0f} jobs/s", 1)
+            self._output.line(f"{'connections':<14} {len(server.connections):>12,}", 1)
+
+            self._output.header("Check failures")
+
+            # Kept connection closed by server is replaced before job is sent
+            server.mode, server.jobs = 'close', 0
+            job()
+            job()
+            self.__check("Closed kept connection: job is sent by new connection once", server.jobs == 2)
+
+            # Job is received, so it must not be sent again (it would be printed twice)
+            server.mode, server.jobs = 'drop', 0
+
+            try:
+                job()
+                failed = False
+            except OSError:
+                failed = False
+            except Exception:
+                failed = True
+
+            self.__check("Dropped response: job is reported as failed and not sent again", failed and server.jobs == 1)
+
+            # Only error which leads to printing by lp
+            server.shutdown()
+            server.server_close()
+
+            try:
+                job()
+                not_available = False
+            except OSError:
+                not_available = True
+            except Exception:
+                not_available = False
+
+            self.__check("Stopped server: job is not sent, printing falls back to lp", not_available)
+
+        client.close()
+
+    def __convert_documents(self, count: int, workers: int, convert: Callable[[int], bool]) -> float:
+        """ Returns documents per minute """
+        start = perf_counter()
+
+        with ThreadPoolExecutor(workers) as executor:
+            if not all(executor.map(convert, range(count))):
+                raise Exception('Document is not converted')
+
+        return count * 60 / (perf_counter() - start)
+
+    def _exec_libreoffice(self, args: argparse.Namespace):
+        convertor = LibreofficePdfConvert(app().get('log'), config(), app().get('platform'))
+        pool: LibreofficePool = app().get('libreoffice.pool')
+
+        if not convertor.binary():
+            self._output.error_message('Libreoffice is not installed')
+            return
+
+        with tempfile.TemporaryDirectory() as directory:
+            def cold(i: int) -> bool:
+                # Every soffice process gets own directory, the same output name is not overwritten by parallel process
+                os.makedirs(out := os.path.join(directory, 'cold', str(i)), exist_ok=True)
+
+                return convertor.docx_convert(args.document, out, 'pdf') is not None
+
+            def warm(i: int) -> bool:
+                return pool.convert_to_pdf(args.document, os.path.join(directory, f"warm-{i}.pdf")) is not None
+
+            self._output.header(f"Convert {args.count} documents to pdf")
+
+            self._output.line(f"{'cold':<14} {self.__convert_documents(args.count, 1, cold):>12,.1f} docs/min", 1)
+
+            if not pool.available():
+                self._output.error_message('Libreoffice daemons are not available (no uno module or pool size is 0)')
+                return
+
+            # Daemons start and first conversions are not measured
+            self.__convert_documents(pool.size(), pool.size(), warm)
+
+            self._output.line(f"{'warm':<14} {self.__convert_documents(args.count, 1, warm):>12,.1f} docs/min", 1)
+
+            self._output.line(
+                f"{'warm x' + str(pool.size()):<14} "
+                f"{self.__convert_documents(args.count, pool.size(), warm):>12,.1f} docs/min",
+                1
+            )
+
+    def _execute(self, args: argparse.Namespace):
+        pass
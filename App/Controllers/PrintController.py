@@ -1,15 +1,60 @@
 from App.Core import Config, MimeTypeConfig, Platform
 from App.Core.Logger import Log
 from App.Core.Network.Protocol.Responses.ResponseInternalError import ResponseInternalError
+from App.Services.PrintDeduplicator import PrintDeduplicator
 from App.Subprocesses import PrintingSubprocess
 
+from App.helpers import print_queue
+
 
 class PrintController:
     # noinspection PyMethodMayBeStatic
-    def invoke(self, parameters: dict, log: Log, config: Config, mime: MimeTypeConfig, platform: Platform):
-        ok, message = PrintingSubprocess(log, config, mime, platform).print(parameters)
+    def invoke(
+        self,
+        parameters: dict,
+        log: Log,
+        config: Config,
+        mime: MimeTypeConfig,
+        platform: Platform,
+        deduplicator: PrintDeduplicator
+    ):
+        if config.get('printing.queue'):
+            ok, job = print_queue().push(parameters)
+
+            return job if ok else ResponseInternalError(job)
+
+        subprocess = PrintingSubprocess(log, config, mime, platform)
+
+        subprocess.document_digest(parameters)
+
+        ok, message = deduplicator.run(PrintDeduplicator.key(parameters), lambda: subprocess.print(parameters))
 
         if not ok:
             return ResponseInternalError(message)
 
         return None
+
+    # noinspection PyMethodMayBeStatic
+    def status(self, parameters: dict, config: Config):
+        if not config.get('printing.queue'):
+            return ResponseInternalError("Print queue is disabled")
+
+        if (job_id := parameters.get('job')) is None:
+            return print_queue().active()
+
+        if not (job := print_queue().status(job_id)):
+            return ResponseInternalError(f"Print job {job_id} not found")
+
+        return [job]
+
+    # noinspection PyMethodMayBeStatic
+    def cancel(self, parameters: dict, config: Config):
+        if not config.get('printing.queue'):
+            return ResponseInternalError("Print queue is disabled")
+
+        ok, message = print_queue().cancel(parameters['job'])
+
+        if not ok:
+            return ResponseInternalError(message)
+
+        return print_queue().status(parameters['job'])
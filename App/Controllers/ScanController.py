@@ -1,15 +1,19 @@
-from App.Core.Network.Protocol.Responses import ResponseInternalError
-from App.Subprocesses.ScanImage import ScanImage
-from App.Core import Config
-from App.Core.Logger import Log
-
-from App.helpers import cache
+from App.Core.Network.Protocol.Responses import ResponseInternalError, ResponseStream
+from App.Services.ScanQueue import ScanQueue
+from App.Services.ScannerInventory import ScannerInventory
 
 
 class ScanController:
     # noinspection PyMethodMayBeStatic
-    def invoke(self, parameters: dict, log: Log, config: Config):
-        ok, res = ScanImage(log, config).scan(parameters)
+    def invoke(self, parameters: dict, queue: ScanQueue):
+        if error := queue.check(parameters):
+            return ResponseInternalError(error)
+
+        # Scanned image is sent by chunks while scanner is scanning (it is collected without chunked messages)
+        if parameters.pop('stream', False):
+            return ResponseStream(queue.scan_stream(parameters))
+
+        ok, res = queue.scan(parameters)
 
         if ok:
             return res
@@ -17,10 +21,19 @@ class ScanController:
         return ResponseInternalError(res)
 
     # noinspection PyMethodMayBeStatic
-    def devices(self, log: Log, config: Config, parameters: dict):
-        update = parameters.get('update') or False
+    def batch(self, parameters: dict, queue: ScanQueue):
+        if error := queue.check(parameters):
+            return ResponseInternalError(error)
+
+        pdf = parameters.pop('pdf', False)
 
-        if update or not cache().has('devices'):
-            cache('devices', ScanImage(log, config).device_list())
+        # Pages are sent while feeder is scanning (they are collected without chunked messages)
+        return ResponseStream(queue.scan_batch(parameters, pdf))
 
-        return cache('devices')
+    # noinspection PyMethodMayBeStatic
+    def devices(self, inventory: ScannerInventory, parameters: dict):
+        return inventory.get(parameters.get('update') or False)
+
+    # noinspection PyMethodMayBeStatic
+    def queue(self, queue: ScanQueue, parameters: dict):
+        return queue.jobs(parameters.get('device'))
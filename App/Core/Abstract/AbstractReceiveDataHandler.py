@@ -1,7 +1,15 @@
 from abc import ABC, abstractmethod
+from typing import Iterator, Union
 
 
 class AbstractReceiveDataHandler(ABC):
+    """ Response is message or messages sent as soon as each of them is produced (streamed response) """
+
+    @abstractmethod
+    def handle(self, data: bytes) -> Union[bytes, Iterator[bytes]]:
+        pass
+
     @abstractmethod
-    def handle(self, data: bytes) -> bytes:
+    def handle_request(self, request) -> Union[bytes, Iterator[bytes]]:
+        """ Handle request already parsed by server while receiving (streamed call request) """
         pass
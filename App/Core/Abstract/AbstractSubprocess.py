@@ -1,9 +1,11 @@
 from abc import ABC
-from typing import Optional, List, Tuple, Union
+from typing import Iterator, Optional, List, Tuple, Union
+import os
 import platform
 
 from App.Core import Config
 from App.Core.Logger import Log
+from App.Core.SubprocessRunner import SubprocessRunner
 import subprocess
 
 
@@ -18,6 +20,9 @@ class AbstractSubprocess(ABC):
         TARGET_PLATFORM_CMD_WSL,
     ]
 
+    RUNNER_SYNC = 'sync'
+    RUNNER_ASYNCIO = 'asyncio'
+
     def __init__(self, log: Log, config: Config, command: Union[List[str], str], remote_cmd: bool = True):
         self._command: Union[List[str], str] = command
 
@@ -37,12 +42,26 @@ class AbstractSubprocess(ABC):
         self._target_platform_cmd = self._config.get('target_platform_cmd')
         self._remote_cmd = remote_cmd
 
+        self._binary = self.__binary_name(self._command[0]) if self._command and self._command[0] else None
+        self._timeout = self._config['timeouts'].get(self._binary, self._config['timeout'])
+
         if self._target_platform_cmd not in self.TARGETS_PLATFORMS_CMD:
             raise Exception(f'Remote targets not supported ({self._target_platform_cmd}).')
 
+    @staticmethod
+    def __binary_name(command: str) -> str:
+        """ Key of binary in 'timeouts' and 'limits' of subprocesses config ('soffice' for 'C:\\...\\soffice.exe') """
+        return os.path.splitext(os.path.basename(command.replace('\\', '/')))[0].lower()
+
     def set_command_is_remote(self, enable: bool):
         self._remote_cmd = enable
 
+    def set_timeout(self, seconds: Optional[float]):
+        """ Seconds to wait for process, then process is killed (0 or None - wait forever) """
+        self._timeout = seconds
+
+        return self
+
     def set_multi_character_parameters_delimiter(self, delimiter: str):
         self._multi_character_parameters_delimiter = delimiter
 
@@ -137,14 +156,7 @@ class AbstractSubprocess(ABC):
 
         return " ".join(wrapped)
 
-    def run(
-        self,
-        subcommands: Optional[list] = None,
-        parameters: Optional[dict] = None,
-        options: dict = None
-    ) -> Tuple[bool, str]:
-        options = options or {}
-
+    def __create_command(self, subcommands: Optional[list], parameters: Optional[dict], options: dict) -> List[str]:
         if subcommands is None:
             subcommands = []
 
@@ -163,30 +175,151 @@ class AbstractSubprocess(ABC):
 
         self._log.debug(f"Running subprocess: `{self.__to_str(cmd)}`", {'object': self})
 
-        if self._config['debug']:
-            self._log.warning(f'Subprocess debug mode enabled. Command NOT EXECUTED!!!.')
+        return cmd
 
-            return True, ""
+    def __timeout(self, options: dict) -> Optional[float]:
+        return options['timeout'] if 'timeout' in options else self._timeout
 
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, input=options.get('input'))
+    def __result(
+        self,
+        cmd: List[str],
+        options: dict,
+        returncode: Optional[int],
+        stdout: bytes,
+        stderr: bytes
+    ) -> Tuple[bool, str]:
+        if returncode is None:
+            message = f"Process killed by timeout ({self.__timeout(options)} s). `{self.__to_str(cmd)}`"
+
+            self._log.error(message, {'object': self})
+            return False, message
 
         out_name = options.get("output")
 
         if out_name == "join":
             encoding = "cp1251" if platform.system() == 'Windows' else "utf-8"
-            out = result.stdout.decode(encoding).strip()
-            err = result.stderr.decode(encoding).strip()
+            out = stdout.decode(encoding).strip()
+            err = stderr.decode(encoding).strip()
             data = f"\n@Stdout:\n{out}\n\n@Stderr:\n{err}"
         else:
-            data = (
-                result.__getattribute__(out_name or 'stderr' if result.returncode > 0 else 'stdout')
-                .decode("utf-8")
-                .strip()
-            )
+            output = {'stdout': stdout, 'stderr': stderr}
+            data = output[out_name or 'stderr' if returncode > 0 else 'stdout'].decode("utf-8").strip()
 
-        if result.returncode > 0:
+        if returncode > 0:
             self._log.error(f'Error. {data}', {'object': self})
             return False, data
 
         self._log.success(f"Success process. `{self.__to_str(cmd)}`", {'object': self})
         return True, data
+
+    def __run_sync(self, cmd: List[str], options: dict) -> Tuple[Optional[int], bytes, bytes]:
+        try:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                input=options.get('input'),
+                timeout=self.__timeout(options) or None
+            )
+        except subprocess.TimeoutExpired:
+            return None, b'', b''
+
+        # Output is passed at once without asyncio runner
+        if stream := options.get('stream'):
+            stream(result.stdout)
+            return result.returncode, b'', result.stderr
+
+        return result.returncode, result.stdout, result.stderr
+
+    def __runner(self) -> SubprocessRunner:
+        return SubprocessRunner(self._config['limits'])
+
+    def run(
+        self,
+        subcommands: Optional[list] = None,
+        parameters: Optional[dict] = None,
+        options: dict = None
+    ) -> Tuple[bool, str]:
+        """
+        Options:
+            additional - arguments after parameters
+            input - bytes written to stdin
+            output - 'stdout', 'stderr' or 'join' (both)
+            timeout - seconds to wait for process instead of timeout of binary
+            stream - callable receiving blocks of stdout while process is running (stdout is not returned)
+        """
+        options = options or {}
+
+        cmd = self.__create_command(subcommands, parameters, options)
+
+        if self._config['debug']:
+            self._log.warning(f'Subprocess debug mode enabled. Command NOT EXECUTED!!!.')
+
+            return True, ""
+
+        if self._config['runner'] == self.RUNNER_ASYNCIO:
+            result = self.__runner().execute_sync(
+                self._binary, cmd, options.get('input'), self.__timeout(options), options.get('stream')
+            )
+        else:
+            result = self.__run_sync(cmd, options)
+
+        return self.__result(cmd, options, *result)
+
+    def stream(
+        self,
+        subcommands: Optional[list] = None,
+        parameters: Optional[dict] = None,
+        options: dict = None
+    ) -> Iterator[bytes]:
+        """
+        Yields blocks of stdout while process is running. Slow consumer pauses process, so output is not
+        kept in memory. Raises Exception if process failed. Closing of generator kills process.
+
+        Sync runner cannot stream: whole stdout is kept in memory and yielded after process is finished.
+        """
+        options = options or {}
+
+        cmd = self.__create_command(subcommands, parameters, options)
+
+        if self._config['debug']:
+            self._log.warning(f'Subprocess debug mode enabled. Command NOT EXECUTED!!!.')
+
+            return
+
+        if self._config['runner'] != self.RUNNER_ASYNCIO:
+            blocks = []
+            result = self.__run_sync(cmd, {**options, 'stream': blocks.append})
+
+            yield from blocks
+        else:
+            result = yield from self.__runner().stream(
+                self._binary, cmd, options.get('input'), self.__timeout(options)
+            )
+
+        ok, message = self.__result(cmd, options, *result)
+
+        if not ok:
+            raise Exception(message)
+
+    async def run_async(
+        self,
+        subcommands: Optional[list] = None,
+        parameters: Optional[dict] = None,
+        options: dict = None
+    ) -> Tuple[bool, str]:
+        """ The same as 'run', but it is awaited by event loop instead of blocking thread """
+        options = options or {}
+
+        cmd = self.__create_command(subcommands, parameters, options)
+
+        if self._config['debug']:
+            self._log.warning(f'Subprocess debug mode enabled. Command NOT EXECUTED!!!.')
+
+            return True, ""
+
+        result = await self.__runner().execute(
+            self._binary, cmd, options.get('input'), self.__timeout(options), options.get('stream')
+        )
+
+        return self.__result(cmd, options, *result)
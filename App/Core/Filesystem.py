@@ -1,3 +1,4 @@
+import hashlib
 import os
 import json
 import tempfile
@@ -14,6 +15,8 @@ except ImportError:
 
 
 class Filesystem:
+    DIGEST_READ_BLOCK_SIZE = 1024 * 1024
+
     @staticmethod
     def _prepare_path(path: str) -> str:
         return os.path.expanduser(path)
@@ -43,8 +46,8 @@ class Filesystem:
         return Filesystem.write_file(Filesystem.create_tmp_path(path), content)
 
     @staticmethod
-    def write_file(path: str, content: Union[str, bytes]) -> bool:
-        is_bytes = isinstance(content, bytes)
+    def write_file(path: str, content: Union[str, bytes, bytearray, memoryview]) -> bool:
+        is_bytes = isinstance(content, (bytes, bytearray, memoryview))
 
         with open(Filesystem._prepare_path(path), 'w' + ('b' if is_bytes else '')) as file:
             file.write(content)
@@ -85,6 +88,17 @@ class Filesystem:
     def create_file(path: str):
         Filesystem.write_file(path, "")
 
+    @staticmethod
+    def digest(path: str) -> str:
+        """ Sha256 of file content. File is read by blocks """
+        digest = hashlib.sha256()
+
+        with open(Filesystem._prepare_path(path), 'rb') as file:
+            while block := file.read(Filesystem.DIGEST_READ_BLOCK_SIZE):
+                digest.update(block)
+
+        return digest.hexdigest()
+
     @staticmethod
     def exists(path: str) -> bool:
         return os.path.exists(Filesystem._prepare_path(path))
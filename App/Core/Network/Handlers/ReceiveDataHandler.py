@@ -1,12 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Union
+
 from App import Application
+from App.Core import Config
 from App.Core.Abstract import AbstractReceiveDataHandler
+from App.Core.Logger import Log
 from App.Core.Network.Protocol import RCL
-from App.Core.Network.Protocol.Responses import AbstractResponse
+from App.Core.Network.Protocol.Requests import AbstractRequest, BatchRequest, CallRequest
+from App.Core.Network.Protocol.Responses import (
+    AbstractResponse,
+    ResponseSuccess,
+    ResponseInternalError,
+    ResponseBatch,
+    ResponseStream,
+)
 
 
 class ReceiveDataHandler(AbstractReceiveDataHandler):
-    def __init__(self, rcl: RCL):
+    def __init__(self, rcl: RCL, log: Log, config: Config):
         self.__rcl = rcl
+        self.__logger = log
+
+        # Calls of batch are handled by own pool, so batch does not wait for threads of server pool it occupies
+        self.__batch_executor = ThreadPoolExecutor(config.get('server.batch_workers'), 'rcl-batch')
 
     @staticmethod
     def __get_action_name(subcommands: list) -> str:
@@ -15,9 +31,7 @@ class ReceiveDataHandler(AbstractReceiveDataHandler):
 
         return '_'.join(subcommands)
 
-    def handle(self, data: bytes) -> bytes:
-        request = self.__rcl.parse_request(data)
-
+    def __dispatch(self, request: CallRequest) -> AbstractResponse:
         received_data = request.data()
 
         action = self.__get_action_name(received_data['subcommands'])
@@ -28,6 +42,49 @@ class ReceiveDataHandler(AbstractReceiveDataHandler):
         })
 
         if isinstance(response, AbstractResponse):
-            return self.__rcl.create_response(response)
+            return response
+
+        return ResponseSuccess(response)
+
+    def __dispatch_batch_call(self, request: CallRequest) -> AbstractResponse:
+        # Failed call does not fail other calls of batch, its error is returned as status of the call
+        try:
+            response = self.__dispatch(request)
+
+            # Responses of batch are sent together, so streamed response is read at once
+            if isinstance(response, ResponseStream):
+                return ResponseSuccess(response.collect())
+
+            return response
+        except Exception as e:
+            self.__logger.error(f"Failed to handle batch call '{request.command()}'. {str(e)}", {"object": self})
+
+            return ResponseInternalError(str(e))
+
+    def __dispatch_batch(self, batch: BatchRequest) -> ResponseBatch:
+        requests = batch.requests()
+
+        if batch.sequential() or len(requests) < 2:
+            return ResponseBatch([self.__dispatch_batch_call(request) for request in requests])
+
+        return ResponseBatch(list(self.__batch_executor.map(self.__dispatch_batch_call, requests)))
+
+    def __call(self, request: AbstractRequest) -> Union[bytes, Iterator[bytes]]:
+        if isinstance(request, BatchRequest):
+            response = self.__dispatch_batch(request)
+        else:
+            response = self.__dispatch(request)
+
+        if isinstance(response, ResponseStream) and self.__rcl.can_stream_response():
+            return self.__rcl.create_response_stream(response, request.request_id())
+
+        return self.__rcl.create_response(response, request.request_id())
+
+    def handle(self, data: bytes) -> Union[bytes, Iterator[bytes]]:
+        return self.handle_request(self.__rcl.parse_request(data))
 
-        return self.__rcl.response_success(response)
+    def handle_request(self, request: AbstractRequest) -> Union[bytes, Iterator[bytes]]:
+        try:
+            return self.__call(request)
+        finally:
+            request.close()
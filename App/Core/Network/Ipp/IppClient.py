@@ -0,0 +1,265 @@
+import getpass
+import itertools
+import os
+import select
+import socket
+from http.client import HTTPConnection, HTTPException, RemoteDisconnected
+from queue import Empty, LifoQueue
+from threading import Lock
+from typing import Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+from App.Core import Config
+from App.Core.Logger import Log
+from App.Core.Network.Ipp.IppMessage import IppMessage
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+
+        self.__path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.__path)
+
+
+class IppClient:
+    """
+    Sends print jobs to CUPS by IPP (Print-Job operation) without starting lp for every job.
+
+    Connections to CUPS are kept open and reused by next jobs. Document is sent by blocks after IPP
+    request, so it is not loaded to memory. Server is address ('localhost:631') or path of CUPS
+    unix socket ('/run/cups/cups.sock').
+
+    Options are encoded as lp encodes '-o' options: comma separated value is list of values,
+    'landscape' is 'orientation-requested' and 'page-ranges' is list of ranges.
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    DOCUMENT_FORMAT = 'application/octet-stream'
+
+    ORIENTATION_LANDSCAPE = 4
+
+    # Tags of options which are not names of CUPS options
+    OPTIONS_TAGS = {
+        'copies': IppMessage.TAG_INTEGER,
+        'media': IppMessage.TAG_KEYWORD,
+        'sides': IppMessage.TAG_KEYWORD,
+        'page-ranges': IppMessage.TAG_RANGE,
+        'orientation-requested': IppMessage.TAG_ENUM,
+    }
+
+    def __init__(self, log: Log, config: Config):
+        self.__log = log
+
+        self.__server = config.get('printing.ipp_server')
+        self.__timeout = config.get('printing.ipp_timeout')
+        self.__user = getpass.getuser()
+
+        self.__idle: LifoQueue = LifoQueue()
+        self.__lock = Lock()
+        self.__request_ids = itertools.count(1)
+
+    def __create_connection(self) -> HTTPConnection:
+        if self.__server.startswith('/'):
+            return UnixHTTPConnection(self.__server, self.__timeout)
+
+        return HTTPConnection(self.__server, timeout=self.__timeout)
+
+    def __request_id(self) -> int:
+        with self.__lock:
+            return next(self.__request_ids)
+
+    @staticmethod
+    def __printer_path(printer: str) -> str:
+        return f"/printers/{quote(printer, safe='')}"
+
+    @staticmethod
+    def __page_ranges(value: str) -> List[Tuple[int, int]]:
+        ranges = []
+
+        for item in str(value).split(','):
+            first, _, last = item.partition('-')
+            ranges.append((int(first), int(last or first)))
+
+        return ranges
+
+    def __encode_option(self, message: IppMessage, name: str, value: Union[str, int, bool]):
+        if name == 'landscape':
+            if value:
+                message.add(IppMessage.TAG_JOB, IppMessage.TAG_ENUM, 'orientation-requested', self.ORIENTATION_LANDSCAPE)
+            return
+
+        tag = self.OPTIONS_TAGS.get(name)
+
+        if tag == IppMessage.TAG_RANGE:
+            message.add(IppMessage.TAG_JOB, tag, name, self.__page_ranges(value))
+            return
+
+        if isinstance(value, bool):
+            message.add(IppMessage.TAG_JOB, IppMessage.TAG_BOOLEAN, name, value)
+            return
+
+        if tag in (IppMessage.TAG_INTEGER, IppMessage.TAG_ENUM) or isinstance(value, int):
+            message.add(IppMessage.TAG_JOB, tag or IppMessage.TAG_INTEGER, name, int(value))
+            return
+
+        message.add(IppMessage.TAG_JOB, tag or IppMessage.TAG_NAME, name, str(value).split(','))
+
+    def __print_job_request(self, printer: str, job_name: str, options: dict) -> bytes:
+        message = IppMessage(IppMessage.OPERATION_PRINT_JOB, self.__request_id())
+
+        operation = [
+            (IppMessage.TAG_CHARSET, 'attributes-charset', 'utf-8'),
+            (IppMessage.TAG_LANGUAGE, 'attributes-natural-language', 'en'),
+            (IppMessage.TAG_URI, 'printer-uri', f"ipp://localhost{self.__printer_path(printer)}"),
+            (IppMessage.TAG_NAME, 'requesting-user-name', self.__user),
+            (IppMessage.TAG_NAME, 'job-name', job_name),
+            (IppMessage.TAG_MIME_TYPE, 'document-format', self.DOCUMENT_FORMAT),
+        ]
+
+        for tag, name, value in operation:
+            message.add(IppMessage.TAG_OPERATION, tag, name, value)
+
+        for name, value in options.items():
+            if value is not None:
+                self.__encode_option(message, name, value)
+
+        return message.encode()
+
+    def __body(self, request: bytes, path: str) -> Iterator[bytes]:
+        yield request
+
+        with open(path, 'rb') as file:
+            while block := file.read(self.BLOCK_SIZE):
+                yield block
+
+    def __request(self, connection: HTTPConnection, printer: str, request: bytes, path: str):
+        try:
+            connection.request(
+                'POST',
+                self.__printer_path(printer),
+                body=self.__body(request, path),
+                headers={
+                    'Content-Type': 'application/ipp',
+                    'Content-Length': str(len(request) + os.path.getsize(path)),
+                },
+            )
+        except BaseException:
+            connection.close()
+            raise
+
+    def __response(self, connection: HTTPConnection) -> bytes:
+        try:
+            response = connection.getresponse()
+            data = response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+        if response.status != 200:
+            connection.close()
+            raise HTTPException(f"IPP server responded with HTTP {response.status} {response.reason}")
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.__idle.put(connection)
+
+        return data
+
+    def __connect(self) -> HTTPConnection:
+        """ Raises OSError if server is not available """
+        connection = self.__create_connection()
+
+        try:
+            connection.connect()
+
+            # Headers and blocks of document are separate writes, they are not delayed waiting for ack
+            if connection.sock.family != socket.AF_UNIX:
+                connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except BaseException:
+            connection.close()
+            raise
+
+        return connection
+
+    @staticmethod
+    def __closed(connection: HTTPConnection) -> bool:
+        """ Idle connection is readable only if server has closed it """
+        try:
+            return connection.sock is None or bool(select.select([connection.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def __idle_connection(self) -> Optional[HTTPConnection]:
+        while True:
+            try:
+                connection = self.__idle.get_nowait()
+            except Empty:
+                return None
+
+            if not self.__closed(connection):
+                return connection
+
+            connection.close()
+
+    def __post(self, printer: str, request: bytes, path: str) -> bytes:
+        connection = self.__idle_connection()
+
+        if connection is not None:
+            try:
+                self.__request(connection, printer, request, path)
+            except (ConnectionError, RemoteDisconnected):
+                # Server has closed kept connection before job was sent, so job is sent by new connection
+                connection = None
+            except (OSError, HTTPException) as e:
+                raise Exception(f"Cannot send job to IPP server. {str(e)}")
+
+        if connection is None:
+            connection = self.__connect()
+
+            try:
+                self.__request(connection, printer, request, path)
+            except (OSError, HTTPException) as e:
+                raise Exception(f"Cannot send job to IPP server. {str(e)}")
+
+        # Job may be received by server, so it is never sent again after this point
+        try:
+            return self.__response(connection)
+        except (OSError, HTTPException) as e:
+            raise Exception(f"IPP server did not respond to job. {str(e)}")
+
+    def print_job(self, printer: str, path: str, options: Optional[dict] = None) -> int:
+        """
+        Returns id of created job. Raises OSError if CUPS is not available (job is not sent) and
+        Exception if job is failed or rejected after it has been sent.
+        """
+        request = self.__print_job_request(printer, os.path.basename(path), options or {})
+
+        status, _, groups = IppMessage.decode(self.__post(printer, request, path))
+
+        operation = groups.get(IppMessage.TAG_OPERATION, {})
+        job = groups.get(IppMessage.TAG_JOB, {})
+
+        if status >= IppMessage.STATUS_ERROR:
+            message = (operation.get('status-message') or [f"status 0x{status:04x}"])[0]
+            raise Exception(f"Printer '{printer}' rejected job. {message}")
+
+        if not (job_id := (job.get('job-id') or [None])[0]):
+            raise Exception("IPP server did not return id of job")
+
+        self.__log.debug(f"Job {job_id} sent to printer '{printer}' by IPP", {"object": self})
+
+        return job_id
+
+    def close(self):
+        while True:
+            try:
+                self.__idle.get_nowait().close()
+            except Empty:
+                return
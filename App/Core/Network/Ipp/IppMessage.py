@@ -0,0 +1,153 @@
+import struct
+from typing import Dict, List, Optional, Tuple, Union
+
+Value = Union[int, bool, str, Tuple[int, int], bytes]
+
+
+class IppMessage:
+    """
+    Encoding of IPP/1.1 requests and decoding of responses (RFC 8010).
+
+    Only value types used by printing are supported, values of other types are decoded as bytes.
+    """
+
+    VERSION = (1, 1)
+
+    # Delimiter tags
+    TAG_OPERATION = 0x01
+    TAG_JOB = 0x02
+    TAG_END = 0x03
+    TAG_PRINTER = 0x04
+    TAG_UNSUPPORTED = 0x05
+
+    # Value tags
+    TAG_INTEGER = 0x21
+    TAG_BOOLEAN = 0x22
+    TAG_ENUM = 0x23
+    TAG_RANGE = 0x33
+    TAG_TEXT = 0x41
+    TAG_NAME = 0x42
+    TAG_KEYWORD = 0x44
+    TAG_URI = 0x45
+    TAG_CHARSET = 0x47
+    TAG_LANGUAGE = 0x48
+    TAG_MIME_TYPE = 0x49
+
+    # Operations
+    OPERATION_PRINT_JOB = 0x0002
+    OPERATION_CANCEL_JOB = 0x0008
+    OPERATION_GET_JOB_ATTRIBUTES = 0x0009
+
+    # Status codes below this one are successful
+    STATUS_ERROR = 0x0400
+
+    STRING_TAGS = [TAG_TEXT, TAG_NAME, TAG_KEYWORD, TAG_URI, TAG_CHARSET, TAG_LANGUAGE, TAG_MIME_TYPE]
+
+    def __init__(self, operation: int, request_id: int):
+        self.__operation = operation
+        self.__request_id = request_id
+
+        # Group tag, [(value tag, name, values)]
+        self.__groups: List[Tuple[int, List[Tuple[int, str, List[Value]]]]] = []
+
+    def add(self, group: int, tag: int, name: str, value: Union[Value, List[Value]]) -> 'IppMessage':
+        values = value if isinstance(value, list) else [value]
+
+        if not self.__groups or self.__groups[-1][0] != group:
+            self.__groups.append((group, []))
+
+        self.__groups[-1][1].append((tag, name, values))
+
+        return self
+
+    @staticmethod
+    def __encode_value(tag: int, value: Value) -> bytes:
+        if tag in (IppMessage.TAG_INTEGER, IppMessage.TAG_ENUM):
+            return struct.pack('>i', value)
+
+        if tag == IppMessage.TAG_BOOLEAN:
+            return struct.pack('>?', value)
+
+        if tag == IppMessage.TAG_RANGE:
+            return struct.pack('>ii', *value)
+
+        if isinstance(value, bytes):
+            return value
+
+        return str(value).encode()
+
+    def encode(self) -> bytes:
+        data = bytearray(struct.pack('>BBHi', *self.VERSION, self.__operation, self.__request_id))
+
+        for group, attributes in self.__groups:
+            data.append(group)
+
+            for tag, name, values in attributes:
+                for i, value in enumerate(values):
+                    # Additional values of attribute have empty name
+                    _name = name.encode() if i == 0 else b''
+                    _value = self.__encode_value(tag, value)
+
+                    data += struct.pack('>BH', tag, len(_name)) + _name + struct.pack('>H', len(_value)) + _value
+
+        data.append(self.TAG_END)
+
+        return bytes(data)
+
+    @staticmethod
+    def __decode_value(tag: int, value: bytes) -> Value:
+        if tag in (IppMessage.TAG_INTEGER, IppMessage.TAG_ENUM) and len(value) == 4:
+            return struct.unpack('>i', value)[0]
+
+        if tag == IppMessage.TAG_BOOLEAN and len(value) == 1:
+            return value != b'\x00'
+
+        if tag == IppMessage.TAG_RANGE and len(value) == 8:
+            return struct.unpack('>ii', value)
+
+        if tag in IppMessage.STRING_TAGS:
+            return value.decode(errors='replace')
+
+        return value
+
+    @staticmethod
+    def decode(data: bytes) -> Tuple[int, int, Dict[int, Dict[str, List[Value]]]]:
+        """ Returns status code, request id and attributes by groups """
+        if len(data) < 8:
+            raise Exception("IPP response is too short")
+
+        _, _, status, request_id = struct.unpack('>BBHi', data[:8])
+
+        groups: Dict[int, Dict[str, List[Value]]] = {}
+        attributes: Optional[Dict[str, List[Value]]] = None
+        name = None
+        offset = 8
+
+        while offset < len(data):
+            tag = data[offset]
+            offset += 1
+
+            if tag == IppMessage.TAG_END:
+                break
+
+            if tag < 0x10:
+                attributes = groups.setdefault(tag, {})
+                continue
+
+            name_length, = struct.unpack('>H', data[offset:offset + 2])
+            offset += 2
+
+            if name_length:
+                name = data[offset:offset + name_length].decode(errors='replace')
+                offset += name_length
+
+            value_length, = struct.unpack('>H', data[offset:offset + 2])
+            offset += 2
+
+            value = data[offset:offset + value_length]
+            offset += value_length
+
+            if attributes is not None and name is not None:
+                attributes.setdefault(name, []).append(IppMessage.__decode_value(tag, value))
+
+        return status, request_id, groups
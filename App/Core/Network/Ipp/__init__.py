@@ -0,0 +1,7 @@
+from .IppMessage import IppMessage
+from .IppClient import IppClient
+
+__all__ = [
+    "IppMessage",
+    "IppClient",
+]
@@ -1,5 +1,5 @@
 from App.Core.Abstract import AbstractConnectionHandler, AbstractReceiveDataHandler
-from App.Core.Network import TcpServer
+from App.Core.Network import TcpServer, AsyncTcpServer
 from App.Core import Config, Platform
 from App.Core.Logger import Log
 from App.Core.Network.Protocol import RCL
@@ -9,6 +9,9 @@ if Platform.system_is('Windows'):
 
 
 class NetworkManager:
+    SERVER_MODE_THREAD = 'thread'
+    SERVER_MODE_ASYNCIO = 'asyncio'
+
     def __init__(self, log: Log, config: Config, rcl: RCL, platform: Platform):
         self.__logger = log
         self.__config = config
@@ -18,10 +21,28 @@ class NetworkManager:
     def __debug(self, message: str):
         self.__logger.debug(message, {'object': self})
 
+    def __create_server(
+            self,
+            connection_handler: AbstractConnectionHandler,
+            receive_handler: AbstractReceiveDataHandler
+    ):
+        mode = self.__config.get('server.mode')
+
+        if mode == self.SERVER_MODE_ASYNCIO:
+            return AsyncTcpServer(self.__config, self.__logger, self.__protocol, connection_handler, receive_handler)
+
+        if mode != self.SERVER_MODE_THREAD:
+            raise Exception(f"Unknown server mode '{mode}'")
+
+        if self.__config.get('server.multiplexing'):
+            self.__logger.warning("Requests multiplexing is supported only in asyncio server mode.", {'object': self})
+
+        return TcpServer(self.__config, self.__logger, self.__protocol, connection_handler, receive_handler)
+
     def start_server(self, connection_handler: AbstractConnectionHandler, receive_handler: AbstractReceiveDataHandler):
         debug = self.__config.get('server.debug')
 
-        server = TcpServer(self.__config, self.__logger, connection_handler, receive_handler)
+        server = self.__create_server(connection_handler, receive_handler)
 
         server.daemon = self.__config.get('server.daemon')
 
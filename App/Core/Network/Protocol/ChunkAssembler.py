@@ -0,0 +1,114 @@
+from typing import Optional, Union, Dict
+
+from .RCLProtocol import RCLProtocol
+from .Resolvers import CallMessageStreamParser
+
+
+class ChunkAssembler:
+    """
+    Assembles chunked message from received chunks.
+
+    Chunks are applied in sequence order. Chunk received after corrupted one is kept until corrupted chunk
+    is received again, so only corrupted chunk has to be resent.
+
+    Call message is fed to CallMessageStreamParser, so big parameters are spooled as chunks arrive.
+    Data of other messages is assembled in memory. Data of streamed message (unknown total length) grows
+    with every chunk.
+    """
+
+    def __init__(
+            self,
+            message_type: int,
+            request_id: int,
+            total_length: int,
+            parser: Optional[CallMessageStreamParser],
+            compressed: bool = False
+    ):
+        self.__message_type = message_type
+        self.__compressed = compressed
+        self.__request_id = request_id
+        self.__total_length = total_length
+        self.__parser = parser
+
+        self.__streamed = total_length == RCLProtocol.RCL_CHUNK_TOTAL_LENGTH_UNKNOWN
+
+        self.__data: Optional[bytearray] = None if parser else bytearray(total_length)
+        self.__offset = 0
+
+        self.__expected = 0
+        self.__last: Optional[int] = None
+        self.__pending: Dict[int, bytes] = {}
+
+    def message_type(self) -> int:
+        return self.__message_type
+
+    def compressed(self) -> bool:
+        return self.__compressed
+
+    def request_id(self) -> int:
+        return self.__request_id
+
+    def parser(self) -> Optional[CallMessageStreamParser]:
+        return self.__parser
+
+    def data(self) -> memoryview:
+        return memoryview(self.__data)
+
+    def done(self) -> bool:
+        return self.__last is not None and self.__expected > self.__last
+
+    def close(self):
+        if self.__parser:
+            self.__parser.close()
+
+    def __apply(self, payload: Union[bytes, memoryview]):
+        if not self.__streamed and self.__offset + len(payload) > self.__total_length:
+            raise Exception("Chunks are longer than message")
+
+        if self.__parser:
+            self.__parser.feed(payload)
+        elif self.__streamed:
+            self.__data += payload
+        else:
+            self.__data[self.__offset:self.__offset + len(payload)] = payload
+
+        self.__offset += len(payload)
+        self.__expected += 1
+
+    def add(self, data: Union[bytes, memoryview]) -> Optional[int]:
+        """ Returns sequence number of chunk to resend if chunk is corrupted """
+        headers = RCLProtocol.get_headers(data)
+
+        if headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE] != RCLProtocol.RCL_MESSAGE_TYPE_CHUNK:
+            raise Exception("Chunked message is interrupted by other message")
+
+        if not (chunk := RCLProtocol.get_chunk_headers(data)):
+            raise Exception("Chunk headers are corrupted")
+
+        if headers[RCLProtocol.RCL_HEADER_REQUEST_ID] != self.__request_id:
+            raise Exception("Chunked message is interrupted by other request")
+
+        sequence = chunk[RCLProtocol.RCL_CHUNK_HEADER_SEQUENCE]
+        _len = headers[RCLProtocol.RCL_HEADER_DATA_LENGTH]
+
+        if not RCLProtocol.check_crc(data, _len):
+            return sequence
+
+        if chunk[RCLProtocol.RCL_CHUNK_HEADER_FLAGS] & RCLProtocol.RCL_CHUNK_FLAG_LAST:
+            self.__last = sequence
+
+        if sequence < self.__expected or sequence in self.__pending:
+            return None
+
+        payload = RCLProtocol.get_chunk_payload(data, _len)
+
+        if sequence > self.__expected:
+            self.__pending[sequence] = bytes(payload)
+            return None
+
+        self.__apply(payload)
+
+        while self.__expected in self.__pending:
+            self.__apply(self.__pending.pop(self.__expected))
+
+        return None
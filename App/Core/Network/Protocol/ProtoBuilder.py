@@ -1,12 +1,27 @@
-from typing import Union, Any, List
+from typing import Any, Callable, Dict, Tuple
+
+from App.Core.Utils import SpoolFile
 
 
 class ProtoBuilder:
+    """
+    Encodes and decodes call parameters by parsed proto file.
+
+    Every command and subcommand is compiled once to encoders and decoders specialized by parameter type,
+    number and variants. Calls dispatch over flat tables: encoders by parameter name, decoders by
+    parameter code, so proto file data is not interpreted for every request.
+    """
+
     def __init__(self, commands: dict, codes: dict, types: dict):
         self.__commands = commands
         self.__codes = codes
         self.__types = types
 
+        self.__encoders = {}
+        self.__decoders = {}
+
+        self.__compile()
+
     @staticmethod
     def __determinate_int_len(data: int) -> int:
         if data == 0:
@@ -65,205 +80,250 @@ class ProtoBuilder:
         return negative + value.to_bytes(ProtoBuilder.__determinate_int_len(value), 'big')
 
     @staticmethod
-    def __encode_list(value: List[Union[str, int, float, bool]]) -> bytes:
-        data = b""
-
-        for item in value:
-            val = ProtoBuilder.__encode_value(item)
-
-            data += len(val).to_bytes(1, 'big') + val
-
-        return data
-
-    @staticmethod
-    def __decode_list(value: bytes, _type: type) -> List[Union[str, int, float, bool]]:
-        values = []
-
-        while len(value):
-            _len = value[0]
-            values.append(ProtoBuilder.__decode_value(value[1:_len + 1], _type))
-            value = value[_len + 1:]
-
-        return values
-
-    @staticmethod
-    def __encode_value(value: Union[str, bytes, int, float, bool, list]) -> bytes:
-        _type = type(value)
-
+    def __compile_value_encoder(_type: type) -> Callable[[Any], bytes]:
         if _type is bytes:
-            return value
+            return lambda value: value
 
         if _type is str:
-            return value.encode('utf-8')
+            return lambda value: value.encode('utf-8')
 
         if _type is int:
-            return ProtoBuilder.__encode_int(value)
+            return ProtoBuilder.__encode_int
 
         if _type is bool:
-            return b"\x01" if value else b"\x00"
+            return lambda value: b"\x01" if value else b"\x00"
 
         if _type is float:
-            return ProtoBuilder.__encode_float(value)
-
-        if _type is list:
-            return ProtoBuilder.__encode_list(value)
+            return ProtoBuilder.__encode_float
 
         raise Exception(f"Cannot encode data")
 
     @staticmethod
-    def __decode_value(value: bytes, _type: type, is_list: bool = False) -> Union[str, bytes, int, float, bool, list]:
-        if is_list:
-            return ProtoBuilder.__decode_list(value, _type)
-
+    def __compile_value_decoder(_type: type) -> Callable[[Any], Any]:
         if _type is bytes:
-            return value
+            return lambda value: value
 
         if _type is str:
-            return value.decode('utf-8')
+            return lambda value: str(value, 'utf-8')
 
         if _type is int:
-            return ProtoBuilder.__decode_int(value)
+            return ProtoBuilder.__decode_int
 
         if _type is float:
-            return ProtoBuilder.__decode_float(value)
+            return ProtoBuilder.__decode_float
 
         if _type is bool:
-            return False if value == b"\x00" else True
+            return lambda value: False if value == b"\x00" else True
 
         raise Exception(f"Cannot decode data")
 
-    def __prepare_parameter(self, name: str, value: Any, parameters_data: dict) -> dict:
-        if not (parameters_data := parameters_data.get(name)):
-            raise Exception(f"Cannot find parameter {name}")
+    @staticmethod
+    def __compile_parameter_encoder(name: str, parameter_data: dict) -> Callable[[Any], Tuple[int, bytes]]:
+        _type = parameter_data['type']
+        type_name = _type.__name__
+        code = parameter_data['code']
+        number = parameter_data['number']
+        variants = parameter_data.get('variants')
 
-        _type = parameters_data['type']
-        _val_type = type(value)
-        number = parameters_data['number']
-        _number_type = type(number)
+        encode = ProtoBuilder.__compile_value_encoder(_type)
 
-        if value is None and parameters_data['required']:
-            raise Exception(f"Missing required parameter {name}")
+        def encode_list(value: list) -> Tuple[int, bytes]:
+            if number == "+" and len(value) < 1:
+                raise Exception(f"Missing required parameter {name}")
 
-        if _val_type is list:
-            if _number_type is str:
-                if len(value) < 1 and number == "+":
-                    raise Exception(f"Missing required parameter {name}")
+            if type(number) is int and len(value) != number:
+                raise Exception(f"Len of parameters must be equal to {str(number)}")
 
-            if _number_type is int:
-                if len(value) != number:
-                    raise Exception(f"Len of parameters must be equal to {str(number)}")
+            data = []
 
-            for i, val in enumerate(value):
-                if type(val) is not _type:
-                    raise Exception(f"Parameter {i} in {name} must be type {_type.__name__}")
-        else:
-            if _type is not _val_type:
-                raise Exception(f"Parameter {name} must be type {_type.__name__}")
+            for i, item in enumerate(value):
+                if type(item) is not _type:
+                    raise Exception(f"Parameter {i} in {name} must be type {type_name}")
+
+                item = encode(item)
+
+                data.append(len(item).to_bytes(1, 'big') + item)
+
+            return code, b"".join(data)
+
+        def encode_parameter(value: Any) -> Tuple[int, bytes]:
+            if value is None:
+                raise Exception(f"Missing required parameter {name}")
+
+            if type(value) is list:
+                return encode_list(value)
+
+            if type(value) is not _type:
+                raise Exception(f"Parameter {name} must be type {type_name}")
+
+            if not variants:
+                return code, encode(value)
 
-        if variants := parameters_data.get('variants'):
             if value not in variants:
                 raise Exception(f"Parameter '{name}' must be one of '{', '.join(variants)}'")
 
-            value = variants[value]
+            return code, ProtoBuilder.__encode_int(variants[value])
 
-        return {parameters_data['code']: self.__encode_value(value)}
+        return encode_parameter
 
-    def prepare_command(self, command: str, subcommands: list, parameters: dict) -> dict:
-        command_data = self.__commands.get(command)
-        subcommands_data = command_data.get('subcommands')
+    @staticmethod
+    def __compile_parameter_decoder(parameter_data: dict, parameter_code_data: dict) -> Callable[[Any], Any]:
+        _type = parameter_data['type']
+        is_list = bool(parameter_data['number'])
 
-        subcommands = subcommands or []
-        parameters = parameters or {}
+        if variants := parameter_code_data.get("variants"):
+            decode = lambda value: variants.get(value[0])
+        elif is_list:
+            decode_item = ProtoBuilder.__compile_value_decoder(_type)
+
+            def decode(value) -> list:
+                values = []
+
+                while len(value):
+                    _len = value[0]
+                    values.append(decode_item(value[1:_len + 1]))
+                    value = value[_len + 1:]
+
+                return values
+        else:
+            decode = ProtoBuilder.__compile_value_decoder(_type)
+
+        # Spooled value is passed to controller as is only for bytes parameters
+        if _type is bytes and not is_list and not variants:
+            return decode
+
+        def decode_spooled(value: Any) -> Any:
+            if isinstance(value, SpoolFile):
+                spool, value = value, value.read()
+                spool.remove()
+
+            return decode(value)
+
+        return decode_spooled
 
-        if not command_data:
+    @staticmethod
+    def __compile_encoders(parameters_data: dict) -> Dict[str, Callable[[Any], Tuple[int, bytes]]]:
+        return {
+            name: ProtoBuilder.__compile_parameter_encoder(name, data) for name, data in parameters_data.items()
+        }
+
+    @staticmethod
+    def __compile_decoders(parameters_codes_data: dict, parameters_data: dict) -> Dict[int, Tuple[str, Callable]]:
+        decoders = {}
+
+        for code, code_data in parameters_codes_data.items():
+            name = code_data['name']
+
+            decoders[code] = (name, ProtoBuilder.__compile_parameter_decoder(parameters_data[name], code_data))
+
+        return decoders
+
+    def __compile_command(self, name: str, command_data: dict):
+        code = command_data['code']
+        codes_data = self.__codes[code]
+
+        parameters_encoders = {None: self.__compile_encoders(command_data.get('parameters') or {})}
+
+        command_decoders = (
+            self.__compile_decoders(codes_data.get('parameters') or {}, command_data.get('parameters') or {}),
+            command_data.get('defaults') or {},
+        )
+
+        parameters_decoders = {None: command_decoders}
+
+        for subcommand, subcommand_data in (command_data.get('subcommands') or {}).items():
+            subcommand_code = subcommand_data['code']
+            subcommand_codes_data = codes_data['subcommands'][subcommand_code]
+
+            parameters_encoders[subcommand] = self.__compile_encoders(subcommand_data.get('parameters') or {})
+
+            # Subcommand without parameters is decoded with command parameters
+            if subcommand_codes_data.get('parameters'):
+                parameters_decoders[subcommand_code] = (
+                    self.__compile_decoders(subcommand_codes_data['parameters'], subcommand_data['parameters']),
+                    subcommand_data.get('defaults') or {},
+                )
+            else:
+                parameters_decoders[subcommand_code] = command_decoders
+
+        self.__encoders[name] = {
+            "code": code,
+            "subcommands": {sub: data['code'] for sub, data in (command_data.get('subcommands') or {}).items()},
+            "parameters": parameters_encoders,
+        }
+
+        self.__decoders[code] = {
+            "name": name,
+            "subcommands": {sub_code: data['name'] for sub_code, data in codes_data['subcommands'].items()},
+            "parameters": parameters_decoders,
+        }
+
+    def __compile(self):
+        for name, command_data in self.__commands.items():
+            self.__compile_command(name, command_data)
+
+    def prepare_command(self, command: str, subcommands: list, parameters: dict) -> dict:
+        if not (encoder := self.__encoders.get(command)):
             raise Exception(f"Unknown command '{command}'")
 
+        subcommands = subcommands or []
         subcommands_codes = []
-        parameters_data = None
 
         for subcommand in subcommands:
-            if not (subcommand_data := subcommands_data.get(subcommand)):
+            if (code := encoder['subcommands'].get(subcommand)) is None:
                 raise Exception(f"Cannot find subcommand '{subcommand}'")
 
-            subcommands_codes.append(subcommand_data['code'])
-            parameters_data = subcommand_data.get('parameters')
-
-        if len(subcommands) == 0:
-            parameters_data = command_data.get('parameters') or {}
+            subcommands_codes.append(code)
 
+        parameters_encoders = encoder['parameters'][subcommands[-1] if subcommands else None]
         parameters_codes = {}
 
-        for parameter, value in parameters.items():
-            parameters_codes.update(self.__prepare_parameter(parameter, value, parameters_data))
+        for parameter, value in (parameters or {}).items():
+            if not (encode := parameters_encoders.get(parameter)):
+                raise Exception(f"Cannot find parameter {parameter}")
+
+            code, data = encode(value)
+
+            parameters_codes[code] = data
 
         return {
-            "command": command_data['code'],
+            "command": encoder['code'],
             "subcommands": subcommands_codes,
             "parameters": parameters_codes
         }
 
-    def from_codes(self, command: int, subcommands: list[bytes], parameters: dict) -> dict:
-        command_codes_data = self.__codes.get(command)
-
-        if not command_codes_data:
+    def from_codes(self, command: int, subcommands: list, parameters: dict) -> dict:
+        if not (decoder := self.__decoders.get(command)):
             raise Exception(f"Unknown command code '{command}'")
 
-        command_name: str = command_codes_data["name"]
-        command_data = self.__commands.get(command_name)
-
-        subcommands_codes_data = command_codes_data.get('subcommands')
-        subcommands_data = command_data.get('subcommands')
         subcommands_names = []
-        parameters_codes_data = None
-        parameters_data = None
-        defaults = None
+        subcommand_code = None
 
         for subcommand in subcommands:
-            subcommand_code_data = subcommands_codes_data.get(int.from_bytes(subcommand, 'big'))
+            subcommand_code = subcommand if type(subcommand) is int else int.from_bytes(subcommand, 'big')
 
-            if not subcommand_code_data:
+            if (name := decoder['subcommands'].get(subcommand_code)) is None:
                 raise Exception(f"Unknown subcommand code '{subcommand}'")
 
-            name = subcommand_code_data['name']
-            subcommand_data = subcommands_data.get(name)
             subcommands_names.append(name)
 
-            parameters_codes_data = subcommand_code_data.get("parameters")
-            parameters_data = subcommand_data.get("parameters")
-            defaults = subcommand_data.get("defaults")
-
+        parameters_decoders, defaults = decoder['parameters'][subcommand_code]
         parameters_values = {}
 
-        if not parameters_codes_data:
-            parameters_codes_data = command_codes_data.get('parameters')
-            parameters_data = command_data.get("parameters")
-            defaults = command_data.get("defaults")
-
         for parameter, value in parameters.items():
-            parameter_code_data = parameters_codes_data.get(parameter)
-
-            if not parameter_code_data:
+            if not (parameter_decoder := parameters_decoders.get(parameter)):
                 raise Exception(f"Unknown subcommand parameter code '{parameter}'")
 
-            name = parameter_code_data['name']
+            name, decode = parameter_decoder
 
-            parameter_data = parameters_data.get(name)
-
-            if variants := parameter_code_data.get("variants"):
-                value = variants.get(value[0])
-            else:
-                value = self.__decode_value(value, parameter_data['type'], bool(parameter_data['number']))
-
-            parameters_values.update({name: value})
+            parameters_values[name] = decode(value)
 
         for name, value in defaults.items():
-            if name in parameters_values:
-                continue
-
-            parameters_values.update({name: value})
+            if name not in parameters_values:
+                parameters_values[name] = value
 
         return {
-            "command": command_name,
+            "command": decoder['name'],
             "subcommands": subcommands_names,
             "parameters": parameters_values,
         }
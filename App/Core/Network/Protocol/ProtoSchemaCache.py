@@ -0,0 +1,81 @@
+import glob
+import hashlib
+import os
+import pickle
+from typing import Tuple
+
+from App.Core import Config
+
+from .ProtoFileResolver import ProtoFileResolver
+
+
+class ProtoSchemaCache:
+    """
+    Compiled proto schema (commands, codes and types tables of ProtoFileResolver) stored in cache directory.
+
+    Schema file is named by hash of proto file, so it is loaded by one unpickling while proto file is not
+    changed. Otherwise, proto file is parsed again and schemas of previous proto files are removed.
+    """
+
+    # Increase if structure of parsed schema is changed
+    SCHEMA_VERSION = 1
+
+    FILE_PREFIX = 'proto-'
+    FILE_EXTENSION = '.schema'
+
+    def __init__(self, config: Config):
+        self.__config = config
+        self.__proto_file_path = config.get('rcl.proto_file_path')
+        self.__path = config.get('rcl.schema_cache_path')
+
+    def __key(self) -> str:
+        with open(self.__proto_file_path, 'rb') as file:
+            digest = hashlib.sha256(file.read())
+
+        digest.update(self.SCHEMA_VERSION.to_bytes(4, 'big'))
+
+        return digest.hexdigest()
+
+    def __file_path(self, key: str) -> str:
+        return os.path.join(self.__path, f"{self.FILE_PREFIX}{key}{self.FILE_EXTENSION}")
+
+    def __remove_stale(self, path: str):
+        for stale in glob.glob(os.path.join(self.__path, f"{self.FILE_PREFIX}*{self.FILE_EXTENSION}")):
+            if stale != path:
+                os.remove(stale)
+
+    def __store(self, path: str, schema: Tuple[dict, dict, dict]):
+        os.makedirs(self.__path, exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(schema, file, pickle.HIGHEST_PROTOCOL)
+
+        # Server and console may start at the same time, so file is replaced atomically
+        os.replace(tmp_path, path)
+
+        self.__remove_stale(path)
+
+    def load(self) -> Tuple[dict, dict, dict]:
+        path = self.__file_path(self.__key())
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as file:
+                    return pickle.load(file)
+            except Exception:
+                # Unpickling of broken file may raise almost anything, file is removed and schema is built again
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        schema = ProtoFileResolver(self.__config).parse()
+
+        try:
+            self.__store(path, schema)
+        except OSError:
+            pass
+
+        return schema
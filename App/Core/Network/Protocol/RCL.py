@@ -1,52 +1,169 @@
-from typing import Optional, Tuple, Union
+import sys
+import zlib
+from threading import Lock
+from typing import Iterator, Optional, Tuple, Union, List
 
 from App.Core.Logger import Log
 from App.Core import Config
 
 from .RCLProtocol import RCLProtocol
 from .ProtoFileResolver import ProtoFileResolver
+from .ProtoSchemaCache import ProtoSchemaCache
 from .ProtoBuilder import ProtoBuilder
+from .ChunkAssembler import ChunkAssembler
 
-from .Resolvers import InternalErrorMessageResolver, ResponseMessageSuccessResolver, CallMessageResolver
+from .Resolvers import (
+    BatchMessageResolver,
+    InternalErrorMessageResolver,
+    ResponseMessageSuccessResolver,
+    CallMessageResolver,
+    CallMessageStreamParser,
+)
 
-from .Requests import AbstractRequest, CallRequest
+from .Requests import AbstractRequest, CallRequest, BatchRequest
 
-from .Responses import AbstractResponse, ResponseSuccess, ResponseInternalError
+from .Responses import AbstractResponse, ResponseSuccess, ResponseInternalError, ResponseBatch, ResponseStream
 
 
 class RCL:
     RESOLVERS = {
         RCLProtocol.RCL_MESSAGE_TYPE_CALL: CallMessageResolver(),
+        RCLProtocol.RCL_MESSAGE_TYPE_BATCH: BatchMessageResolver(),
         RCLProtocol.RCL_MESSAGE_TYPE_RETURN: ResponseMessageSuccessResolver(),
+        RCLProtocol.RCL_MESSAGE_TYPE_BATCH_RETURN: BatchMessageResolver(),
         RCLProtocol.RCL_MESSAGE_TYPE_INTERNAL_ERROR: InternalErrorMessageResolver(),
     }
 
     REQUESTS = {
         RCLProtocol.RCL_MESSAGE_TYPE_CALL: CallRequest,
+        RCLProtocol.RCL_MESSAGE_TYPE_BATCH: BatchRequest,
     }
 
     RESPONSES = {
         RCLProtocol.RCL_MESSAGE_TYPE_RETURN: ResponseSuccess,
+        RCLProtocol.RCL_MESSAGE_TYPE_BATCH_RETURN: ResponseBatch,
         RCLProtocol.RCL_MESSAGE_TYPE_INTERNAL_ERROR: ResponseInternalError,
     }
 
     def __init__(self, logger: Log, config: Config):
         self.__logger = logger
-        self.__proto_file_resolver = ProtoFileResolver(config)
-        self.__proto_file_builder = ProtoBuilder(*self.__proto_file_resolver.parse())
+
+        if config.get('rcl.schema_cache'):
+            schema = ProtoSchemaCache(config).load()
+        else:
+            schema = ProtoFileResolver(config).parse()
+
+        self.__proto_file_builder = ProtoBuilder(*schema)
+
+        # Success responses are encoded by 'objects' of proto file
+        self.RESOLVERS = {
+            **RCL.RESOLVERS,
+            RCLProtocol.RCL_MESSAGE_TYPE_RETURN: ResponseMessageSuccessResolver(
+                schema[2],
+                config.get('rcl.binary_response')
+            ),
+        }
 
         self.__max_data_len = config.get('rcl.max_packet_size') - RCLProtocol.RCL_HEADERS_LENGTH - 4
+        self.__max_chunk_len = self.__max_data_len - RCLProtocol.RCL_CHUNK_HEADERS_LENGTH
+        self.__chunked = config.get('rcl.chunked')
+
+        self.__compression = config.get('rcl.compression')
+        self.__compression_threshold = config.get('rcl.compression_threshold')
+        self.__compression_level = config.get('rcl.compression_level')
+        # One byte over the limit is requested from zlib to detect longer data, so limit is below sys.maxsize
+        self.__max_decompressed_size = config.get('rcl.max_decompressed_size') or sys.maxsize - 1
+
+        self.__spool_threshold = config.get('rcl.spool_threshold')
+        self.__spool_path = config.get('rcl.spool_path')
 
-    def __create(self, data: bytes, _type: int, _len: int) -> Optional[bytes]:
+        self.__last_request_id = 0
+        self.__request_id_lock = Lock()
+
+    def __next_request_id(self) -> int:
+        with self.__request_id_lock:
+            self.__last_request_id = self.__last_request_id % RCLProtocol.RCL_MAX_REQUEST_ID + 1
+
+            return self.__last_request_id
+
+    def __create(self, data: bytes, _type: int, _len: int, request_id: int) -> Optional[bytes]:
         if not RCLProtocol.check_message_type(_type):
             self.__logger.error(f"Message type '{_type}' not found.", {"object": self})
             return None
 
-        return RCLProtocol.create_message(_type, data, _len)
+        data, _type = self.__compress(data, _type)
+        _len = len(data)
+
+        if self.__chunked and _len > self.__max_data_len:
+            return self.__create_chunks(data, _type, request_id)
+
+        return RCLProtocol.create_message(_type, data, _len, request_id)
+
+    def __compress(self, data: bytes, _type: int) -> Tuple[bytes, int]:
+        if not self.__compression or len(data) < self.__compression_threshold:
+            return data, _type
+
+        compressed = zlib.compress(data, self.__compression_level)
+
+        # Already compressed data (PNG, JPEG, DOCX) does not become shorter and is sent as is
+        if len(compressed) >= len(data):
+            return data, _type
+
+        return compressed, _type | RCLProtocol.RCL_MESSAGE_FLAG_COMPRESSED
+
+    def __decompress(self, data: Union[bytes, memoryview]) -> memoryview:
+        decompressor = zlib.decompressobj()
+
+        try:
+            result = decompressor.decompress(data, self.__max_decompressed_size + 1)
+        except zlib.error as e:
+            raise Exception(f"Cannot decompress message data. {str(e)}")
+
+        if len(result) > self.__max_decompressed_size or decompressor.unconsumed_tail:
+            raise Exception(f"Decompressed message data is longer than {self.__max_decompressed_size} bytes")
+
+        if not decompressor.eof:
+            raise Exception("Cannot decompress message data. Compressed data is incomplete")
+
+        return memoryview(result)
+
+    def __create_chunks(self, data: bytes, _type: int, request_id: int) -> bytes:
+        data = memoryview(data)
+        chunks = []
+
+        for sequence, start in enumerate(range(0, len(data), self.__max_chunk_len)):
+            last = start + self.__max_chunk_len >= len(data)
+
+            chunks.append(RCLProtocol.create_chunk(
+                _type,
+                data[start:start + self.__max_chunk_len],
+                sequence,
+                last,
+                len(data),
+                request_id
+            ))
+
+        return b"".join(chunks)
 
-    def __parse(self, data: bytes) -> Optional[Tuple[dict, bytes]]:
+    def __create_stream_parser(self, header: Optional[bytes], data_length: int, compressed: bool) -> CallMessageStreamParser:
+        # Spooling disabled by zero threshold, but streamed message is still parsed by parts
+        threshold = self.__spool_threshold or sys.maxsize
+
+        return CallMessageStreamParser(
+            header,
+            data_length,
+            threshold,
+            self.__spool_path,
+            compressed,
+            self.__max_decompressed_size
+        )
+
+    def __parse(self, data: Union[bytes, bytearray, memoryview]) -> Optional[Tuple[dict, memoryview]]:
         obj = {"object": self}
 
+        # Message parts are sliced as views over received buffer, so payload is not copied while parsing
+        data = memoryview(data)
+
         if not RCLProtocol.check_rcl_protocol(data[:3]):
             self.__logger.debug(f"Bytearray is not protocol struct", obj)
             return None
@@ -61,49 +178,266 @@ class RCL:
             self.__logger.error(f"Crc check failed")
             return None
 
-        return headers, RCLProtocol.get_message(data, headers[RCLProtocol.RCL_HEADER_DATA_LENGTH])
+        message = RCLProtocol.get_message(data, headers[RCLProtocol.RCL_HEADER_DATA_LENGTH])
 
-    def create_request(self, request: AbstractRequest) -> bytes:
-        resolver = RCL.RESOLVERS[request.type()]
+        if RCLProtocol.is_compressed(_type := headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE]):
+            headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE] = RCLProtocol.get_message_type(_type)
+            message = self.__decompress(message)
+
+        return headers, message
+
+    def __create_request_data(self, request: AbstractRequest) -> bytes:
+        resolver = self.RESOLVERS[request.type()]
 
         if request.type() == RCLProtocol.RCL_MESSAGE_TYPE_CALL:
-            data = self.__proto_file_builder.prepare_command(**request.data())
-        else:
-            data = request.data()
+            return resolver.create(self.__proto_file_builder.prepare_command(**request.data()))
+
+        if request.type() == RCLProtocol.RCL_MESSAGE_TYPE_BATCH:
+            return resolver.create({
+                "flags": BatchMessageResolver.FLAG_SEQUENTIAL if request.sequential() else 0,
+                "messages": [self.__create_request_data(call) for call in request.requests()],
+            })
+
+        return resolver.create(request.data())
+
+    def __parse_request_data(self, _type: int, data: Union[bytes, memoryview]) -> AbstractRequest:
+        if _type not in self.REQUESTS:
+            raise Exception(f"Message type '{_type}' is not a request")
+
+        resolver = self.RESOLVERS[_type]
+
+        if _type == RCLProtocol.RCL_MESSAGE_TYPE_CALL:
+            return CallRequest(**self.__proto_file_builder.from_codes(**resolver.parse(data)))
+
+        if _type == RCLProtocol.RCL_MESSAGE_TYPE_BATCH:
+            batch = resolver.parse(data)
+
+            return BatchRequest(
+                [self.__parse_request_data(RCLProtocol.RCL_MESSAGE_TYPE_CALL, call) for call in batch['messages']],
+                bool(batch['flags'] & BatchMessageResolver.FLAG_SEQUENTIAL)
+            )
+
+        return self.REQUESTS[_type](resolver.parse(data))
+
+    def __create_response_data(self, response: AbstractResponse) -> bytes:
+        resolver = self.RESOLVERS[response.type()]
+
+        if response.type() == RCLProtocol.RCL_MESSAGE_TYPE_BATCH_RETURN:
+            return resolver.create({"messages": [
+                item.type().to_bytes(1, 'big') + self.__create_response_data(item) for item in response.responses()
+            ]})
 
-        data = resolver.create(data)
+        return resolver.create(response.data())
+
+    def __parse_response_data(self, _type: int, data: Union[bytes, memoryview]) -> AbstractResponse:
+        if _type not in self.RESPONSES:
+            raise Exception(f"Message type '{_type}' is not a response")
+
+        resolver = self.RESOLVERS[_type]
+
+        if _type == RCLProtocol.RCL_MESSAGE_TYPE_BATCH_RETURN:
+            return ResponseBatch([
+                self.__parse_response_data(item[0], item[1:]) for item in resolver.parse(data)['messages']
+            ])
+
+        return self.RESPONSES[_type](resolver.parse(data))
+
+    def create_request(self, request: AbstractRequest) -> bytes:
+        data = self.__create_request_data(request)
 
-        return self.__create(data, request.type(), len(data))
+        if not request.request_id():
+            request.set_request_id(self.__next_request_id())
 
-    def parse_request(self, data: bytes) -> AbstractRequest:
+        return self.__create(data, request.type(), len(data), request.request_id())
+
+    def parse_request(self, data: Union[bytes, bytearray, memoryview]) -> AbstractRequest:
         headers, data = self.__parse(data)
 
-        _type = headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE]
+        request = self.__parse_request_data(headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE], data)
+
+        request.set_request_id(headers[RCLProtocol.RCL_HEADER_REQUEST_ID])
+
+        return request
+
+    def can_stream_request(self, header: Union[bytes, bytearray, memoryview]) -> bool:
+        if not self.__spool_threshold:
+            return False
+
+        headers = RCLProtocol.get_headers(header)
+        _type = RCLProtocol.get_message_type(headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE])
+
+        if _type != RCLProtocol.RCL_MESSAGE_TYPE_CALL:
+            return False
+
+        return headers[RCLProtocol.RCL_HEADER_DATA_LENGTH] > self.__spool_threshold
+
+    def create_request_stream(self, header: Union[bytes, bytearray, memoryview]) -> CallMessageStreamParser:
+        headers = RCLProtocol.get_headers(header)
+
+        if RCLProtocol.check_protocol_version(version := headers[RCLProtocol.RCL_HEADER_PROTOCOL_VERSION]):
+            raise Exception(f"Protocol version {version} required")
+
+        return self.__create_stream_parser(
+            header,
+            headers[RCLProtocol.RCL_HEADER_DATA_LENGTH],
+            RCLProtocol.is_compressed(headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE])
+        )
+
+    def parse_request_stream(self, header: Union[bytes, bytearray, memoryview], parser: CallMessageStreamParser) -> AbstractRequest:
+        if not parser.valid():
+            parser.close()
+            raise Exception("Crc check failed")
+
+        try:
+            request = CallRequest(**self.__proto_file_builder.from_codes(**parser.result()))
+        except Exception:
+            parser.close()
+            raise
+
+        request.set_request_id(RCLProtocol.get_headers(header)[RCLProtocol.RCL_HEADER_REQUEST_ID])
+
+        return request
+
+    def create_chunk_assembler(self, data: Union[bytes, bytearray, memoryview]) -> ChunkAssembler:
+        headers = RCLProtocol.get_headers(data)
+
+        if RCLProtocol.check_protocol_version(version := headers[RCLProtocol.RCL_HEADER_PROTOCOL_VERSION]):
+            raise Exception(f"Protocol version {version} required")
+
+        if not (chunk := RCLProtocol.get_chunk_headers(data)):
+            raise Exception("Chunk headers are corrupted")
+
+        compressed = RCLProtocol.is_compressed(chunk[RCLProtocol.RCL_CHUNK_HEADER_MESSAGE_TYPE])
+        _type = RCLProtocol.get_message_type(chunk[RCLProtocol.RCL_CHUNK_HEADER_MESSAGE_TYPE])
+        total_length = chunk[RCLProtocol.RCL_CHUNK_HEADER_TOTAL_LENGTH]
+
+        if not RCLProtocol.check_message_type(_type):
+            raise Exception(f"Message type '{_type}' not found.")
+
+        parser = None
 
         if _type == RCLProtocol.RCL_MESSAGE_TYPE_CALL:
-            return self.REQUESTS[_type](**self.__proto_file_builder.from_codes(**RCL.RESOLVERS[_type].parse(data)))
+            parser = self.__create_stream_parser(None, total_length, compressed)
 
-        return self.REQUESTS[_type](RCL.RESOLVERS[_type].parse(data))
+        return ChunkAssembler(_type, headers[RCLProtocol.RCL_HEADER_REQUEST_ID], total_length, parser, compressed)
 
-    def create_response(self, response: AbstractResponse) -> bytes:
-        resolver = RCL.RESOLVERS[response.type()]
+    def __get_assembled_data(self, assembler: ChunkAssembler) -> memoryview:
+        if assembler.compressed():
+            return self.__decompress(assembler.data())
 
-        data = resolver.create(response.data())
+        return assembler.data()
 
-        return self.__create(data, response.type(), len(data))
+    def parse_chunked_request(self, assembler: ChunkAssembler) -> AbstractRequest:
+        _type = assembler.message_type()
 
-    def parse_response(self, data: bytes) -> Optional[AbstractResponse]:
+        if _type != RCLProtocol.RCL_MESSAGE_TYPE_CALL:
+            request = self.__parse_request_data(_type, self.__get_assembled_data(assembler))
+        elif not (parser := assembler.parser()).valid():
+            assembler.close()
+            raise Exception("Chunked call message is incomplete")
+        else:
+            try:
+                request = CallRequest(**self.__proto_file_builder.from_codes(**parser.result()))
+            except Exception:
+                assembler.close()
+                raise
+
+        request.set_request_id(assembler.request_id())
+
+        return request
+
+    def parse_chunked_response(self, assembler: ChunkAssembler) -> AbstractResponse:
+        _type = assembler.message_type()
+
+        response = self.__parse_response_data(_type, self.__get_assembled_data(assembler))
+        response.set_request_id(assembler.request_id())
+
+        return response
+
+    @staticmethod
+    def chunk_corrupted(request_id: int, sequence: int) -> bytes:
+        data = sequence.to_bytes(4, 'big')
+
+        return RCLProtocol.create_message(RCLProtocol.RCL_MESSAGE_TYPE_CHUNK_CORRUPTED, data, len(data), request_id)
+
+    def __collect_stream(self, response: ResponseStream) -> AbstractResponse:
+        try:
+            return ResponseSuccess(response.collect())
+        except Exception as e:
+            self.__logger.error(f"Failed to collect streamed response. {str(e)}", {"object": self})
+
+            return ResponseInternalError(str(e))
+        finally:
+            response.close()
+
+    def create_response(self, response: AbstractResponse, request_id: int = 0) -> bytes:
+        if isinstance(response, ResponseStream):
+            response = self.__collect_stream(response)
+
+        data = self.__create_response_data(response)
+
+        return self.__create(data, response.type(), len(data), request_id or response.request_id())
+
+    def can_stream_response(self) -> bool:
+        return self.__chunked
+
+    def create_response_stream(self, response: ResponseStream, request_id: int = 0) -> Iterator[bytes]:
+        """ Yields chunks of response while blocks are produced. Response is not compressed """
+        request_id = request_id or response.request_id()
+
+        # Streamed data is encoded as bytes response: type code and data without length
+        buffer = bytearray(ResponseMessageSuccessResolver.TYPE_CODE_BYTES.to_bytes(1, 'big'))
+        sequence = 0
+
+        try:
+            for block in response.blocks():
+                buffer += block
+
+                while len(buffer) >= self.__max_chunk_len:
+                    yield RCLProtocol.create_chunk(
+                        response.type(),
+                        bytes(buffer[:self.__max_chunk_len]),
+                        sequence,
+                        False,
+                        RCLProtocol.RCL_CHUNK_TOTAL_LENGTH_UNKNOWN,
+                        request_id
+                    )
+
+                    del buffer[:self.__max_chunk_len]
+                    sequence += 1
+        except Exception as e:
+            self.__logger.error(f"Failed to stream response. {str(e)}", {"object": self})
+
+            yield self.create_response(ResponseInternalError(str(e)), request_id)
+            return
+        finally:
+            response.close()
+
+        yield RCLProtocol.create_chunk(
+            response.type(),
+            bytes(buffer),
+            sequence,
+            True,
+            RCLProtocol.RCL_CHUNK_TOTAL_LENGTH_UNKNOWN,
+            request_id
+        )
+
+    def parse_response(self, data: Union[bytes, bytearray, memoryview]) -> Optional[AbstractResponse]:
         if not (parameters := self.__parse(data)):
             return None
 
         headers, data = parameters
 
-        _type = headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE]
+        response = self.__parse_response_data(headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE], data)
+        response.set_request_id(headers[RCLProtocol.RCL_HEADER_REQUEST_ID])
 
-        return self.RESPONSES[_type](RCL.RESOLVERS[_type].parse(data))
+        return response
 
     def call_request(self, command: str, subcommand: Optional[list] = None, parameters: Optional[dict] = None) -> bytes:
         return self.create_request(CallRequest(command, subcommand, parameters))
 
-    def response_success(self, data: Union[str, list, dict, bytes, None] = None) -> bytes:
-        return self.create_response(ResponseSuccess(data))
+    def batch_request(self, calls: List[CallRequest], sequential: bool = False) -> bytes:
+        return self.create_request(BatchRequest(calls, sequential))
+
+    def response_success(self, data: Union[str, list, dict, bytes, None] = None, request_id: int = 0) -> bytes:
+        return self.create_response(ResponseSuccess(data), request_id)
@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from struct import Struct, error as struct_error
 from zlib import crc32
 from typing import Union, Optional
 from config import RCL_PROTOCOL_VERSION
@@ -24,16 +24,54 @@ class RCLProtocol:
       +-----------+-----+------+------------------+----------------------------------+
       | [3]       | 1   | B    | protocol_version | Protocol version number.         |
       +-----------+-----+------+------------------+----------------------------------+
-      | [4-7]     | 4   | B    | request_id       | Request ID.                      |
+      | [4-7]     | 4   | B    | request_id       | Request ID. Allocated by the     |
+      |           |     |      |                  | requester, echoed in response.   |
       +-----------+-----+------+------------------+----------------------------------+
       | [8]       | 1   | I    | message_type     | Message type.                    |
       +-----------+-----+------+------------------+----------------------------------+
       | [9-13]    | 4   | I    | data_length      | Data len.                        |
       +-----------+-----+------+------------------+----------------------------------+
+
+    Message type flags:
+
+      Bit 0x20 of message type is a flag of compressed data. Data of such message is zlib stream, CRC is
+      calculated over compressed data. Types of messages use codes 0x00 - 0x1F in every group.
+
+    Chunked message:
+
+      Data longer than max packet size may be sent as sequence of 'chunk' messages with the same request ID.
+      Each chunk has own data length and CRC, so corrupted chunk is requested again by 'chunk_corrupted'
+      message with chunk sequence number in data, instead of whole message.
+
+      [HEADERS][CHUNK HEADERS][PAYLOAD][CRC32]
+
+      +-----------+-----+------+------------------+----------------------------------+
+      | Position  | Len | Type | Name             | Description                      |
+      +-----------+-----+------+------------------+----------------------------------+
+      | [0]       | 1   | I    | message_type     | Message type of whole message.   |
+      +-----------+-----+------+------------------+----------------------------------+
+      | [1-4]     | 4   | I    | sequence         | Chunk number from 0.             |
+      +-----------+-----+------+------------------+----------------------------------+
+      | [5]       | 1   | I    | flags            | 0x01 - last chunk.               |
+      +-----------+-----+------+------------------+----------------------------------+
+      | [6-9]     | 4   | I    | total_length     | Data len of whole message.       |
+      +-----------+-----+------+------------------+----------------------------------+
+      | [10-13]   | 4   | I    | headers_crc      | CRC32 of message headers and     |
+      |           |     |      |                  | chunk headers [0-9]. Sequence is |
+      |           |     |      |                  | trusted even if payload is not.  |
+      +-----------+-----+------+------------------+----------------------------------+
+
+    Streamed response:
+
+      Response produced while request is handled (scanned image) is sent as chunks with zero total_length.
+      Message ends by chunk with 'last' flag. Streamed chunks are not kept for resending. If handling fails
+      after some chunks are sent, 'internal_error' message with the same request ID is sent instead of last
+      chunk, received chunks of response must be dropped.
     """
 
     # PROTOCOL START BYTES 'rcl'
     RCL_PROTOCOL_START_BYTES = 0x72636c
+    RCL_PROTOCOL_START_BYTES_VALUE = RCL_PROTOCOL_START_BYTES.to_bytes(3, 'big')
 
     # PROTOCOL HEADER PARAMETERS
     RCL_HEADER_START_BYTES = 'start_bytes'
@@ -68,6 +106,41 @@ class RCLProtocol:
 
     RCL_HEADERS_STRUCT_LEN = len(RCL_HEADERS_STRUCT_LIST)
 
+    # Headers are packed at once by precompiled struct: start_bytes, protocol_version, request_id,
+    # message_type, data_length (big endian, without padding)
+    RCL_HEADERS_STRUCT = Struct('>3sBIBI')
+
+    RCL_CRC_LENGTH = 4
+
+    # CHUNK HEADER PARAMETERS
+    RCL_CHUNK_HEADER_MESSAGE_TYPE = 'message_type'
+    RCL_CHUNK_HEADER_SEQUENCE = 'sequence'
+    RCL_CHUNK_HEADER_FLAGS = 'flags'
+    RCL_CHUNK_HEADER_TOTAL_LENGTH = 'total_length'
+
+    RCL_CHUNK_HEADERS_STRUCT_DICT = {
+        0: (RCL_CHUNK_HEADER_MESSAGE_TYPE, 0, 1),
+        1: (RCL_CHUNK_HEADER_SEQUENCE, 1, 4),
+        2: (RCL_CHUNK_HEADER_FLAGS, 5, 1),
+        3: (RCL_CHUNK_HEADER_TOTAL_LENGTH, 6, 4),
+    }
+    """ Chunk header parameters metadata (PARAMETER NAME, POS, LEN) """
+
+    RCL_CHUNK_HEADERS_STRUCT_LIST = list(map(lambda x: x[0], RCL_CHUNK_HEADERS_STRUCT_DICT.values()))
+
+    RCL_CHUNK_HEADERS_STRUCT = Struct('>BIBI')
+
+    RCL_CHUNK_HEADERS_CRC_INDEX = sum(map(lambda x: x[2], RCL_CHUNK_HEADERS_STRUCT_DICT.values()))
+    RCL_CHUNK_HEADERS_LENGTH = RCL_CHUNK_HEADERS_CRC_INDEX + RCL_CRC_LENGTH
+
+    RCL_CHUNK_FLAG_LAST = 0x01
+
+    # Total length of streamed message, length is known after last chunk
+    RCL_CHUNK_TOTAL_LENGTH_UNKNOWN = 0
+
+    # Request ids are allocated in range [1, RCL_MAX_REQUEST_ID]. 0 - id not set
+    RCL_MAX_REQUEST_ID = 0xFFFFFFFF
+
     # Null value
     RCL_NULL = 0x00
 
@@ -82,26 +155,38 @@ class RCLProtocol:
     RCL_MESSAGE_GROUP_SERVER_ERRORS = 0xC0
     # Request (0x00 <= x < 0x40)
     RCL_MESSAGE_TYPE_CALL = RCL_MESSAGE_GROUP_REQUEST | 0
+    RCL_MESSAGE_TYPE_CHUNK = RCL_MESSAGE_GROUP_REQUEST | 1
+    RCL_MESSAGE_TYPE_BATCH = RCL_MESSAGE_GROUP_REQUEST | 2
     # Response ok types (0x40 <= x < 0x80)
     RCL_MESSAGE_TYPE_RETURN = RCL_MESSAGE_GROUP_RESPONSE_OK | 0
+    RCL_MESSAGE_TYPE_BATCH_RETURN = RCL_MESSAGE_GROUP_RESPONSE_OK | 1
     # Client errors (0x80 <= x < 0xC0)
     RCL_MESSAGE_TYPE_NOT_FOUND = RCL_MESSAGE_GROUP_CLIENT_ERRORS | 0
     RCL_MESSAGE_TYPE_NOT_VALID_SIGNATURE = RCL_MESSAGE_GROUP_CLIENT_ERRORS | 1
     RCL_MESSAGE_TYPE_NO_REQUIRED_PARAMETERS = RCL_MESSAGE_GROUP_CLIENT_ERRORS | 2
+    RCL_MESSAGE_TYPE_CHUNK_CORRUPTED = RCL_MESSAGE_GROUP_CLIENT_ERRORS | 3
     # Server errors (0xC0 <= x <= 0xFF)
     RCL_MESSAGE_TYPE_INTERNAL_ERROR = RCL_MESSAGE_GROUP_SERVER_ERRORS | 0
 
     RCL_MESSAGES_NAMES = {
         RCL_MESSAGE_TYPE_CALL: "call",
+        RCL_MESSAGE_TYPE_CHUNK: "chunk",
+        RCL_MESSAGE_TYPE_BATCH: "batch",
         RCL_MESSAGE_TYPE_RETURN: "return",
+        RCL_MESSAGE_TYPE_BATCH_RETURN: "batch_return",
         RCL_MESSAGE_TYPE_NOT_FOUND: "method_not_found",
         RCL_MESSAGE_TYPE_NOT_VALID_SIGNATURE: "not_valid_signature",
         RCL_MESSAGE_TYPE_NO_REQUIRED_PARAMETERS: "no_required_parameters",
+        RCL_MESSAGE_TYPE_CHUNK_CORRUPTED: "chunk_corrupted",
         RCL_MESSAGE_TYPE_INTERNAL_ERROR: "internal_error",
     }
 
     RCL_MESSAGES_TYPES = dict(map(lambda x: (x[1], x[0]), RCL_MESSAGES_NAMES.items()))
 
+    # Message type flags
+    RCL_MESSAGE_FLAG_COMPRESSED = 0x20
+    RCL_MESSAGE_FLAGS_MASK = RCL_MESSAGE_FLAG_COMPRESSED
+
     @staticmethod
     def get_message_type_name(_type: int) -> Optional[str]:
         return RCLProtocol.RCL_MESSAGES_NAMES.get(_type)
@@ -110,146 +195,98 @@ class RCLProtocol:
     def get_message_type_by_name(name: str) -> Optional[int]:
         return RCLProtocol.RCL_MESSAGES_TYPES.get(name)
 
-    @staticmethod
-    def __current_time() -> int:
-        return int(str(datetime.now(timezone.utc).timestamp())[:10])
-
     @staticmethod
     def __raise_error(error_text: str):
         raise Exception(f"RCL Error: {error_text}")
 
-    @staticmethod
-    def __encode_value(value: Union[int, bytes, bool, None], _len: int):
-        _type = type(value)
-
-        if _type is int:
-            return list(value.to_bytes(_len, byteorder="big"))
-
-        if _type is None:
-            return [RCLProtocol.RCL_NULL]
-
-        if _type is bool:
-            return [RCLProtocol.RCL_TRUE if value else RCLProtocol.RCL_FALSE]
-
-        if _type is bytes:
-            return list(value)
-
-        RCLProtocol.__raise_error(f"Cannot convert value: {str(value)} to bytes")
-
-    @staticmethod
-    def __decode_value(value: bytearray, _type: type) -> Union[int, bytes, bool, None]:
-        if _type is int:
-            return int.from_bytes(value, byteorder="big")
-
-        if _type is bool:
-            return value[0] == RCLProtocol.RCL_TRUE
-
-        if _type is bytes:
-            return bytes(value)
-
-        if _type is None and value == RCLProtocol.RCL_NULL:
-            return None
-
-        type_name = _type.__class__
-        RCLProtocol.__raise_error(f"Cannot decode value: {str(value)} of type {type_name}")
-
     @staticmethod
     def __checksum(data: bytes) -> bytes:
         return crc32(data).to_bytes(4, "big")
 
     @staticmethod
-    def __validate_parameter(
-        name: str,
-        value: Union[int, bytes, bool, None],
-        _len: int,
-        not_null: bool,
-        _type: bool
-    ):
-        if name not in RCLProtocol.RCL_HEADERS_STRUCT_LIST:
-            RCLProtocol.__raise_error(f"Parameter '{name}' not define in protocol")
-
-        p_type = type(value)
-
-        if p_type is None:
-            if not_null:
-                RCLProtocol.__raise_error(f"Parameter '{name}' not define in protocol")
-            elif p_type not in ([_type, int] if _type == bytes else [_type]):
-                need_type_name = _type.__name__
-                p_type_name = p_type.__name__
-                RCLProtocol.__raise_error(f"Parameter '{name}' can not be {p_type_name}. Must be {need_type_name}")
-
-        if p_type is int:
-            return
-
-        p_len = 1 if (p_type is None or p_type is bool) else len(value)
-
-        if p_len != _len:
-            RCLProtocol.__raise_error(f"Len of parameter '{name}' is {str(p_len)}. Must be {str(_len)}")
+    def __encode_header(message_type: int, data_length: int, request_id: int) -> bytes:
+        try:
+            return RCLProtocol.RCL_HEADERS_STRUCT.pack(
+                RCLProtocol.RCL_PROTOCOL_START_BYTES_VALUE,
+                RCL_PROTOCOL_VERSION,
+                request_id,
+                message_type,
+                data_length
+            )
+        except struct_error as e:
+            RCLProtocol.__raise_error(f"Cannot encode headers. {str(e)}")
 
     @staticmethod
-    def __decode_header(header: bytes) -> dict:
-        buffer = bytearray(header)
+    def __decode_header(header: Union[bytes, bytearray, memoryview]) -> dict:
+        try:
+            values = RCLProtocol.RCL_HEADERS_STRUCT.unpack_from(header)
+        except struct_error as e:
+            RCLProtocol.__raise_error(f"Cannot decode headers. {str(e)}")
 
-        data = {}
+        return dict(zip(RCLProtocol.RCL_HEADERS_STRUCT_LIST, values))
 
-        for i in range(RCLProtocol.RCL_HEADERS_STRUCT_LEN):
-            _name, _pos, _len, _type, _not_null = RCLProtocol.RCL_HEADERS_STRUCT_DICT[i]
-
-            val_buf = buffer[_pos:_pos + _len]
-
-            val = RCLProtocol.__decode_value(val_buf, _type)
+    @staticmethod
+    def create_message(message_type: int, data: bytes, _len: int, request_id: int = 0) -> bytes:
+        data = RCLProtocol.__encode_header(message_type, _len, request_id) + data
 
-            RCLProtocol.__validate_parameter(_name, val, _len, _not_null, _type)
+        return data + RCLProtocol.__checksum(data)
 
-            data.update({_name: val})
+    @staticmethod
+    def create_chunk(
+            message_type: int,
+            payload: Union[bytes, memoryview],
+            sequence: int,
+            last: bool,
+            total_length: int,
+            request_id: int = 0
+    ) -> bytes:
+        _len = RCLProtocol.RCL_CHUNK_HEADERS_LENGTH + len(payload)
 
-        return data
+        data = RCLProtocol.__encode_header(RCLProtocol.RCL_MESSAGE_TYPE_CHUNK, _len, request_id)
 
-    @staticmethod
-    def __encode_header(parameters: dict) -> bytes:
-        header = bytearray(RCLProtocol.RCL_HEADERS_LENGTH)
+        flags = RCLProtocol.RCL_CHUNK_FLAG_LAST if last else 0
 
-        for i in range(RCLProtocol.RCL_HEADERS_STRUCT_LEN):
-            _name, _pos, _len, _type, _not_null = RCLProtocol.RCL_HEADERS_STRUCT_DICT[i]
+        data += RCLProtocol.RCL_CHUNK_HEADERS_STRUCT.pack(message_type, sequence, flags, total_length)
+        data += RCLProtocol.__checksum(data) + payload
 
-            val = parameters.get(_name)
+        return data + RCLProtocol.__checksum(data)
 
-            RCLProtocol.__validate_parameter(_name, val, _len, _not_null, _type)
+    @staticmethod
+    def get_chunk_headers(data: Union[bytes, memoryview]) -> Optional[dict]:
+        """ Returns None if chunk headers are corrupted """
+        crc_pos = RCLProtocol.RCL_HEADERS_LENGTH + RCLProtocol.RCL_CHUNK_HEADERS_CRC_INDEX
 
-            val = RCLProtocol.__encode_value(val, _len)
+        if data[crc_pos:crc_pos + RCLProtocol.RCL_CRC_LENGTH] != RCLProtocol.__checksum(data[:crc_pos]):
+            return None
 
-            for j in range(len(val)):
-                header[_pos + j] = int(val[j])
+        values = RCLProtocol.RCL_CHUNK_HEADERS_STRUCT.unpack_from(data, RCLProtocol.RCL_HEADERS_LENGTH)
 
-        return bytes(header)
+        return dict(zip(RCLProtocol.RCL_CHUNK_HEADERS_STRUCT_LIST, values))
 
     @staticmethod
-    def create_message(message_type: int, data: bytes, _len: int) -> bytes:
-        data = RCLProtocol.__encode_header({
-            RCLProtocol.RCL_HEADER_START_BYTES: RCLProtocol.RCL_PROTOCOL_START_BYTES,
-            RCLProtocol.RCL_HEADER_PROTOCOL_VERSION: RCL_PROTOCOL_VERSION,
-            RCLProtocol.RCL_HEADER_REQUEST_ID: RCLProtocol.__current_time(),
-            RCLProtocol.RCL_HEADER_MESSAGE_TYPE: message_type,
-            RCLProtocol.RCL_HEADER_DATA_LENGTH: _len,
-        }) + data
-
-        return data + RCLProtocol.__checksum(data)
+    def get_chunk_payload(data: Union[bytes, memoryview], _len: int) -> Union[bytes, memoryview]:
+        return RCLProtocol.get_message(data, _len)[RCLProtocol.RCL_CHUNK_HEADERS_LENGTH:]
 
     @staticmethod
     def check_rcl_protocol(data: bytes) -> bool:
-        if data == RCLProtocol.RCL_PROTOCOL_START_BYTES.to_bytes(3, 'big'):
-            return True
-
-        return False
+        return data == RCLProtocol.RCL_PROTOCOL_START_BYTES_VALUE
 
     @staticmethod
     def get_headers(data: bytes) -> dict:
-        return RCLProtocol.__decode_header(data[:RCLProtocol.RCL_HEADERS_LENGTH])
+        return RCLProtocol.__decode_header(data)
 
     @staticmethod
     def check_protocol_version(version: int) -> bool:
         return version > RCL_PROTOCOL_VERSION
 
+    @staticmethod
+    def get_message_length(header: bytes) -> int:
+        start = RCLProtocol.RCL_HEADER_INDEX_DATA_LENGTH
+
+        _len = int.from_bytes(header[start:start + RCLProtocol.RCL_HEADER_LEN_DATA_LENGTH], 'big')
+
+        return RCLProtocol.RCL_HEADERS_LENGTH + _len + RCLProtocol.RCL_CRC_LENGTH
+
     @staticmethod
     def get_message(data: bytes, _len: int) -> bytes:
         return data[RCLProtocol.RCL_HEADERS_LENGTH:RCLProtocol.RCL_HEADERS_LENGTH + _len]
@@ -260,6 +297,15 @@ class RCLProtocol:
 
         return data[-4:] == RCLProtocol.__checksum(data[:-4])
 
+    @staticmethod
+    def is_compressed(_type: int) -> bool:
+        return bool(_type & RCLProtocol.RCL_MESSAGE_FLAG_COMPRESSED)
+
+    @staticmethod
+    def get_message_type(_type: int) -> int:
+        """ Returns message type without flags """
+        return _type & ~RCLProtocol.RCL_MESSAGE_FLAGS_MASK
+
     @staticmethod
     def check_message_type(_type: int) -> bool:
         return bool(RCLProtocol.RCL_MESSAGES_NAMES.get(_type))
@@ -4,10 +4,21 @@ from abc import ABC, abstractmethod
 class AbstractRequest(ABC):
     def __init__(self, data: dict):
         self._data = data
+        self._request_id = 0
 
     def data(self) -> dict:
         return self._data
 
+    def request_id(self) -> int:
+        return self._request_id
+
+    def set_request_id(self, request_id: int):
+        self._request_id = request_id
+
+    def close(self):
+        """ Release resources of received request after response """
+        pass
+
     @staticmethod
     @abstractmethod
     def type() -> int:
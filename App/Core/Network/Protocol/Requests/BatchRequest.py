@@ -0,0 +1,35 @@
+from typing import List
+
+from .AbstractRequest import AbstractRequest
+from .CallRequest import CallRequest
+from App.Core.Network.Protocol.RCLProtocol import RCLProtocol
+
+
+class BatchRequest(AbstractRequest):
+    """
+    Several call requests sent in one message. Calls are handled in parallel unless batch is sequential,
+    response is a batch of responses in order of calls.
+    """
+
+    def __init__(self, requests: List[CallRequest], sequential: bool = False):
+        super().__init__({"requests": requests, "sequential": sequential})
+
+    def requests(self) -> List[CallRequest]:
+        return self._data['requests']
+
+    def sequential(self) -> bool:
+        return self._data['sequential']
+
+    def set_request_id(self, request_id: int):
+        super().set_request_id(request_id)
+
+        for request in self.requests():
+            request.set_request_id(request_id)
+
+    def close(self):
+        for request in self.requests():
+            request.close()
+
+    @staticmethod
+    def type() -> int:
+        return RCLProtocol.RCL_MESSAGE_TYPE_BATCH
@@ -1,5 +1,6 @@
 from .AbstractRequest import AbstractRequest
 from App.Core.Network.Protocol.RCLProtocol import RCLProtocol
+from App.Core.Utils import SpoolFile
 
 from typing import Optional, Union
 
@@ -34,6 +35,12 @@ class CallRequest(AbstractRequest):
 
         return default
 
+    def close(self):
+        # Spool files not saved by controller are not needed after response
+        for value in (self._data['parameters'] or {}).values():
+            if isinstance(value, SpoolFile):
+                value.remove()
+
     @staticmethod
     def type() -> int:
         return RCLProtocol.RCL_MESSAGE_TYPE_CALL
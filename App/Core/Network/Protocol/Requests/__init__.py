@@ -1,7 +1,9 @@
 from .AbstractRequest import AbstractRequest
 from .CallRequest import CallRequest
+from .BatchRequest import BatchRequest
 
 __all__ = [
     'AbstractRequest',
     'CallRequest',
+    'BatchRequest',
 ]
@@ -0,0 +1,73 @@
+from typing import Union, List
+
+from .AbstractMessageResolver import AbstractMessageResolver
+
+
+class BatchMessageResolver(AbstractMessageResolver):
+    """
+    Batch type message. Several messages packed into one frame (batch request and batch response).
+
+    Encoding:
+        [0xXX][0xXXXX][Message block...] - 1 byte is flags, 2 bytes is count of messages.
+
+    Flags:
+
+        0x01 - messages must be handled sequentially in order of blocks.
+
+    Message block:
+
+        [0xXXXXXXXX][Data] - 4 bytes is size of data. Data of call request is encoded as call message,
+            data of response is [0xXX][Encoded data] where 1 byte is message type of response.
+    """
+
+    FLAG_SEQUENTIAL = 0x01
+
+    FLAGS_LEN = 1
+    COUNT_LEN = 2
+    SIZE_LEN = 4
+
+    MAX_MESSAGES = 0xFFFF
+
+    def create(self, data: dict) -> bytes:
+        messages: List[bytes] = data["messages"]
+
+        if len(messages) > self.MAX_MESSAGES:
+            raise Exception(f"Batch cannot contain more than {self.MAX_MESSAGES} messages")
+
+        blocks = [
+            (data.get("flags") or 0).to_bytes(self.FLAGS_LEN, 'big'),
+            len(messages).to_bytes(self.COUNT_LEN, 'big'),
+        ]
+
+        for message in messages:
+            blocks.append(len(message).to_bytes(self.SIZE_LEN, 'big'))
+            blocks.append(message)
+
+        return b"".join(blocks)
+
+    def parse(self, data: Union[bytes, memoryview]) -> dict:
+        data = memoryview(data)
+
+        flags = data[0]
+        count = int.from_bytes(data[self.FLAGS_LEN:self.FLAGS_LEN + self.COUNT_LEN], 'big')
+
+        pos = self.FLAGS_LEN + self.COUNT_LEN
+        messages = []
+
+        for _ in range(count):
+            size = int.from_bytes(data[pos:pos + self.SIZE_LEN], 'big')
+            pos += self.SIZE_LEN
+
+            if pos + size > len(data):
+                raise Exception("Batch message block is longer than message")
+
+            messages.append(data[pos:pos + size])
+            pos += size
+
+        if pos != len(data):
+            raise Exception("Batch message is longer than declared blocks")
+
+        return {
+            "flags": flags,
+            "messages": messages,
+        }
@@ -0,0 +1,199 @@
+import sys
+from typing import Optional, Union, Callable
+from zlib import crc32, decompressobj
+
+from App.Core.Utils import SpoolFile
+
+from .CallMessageResolver import CallMessageResolver
+
+
+class CallMessageStreamParser:
+    """
+    Call type message parser fed by parts of message as they are received from socket.
+
+    Message blocks are the same as in CallMessageResolver. Parser consumes data and CRC of message
+    (header is received before) and calculates checksum on the fly.
+
+    Parameters with data longer than spool threshold are written to SpoolFile part by part,
+    so big values (documents for printing) are never kept in memory.
+
+    Without header only data is consumed (chunked message, chunks are checked by own CRC).
+
+    Compressed message is decompressed part by part before parsing, CRC is checked over compressed data.
+    Message with decompressed data longer than max decompressed size is rejected (zip bomb).
+    """
+
+    PARAMETER_HEADER_LEN = CallMessageResolver.PARAMETER_BLOCK_SIZE_START + CallMessageResolver.PARAMETER_BLOCK_SIZE_LEN
+
+    CRC_LEN = 4
+
+    def __init__(
+            self,
+            header: Union[bytes, bytearray, memoryview, None],
+            data_length: int,
+            spool_threshold: int,
+            spool_path: str,
+            compressed: bool = False,
+            max_decompressed_size: int = sys.maxsize - 1
+    ):
+        self.__spool_threshold = spool_threshold
+        self.__spool_path = spool_path
+
+        self.__crc_len = self.CRC_LEN if header is not None else 0
+        self.__crc = crc32(header) if header is not None else 0
+        self.__data_remaining = data_length
+        self.__checksum = bytearray()
+        self.__decompressor = decompressobj() if compressed else None
+        self.__decompressed_remaining = max_decompressed_size
+
+        self.__buffer = bytearray()
+        self.__need = 1
+        self.__state: Optional[Callable[[bytes], None]] = self.__read_command
+
+        self.__command: Optional[int] = None
+        self.__subcommands = []
+        self.__parameters = {}
+        self.__parameters_count = 0
+        self.__parameter: Optional[int] = None
+        self.__spool: Optional[SpoolFile] = None
+
+    def remaining(self) -> int:
+        return self.__data_remaining + self.__crc_len - len(self.__checksum)
+
+    def done(self) -> bool:
+        return not self.remaining()
+
+    def valid(self) -> bool:
+        if not self.done() or self.__state is not None:
+            return False
+
+        if self.__decompressor is not None and not self.__decompressor.eof:
+            return False
+
+        return not self.__crc_len or self.__checksum == self.__crc.to_bytes(self.CRC_LEN, 'big')
+
+    def result(self) -> dict:
+        return {
+            "command": self.__command,
+            "subcommands": self.__subcommands,
+            "parameters": self.__parameters,
+        }
+
+    def close(self):
+        if self.__spool is not None:
+            self.__spool.remove()
+
+        for value in self.__parameters.values():
+            if isinstance(value, SpoolFile):
+                value.remove()
+
+    def feed(self, data: Union[bytes, bytearray, memoryview]):
+        data = memoryview(data)
+
+        if len(data) > self.remaining():
+            raise Exception("Received data is longer than call message")
+
+        body, checksum = data[:self.__data_remaining], data[self.__data_remaining:]
+
+        self.__crc = crc32(body, self.__crc)
+        self.__data_remaining -= len(body)
+        self.__checksum += checksum
+
+        if self.__decompressor is not None:
+            body = memoryview(self.__decompressor.decompress(body, self.__decompressed_remaining + 1))
+
+            if len(body) > self.__decompressed_remaining or self.__decompressor.unconsumed_tail:
+                raise Exception("Decompressed call message data is longer than allowed")
+
+            self.__decompressed_remaining -= len(body)
+
+        while len(body):
+            body = self.__consume(body)
+
+    def __consume(self, data: memoryview) -> memoryview:
+        if self.__state is None:
+            raise Exception("Call message data is longer than declared blocks")
+
+        if self.__spool is not None:
+            part = data[:self.__need]
+
+            self.__spool.write(part)
+            self.__need -= len(part)
+
+            if not self.__need:
+                self.__spool.close()
+                self.__set_parameter(self.__spool)
+                self.__spool = None
+
+            return data[len(part):]
+
+        part = data[:self.__need - len(self.__buffer)]
+
+        self.__buffer += part
+
+        if len(self.__buffer) == self.__need:
+            block = bytes(self.__buffer)
+            self.__buffer.clear()
+            self.__state(block)
+
+        return data[len(part):]
+
+    def __expect(self, need: int, state: Callable[[bytes], None]):
+        self.__need = need
+        self.__state = state
+
+    def __finish(self):
+        self.__need = 0
+        self.__state = None
+
+    def __read_command(self, block: bytes):
+        self.__command = block[0]
+
+        self.__expect(1, self.__read_subcommands_size)
+
+    def __read_subcommands_size(self, block: bytes):
+        if size := block[0]:
+            self.__expect(size, self.__read_subcommands)
+        else:
+            self.__expect(1, self.__read_parameters_size)
+
+    def __read_subcommands(self, block: bytes):
+        self.__subcommands = [block[i:i + 1] for i in range(len(block))]
+
+        self.__expect(1, self.__read_parameters_size)
+
+    def __read_parameters_size(self, block: bytes):
+        self.__parameters_count = block[0]
+
+        self.__next_parameter()
+
+    def __next_parameter(self):
+        if not self.__parameters_count:
+            self.__finish()
+            return
+
+        self.__parameters_count -= 1
+
+        self.__expect(self.PARAMETER_HEADER_LEN, self.__read_parameter_header)
+
+    def __read_parameter_header(self, block: bytes):
+        self.__parameter = block[0]
+
+        size = int.from_bytes(block[CallMessageResolver.PARAMETER_BLOCK_SIZE_START:], 'big')
+
+        if not size:
+            self.__set_parameter(b"")
+            return
+
+        if size > self.__spool_threshold:
+            self.__spool = SpoolFile(self.__spool_path)
+
+        self.__expect(size, self.__read_parameter_data)
+
+    def __read_parameter_data(self, block: bytes):
+        self.__set_parameter(block)
+
+    def __set_parameter(self, value: Union[bytes, SpoolFile]):
+        self.__parameters[self.__parameter] = value
+
+        self.__next_parameter()
@@ -14,4 +14,4 @@ class InternalErrorMessageResolver(AbstractMessageResolver):
         if data == b"":
             return None
 
-        return data.decode("utf-8")
+        return str(data, "utf-8")
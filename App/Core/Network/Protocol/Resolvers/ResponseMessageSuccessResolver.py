@@ -1,23 +1,169 @@
-from typing import Union
+from itertools import chain, repeat
+from operator import itemgetter, eq
+from struct import Struct, error as struct_error
+from typing import Union, Optional, Tuple, List, Callable, Any
 import json
 from .AbstractMessageResolver import AbstractMessageResolver
 
 
 class ResponseMessageSuccessResolver(AbstractMessageResolver):
+    """
+    Success response message.
+
+    Encoding:
+        [0xXX][Encoded data] - 1 byte is a type code of data.
+
+    Binary type code:
+
+        Compact encoding of lists and maps (used instead of JSON if enabled). Every value is a tag byte followed
+            by data of the tag. Lengths and counts are varints (7 bits per byte, high bit is set if more bytes
+            follow), integers are zigzag encoded varints, so small negative numbers stay short.
+
+        [0x00] - null, [0x01] - false, [0x02] - true
+        [0x03][varint] - int
+        [0x04][8 bytes] - float (IEEE 754, big endian)
+        [0x05][varint size][utf-8] - str
+        [0x06][varint size][bytes] - bytes
+        [0x07][varint count][values...] - list
+        [0x08][varint count][key value...] - map
+        [0x09][varint index][fixed block][varint size][strings block][values...] - object from 'objects' section
+            of proto file. Index is index of object sorted by name, keys are not sent.
+        [0x0A][varint index][varint count][fixed block][varint size][strings block][values...] - list of objects
+            of one type. Fields of all objects are packed together into the same blocks.
+
+            Fixed block is not nullable int (8 bytes), float (8 bytes) and bool (1 byte) fields of every object
+                packed in proto file order. Blocks without fields are not sent.
+            Strings block is not nullable str fields of every object in utf-8, separated by zero byte.
+            Values are other fields of every object encoded with tags.
+
+        Map (or list of maps) is sent as object if its keys are exactly fields of one object and values match
+            field types. Value of string field must not contain zero char.
+    """
+
     TYPE_CODE_STR = 0x01
     TYPE_CODE_JSON = 0x02
     TYPE_CODE_BYTES = 0x03
     TYPE_CODE_BOOL = 0x04
+    TYPE_CODE_BINARY = 0x05
+
+    TAG_NULL = 0x00
+    TAG_FALSE = 0x01
+    TAG_TRUE = 0x02
+    TAG_INT = 0x03
+    TAG_FLOAT = 0x04
+    TAG_STR = 0x05
+    TAG_BYTES = 0x06
+    TAG_LIST = 0x07
+    TAG_MAP = 0x08
+    TAG_OBJECT = 0x09
+    TAG_OBJECTS = 0x0A
+
+    FLOAT_STRUCT = Struct('>d')
+
+    # Formats of fixed block fields
+    OBJECT_FIXED_FIELD_FORMATS = {
+        "int": 'q',
+        "float": 'd',
+        "bool": '?',
+    }
+
+    OBJECT_FIELD_TYPES = {
+        "int": int,
+        "float": float,
+        "str": str,
+        "bool": bool,
+    }
+
+    STRINGS_SEPARATOR = "\x00"
+
+    class ObjectTable:
+        """ Fields layout of proto file object """
+
+        def __init__(self, index: int, fields: dict):
+            self.index = index
+            self.keys = frozenset(fields)
+
+            self.fixed: List[Tuple[str, type]] = []
+            self.strings: List[str] = []
+            self.values: List[str] = []
+
+            fixed_format = ''
+
+            for field, data in fields.items():
+                _type = data['type']
+
+                if data['nullable'] or _type not in ResponseMessageSuccessResolver.OBJECT_FIELD_TYPES:
+                    self.values.append(field)
+                elif _type == 'str':
+                    self.strings.append(field)
+                else:
+                    self.fixed.append((field, ResponseMessageSuccessResolver.OBJECT_FIELD_TYPES[_type]))
+                    fixed_format += ResponseMessageSuccessResolver.OBJECT_FIXED_FIELD_FORMATS[_type]
+
+            self.fixed_struct = Struct(f">{fixed_format}")
+            self.fixed_names = [field for field, _ in self.fixed]
+
+            self.fixed_types = tuple(_type for _, _type in self.fixed)
+
+            # Getters always return tuple, itemgetter of one key returns value
+            self.get_fixed = self.__tuple_getter(self.fixed_names)
+            self.get_strings = self.__tuple_getter(self.strings)
+
+            self.create = self.__dict_builder(self.fixed_names, self.strings)
+
+        @staticmethod
+        def __tuple_getter(fields: List[str]) -> Callable[[dict], tuple]:
+            if len(fields) == 1:
+                field = fields[0]
+                return lambda value: (value[field],)
+
+            if not fields:
+                return lambda value: ()
+
+            return itemgetter(*fields)
+
+        @staticmethod
+        def __dict_builder(fixed: List[str], strings: List[str]) -> Callable[[tuple, tuple], dict]:
+            """
+            Builds dict of fixed and strings values of object. Dict display is compiled once per object,
+            it is about twice faster than dict(zip(names, values)) which is most of decoding time
+            """
+            items = [f"{field!r}: f[{i}]" for i, field in enumerate(fixed)]
+            items += [f"{field!r}: s[{i}]" for i, field in enumerate(strings)]
+
+            return eval(f"lambda f, s: {{{', '.join(items)}}}", {})
 
-    @staticmethod
-    def __get_type_code(data: Union[str, list, dict, bytes, bool, None]):
+        def match(self, items: list) -> bool:
+            """ Checks keys and types of fixed fields. Checks are chained builtins without python call per item """
+            try:
+                if not all(map(eq, repeat(self.keys), map(dict.keys, items))):
+                    return False
+            except TypeError:
+                return False
+
+            return all(map(eq, repeat(self.fixed_types), map(tuple, map(map, repeat(type), map(self.get_fixed, items)))))
+
+    def __init__(self, objects: Optional[dict] = None, binary: bool = False):
+        self.__binary = binary
+
+        self.__objects = [self.ObjectTable(i, fields) for i, (name, fields) in enumerate(sorted((objects or {}).items()))]
+
+        self.__objects_by_keys = {}
+
+        for obj in self.__objects:
+            self.__objects_by_keys.setdefault(obj.keys, obj)
+
+        self.__encode_value = self.__compile_encoder()
+        self.__decode_value = self.__compile_decoder()
+
+    def __get_type_code(self, data: Union[str, list, dict, bytes, bool, None]):
         _type = type(data)
 
         if _type is str:
             return ResponseMessageSuccessResolver.TYPE_CODE_STR
 
         if _type is list or _type is dict:
-            return ResponseMessageSuccessResolver.TYPE_CODE_JSON
+            return self.TYPE_CODE_BINARY if self.__binary else self.TYPE_CODE_JSON
 
         if _type is bytes:
             return ResponseMessageSuccessResolver.TYPE_CODE_BYTES
@@ -27,6 +173,251 @@ class ResponseMessageSuccessResolver(AbstractMessageResolver):
 
         raise Exception(f"Unknown type '{_type}' for response")
 
+    def __match_objects(self, items: list) -> Optional[ObjectTable]:
+        if not items or type(first := items[0]) is not dict:
+            return None
+
+        if not (obj := self.__objects_by_keys.get(frozenset(first))) or not obj.match(items):
+            return None
+
+        return obj
+
+    def __compile_encoder(self) -> Callable[[Any, bytearray], None]:
+        """ Encoder is built as closure over local names, value encoding is the hot path of big lists """
+        float_pack = self.FLOAT_STRUCT.pack
+        separator = self.STRINGS_SEPARATOR
+        match_objects = self.__match_objects
+
+        def encode_varint(value: int, out: bytearray):
+            while value > 0x7F:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+
+            out.append(value)
+
+        def encode_bytes(value: bytes, out: bytearray):
+            encode_varint(len(value), out)
+            out += value
+
+        def encode_objects(obj: ResponseMessageSuccessResolver.ObjectTable, items: list, out: bytearray, single: bool) -> bool:
+            """ Returns False if items cannot be packed (int out of 8 bytes, not str or zero char in string) """
+            fixed = b""
+            strings = b""
+
+            if obj.fixed:
+                pack, get_fixed = obj.fixed_struct.pack, obj.get_fixed
+
+                try:
+                    fixed = b"".join([pack(*get_fixed(item)) for item in items])
+                except struct_error:
+                    return False
+
+            if obj.strings:
+                try:
+                    strings = separator.join(chain.from_iterable(map(obj.get_strings, items)))
+                except TypeError:
+                    return False
+
+                if strings.count(separator) != len(obj.strings) * len(items) - 1:
+                    return False
+
+                strings = strings.encode('utf-8')
+
+            out.append(self.TAG_OBJECT if single else self.TAG_OBJECTS)
+            encode_varint(obj.index, out)
+
+            if not single:
+                encode_varint(len(items), out)
+
+            out += fixed
+
+            if obj.strings:
+                encode_bytes(strings, out)
+
+            for item in items:
+                for field in obj.values:
+                    encode(item[field], out)
+
+            return True
+
+        def encode(value, out: bytearray):
+            _type = type(value)
+
+            if _type is str:
+                out.append(self.TAG_STR)
+                encode_bytes(value.encode('utf-8'), out)
+            elif _type is list or _type is tuple:
+                if (obj := match_objects(value)) and encode_objects(obj, value, out, False):
+                    return
+
+                out.append(self.TAG_LIST)
+                encode_varint(len(value), out)
+
+                for item in value:
+                    encode(item, out)
+            elif _type is dict:
+                if (obj := match_objects([value])) and encode_objects(obj, [value], out, True):
+                    return
+
+                out.append(self.TAG_MAP)
+                encode_varint(len(value), out)
+
+                for key, item in value.items():
+                    encode(key, out)
+                    encode(item, out)
+            elif value is None:
+                out.append(self.TAG_NULL)
+            elif _type is bool:
+                out.append(self.TAG_TRUE if value else self.TAG_FALSE)
+            elif _type is int:
+                out.append(self.TAG_INT)
+                encode_varint(value << 1 if value >= 0 else (-value << 1) - 1, out)
+            elif _type is float:
+                out.append(self.TAG_FLOAT)
+                out += float_pack(value)
+            elif _type is bytes:
+                out.append(self.TAG_BYTES)
+                encode_bytes(value, out)
+            else:
+                raise Exception(f"Unknown type '{_type}' for response")
+
+        return encode
+
+    def __compile_decoder(self) -> Callable[[bytes, int], Tuple[Any, int]]:
+        """ Decoder is built as closure over local names, value decoding is the hot path of big lists """
+        objects = self.__objects
+        float_unpack = self.FLOAT_STRUCT.unpack_from
+        float_size = self.FLOAT_STRUCT.size
+        separator = self.STRINGS_SEPARATOR
+
+        def decode_varint(data: bytes, pos: int) -> Tuple[int, int]:
+            value, shift = 0, 0
+
+            while (byte := data[pos]) & 0x80:
+                value |= (byte & 0x7F) << shift
+                shift += 7
+                pos += 1
+
+            return value | (byte << shift), pos + 1
+
+        def decode_bytes(data: bytes, pos: int) -> Tuple[bytes, int]:
+            size, pos = decode_varint(data, pos)
+            end = pos + size
+
+            if end > len(data):
+                raise Exception("Response data is shorter than encoded value")
+
+            return data[pos:end], end
+
+        def decode_objects(data: bytes, pos: int, single: bool) -> Tuple[list, int]:
+            index, pos = decode_varint(data, pos)
+
+            if index >= len(objects):
+                raise Exception(f"Unknown object index '{index}' in response")
+
+            obj = objects[index]
+            count, pos = (1, pos) if single else decode_varint(data, pos)
+
+            fixed = repeat((), count)
+            strings = repeat((), count)
+
+            if obj.fixed:
+                end = pos + obj.fixed_struct.size * count
+                fixed = obj.fixed_struct.iter_unpack(data[pos:end])
+                pos = end
+
+            if obj.strings:
+                block, pos = decode_bytes(data, pos)
+                block = block.decode('utf-8').split(separator)
+
+                if len(block) != len(obj.strings) * count:
+                    raise Exception("Count of strings in response does not match objects")
+
+                # Groups of strings of every object
+                strings = zip(*[iter(block)] * len(obj.strings))
+
+            items = list(map(obj.create, fixed, strings))
+
+            if obj.values:
+                for item in items:
+                    for field in obj.values:
+                        item[field], pos = decode(data, pos)
+
+            return items, pos
+
+        def decode(data: bytes, pos: int) -> Tuple[Any, int]:
+            tag = data[pos]
+            pos += 1
+
+            if tag == self.TAG_OBJECTS:
+                return decode_objects(data, pos, False)
+
+            if tag == self.TAG_OBJECT:
+                items, pos = decode_objects(data, pos, True)
+                return items[0], pos
+
+            if tag == self.TAG_STR:
+                value, pos = decode_bytes(data, pos)
+                return value.decode('utf-8'), pos
+
+            if tag == self.TAG_LIST:
+                count, pos = decode_varint(data, pos)
+                value = []
+
+                for _ in range(count):
+                    item, pos = decode(data, pos)
+                    value.append(item)
+
+                return value, pos
+
+            if tag == self.TAG_MAP:
+                count, pos = decode_varint(data, pos)
+                value = {}
+
+                for _ in range(count):
+                    key, pos = decode(data, pos)
+                    value[key], pos = decode(data, pos)
+
+                return value, pos
+
+            if tag == self.TAG_INT:
+                value, pos = decode_varint(data, pos)
+                return (value >> 1) ^ -(value & 1), pos
+
+            if tag == self.TAG_NULL:
+                return None, pos
+
+            if tag == self.TAG_FALSE or tag == self.TAG_TRUE:
+                return tag == self.TAG_TRUE, pos
+
+            if tag == self.TAG_FLOAT:
+                return float_unpack(data, pos)[0], pos + float_size
+
+            if tag == self.TAG_BYTES:
+                return decode_bytes(data, pos)
+
+            raise Exception(f"Unknown value tag '{tag}' in response")
+
+        return decode
+
+    def __encode_binary(self, data: Union[list, dict]) -> bytes:
+        out = bytearray()
+
+        self.__encode_value(data, out)
+
+        return bytes(out)
+
+    def __decode_binary(self, data: bytes) -> Union[list, dict]:
+        # Values are sliced from bytes, slices of short strings are cheaper than memoryview slices
+        data = bytes(data)
+
+        value, pos = self.__decode_value(data, 0)
+
+        if pos != len(data):
+            raise Exception("Response data is longer than encoded value")
+
+        return value
+
     def __encode_data(self, data: Union[str, list, dict, bytes, bool], _type: int) -> bytes:
         if _type == self.TYPE_CODE_STR:
             return data.encode("utf-8")
@@ -34,6 +425,9 @@ class ResponseMessageSuccessResolver(AbstractMessageResolver):
         if _type == self.TYPE_CODE_JSON:
             return json.dumps(data).encode("utf-8")
 
+        if _type == self.TYPE_CODE_BINARY:
+            return self.__encode_binary(data)
+
         if _type is self.TYPE_CODE_BYTES:
             return data
 
@@ -42,13 +436,16 @@ class ResponseMessageSuccessResolver(AbstractMessageResolver):
 
     def __decode_data(self, data: bytes, _type: int) -> Union[str, list, dict, bytes, bool]:
         if _type == self.TYPE_CODE_STR:
-            return data.decode("utf-8")
+            return str(data, "utf-8")
 
         if _type == self.TYPE_CODE_JSON:
-            return json.loads(data.decode("utf-8"))
+            return json.loads(str(data, "utf-8"))
+
+        if _type == self.TYPE_CODE_BINARY:
+            return self.__decode_binary(data)
 
         if _type is self.TYPE_CODE_BYTES:
-            return data
+            return bytes(data)
 
         if _type is self.TYPE_CODE_BOOL:
             return False if b"\x00" == data else True
@@ -1,10 +1,14 @@
+from .BatchMessageResolver import BatchMessageResolver
 from .CallMessageResolver import CallMessageResolver
+from .CallMessageStreamParser import CallMessageStreamParser
 from .InternalErrorMessageResolver import InternalErrorMessageResolver
 from .AbstractMessageResolver import AbstractMessageResolver
 from .ResponseMessageSuccessResolver import ResponseMessageSuccessResolver
 
 __all__ = [
+    "BatchMessageResolver",
     "CallMessageResolver",
+    "CallMessageStreamParser",
     "InternalErrorMessageResolver",
     "AbstractMessageResolver",
     "ResponseMessageSuccessResolver",
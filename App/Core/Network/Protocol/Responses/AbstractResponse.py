@@ -5,10 +5,17 @@ from typing import Union
 class AbstractResponse(ABC):
     def __init__(self, data: Union[str, dict, list, bytes, None]):
         self._data = data
+        self._request_id = 0
 
     def data(self) -> Union[str, dict, list, bytes, None]:
         return self._data
 
+    def request_id(self) -> int:
+        return self._request_id
+
+    def set_request_id(self, request_id: int):
+        self._request_id = request_id
+
     @staticmethod
     @abstractmethod
     def type() -> int:
@@ -0,0 +1,16 @@
+from typing import List
+
+from .AbstractResponse import AbstractResponse
+from App.Core.Network.Protocol.RCLProtocol import RCLProtocol
+
+
+class ResponseBatch(AbstractResponse):
+    def __init__(self, responses: List[AbstractResponse]) -> None:
+        super().__init__(responses)
+
+    def responses(self) -> List[AbstractResponse]:
+        return self._data
+
+    @staticmethod
+    def type() -> int:
+        return RCLProtocol.RCL_MESSAGE_TYPE_BATCH_RETURN
@@ -0,0 +1,29 @@
+from typing import Iterator
+
+from .AbstractResponse import AbstractResponse
+from App.Core.Network.Protocol.RCLProtocol import RCLProtocol
+
+
+class ResponseStream(AbstractResponse):
+    """
+    Success response with bytes produced while request is handled. Blocks are sent to client as chunks
+    of unknown total length as soon as they are produced (requires chunked messages).
+    """
+
+    def __init__(self, blocks: Iterator[bytes]) -> None:
+        super().__init__(blocks)
+
+    def blocks(self) -> Iterator[bytes]:
+        return self._data
+
+    def collect(self) -> bytes:
+        """ Reads all blocks, used if response cannot be streamed """
+        return b"".join(self._data)
+
+    def close(self):
+        if hasattr(self._data, 'close'):
+            self._data.close()
+
+    @staticmethod
+    def type() -> int:
+        return RCLProtocol.RCL_MESSAGE_TYPE_RETURN
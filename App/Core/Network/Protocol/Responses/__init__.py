@@ -1,9 +1,13 @@
 from .ResponseSuccess import ResponseSuccess
 from .AbstractResponse import AbstractResponse
 from .ResponseInternalError import ResponseInternalError
+from .ResponseBatch import ResponseBatch
+from .ResponseStream import ResponseStream
 
 __all__ = [
     "ResponseSuccess",
     "ResponseInternalError",
+    "ResponseBatch",
+    "ResponseStream",
     "AbstractResponse",
 ]
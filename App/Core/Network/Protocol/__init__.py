@@ -1,10 +1,11 @@
 from .RCL import RCL
 from .RCLProtocol import RCLProtocol
 
-from .Requests import CallRequest
+from .Requests import CallRequest, BatchRequest
 
 __all__ = [
     'RCL',
     'CallRequest',
+    'BatchRequest',
     'RCLProtocol',
 ]
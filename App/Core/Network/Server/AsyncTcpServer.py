@@ -0,0 +1,430 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+from typing import Iterator, Optional, Union
+
+from App.Core.Abstract import AbstractConnectionHandler, AbstractReceiveDataHandler
+from App.Core.Logger import Log
+from App.Core import Config
+from App.Core.Network.Protocol import RCL, RCLProtocol
+from App.Core.Network.Protocol.Requests import AbstractRequest
+from App.Core.Network.Protocol.Responses import ResponseInternalError
+
+from .SentChunks import SentChunks
+from .TcpServer import TcpServer
+
+
+class AsyncTcpServer(Thread):
+    """
+    Asyncio based server. Connections are accepted and RCL messages are framed on the event loop,
+    received messages are handled by fixed size threads pool.
+
+    Limits:
+        workers                - Count of threads in handlers pool.
+        max_in_flight_requests - Count of requests sent to handlers pool at the same time.
+        max_queue_size         - Count of requests waiting for a free in flight slot. If queue is full,
+                                 request is refused with internal error response.
+
+    Keep alive:
+        If enabled, connection is not closed after response and waits next request until idle timeout
+        or requests per connection limit.
+
+    Streaming:
+        Call messages longer than spool threshold are parsed while receiving, big parameters are written
+        to spool files instead of memory.
+
+    Chunked messages:
+        Chunked requests are assembled while receiving, corrupted chunks are requested again.
+        Chunks of last chunked responses are kept to resend them by client request.
+
+    Streamed responses:
+        Messages of streamed response are produced by handlers pool and sent one by one, request keeps
+        its in flight slot until last message is sent.
+
+    Multiplexing (requires keep alive):
+        Connection reads next requests while previous are handled. Responses are sent as soon as each
+        request is handled, so they may come out of order. Client matches them by 'request_id' header.
+    """
+
+    MESSAGE_SERVER_BUSY = "Server is busy. Try again later."
+    MESSAGE_HANDLE_FAILED = "Failed to handle request."
+
+    def __init__(
+            self,
+            config: Config,
+            logger: Log,
+            rcl: RCL,
+            connection_handler: AbstractConnectionHandler,
+            receive_data_handler: AbstractReceiveDataHandler,
+    ):
+        super().__init__()
+
+        self.__logger = logger
+        self.__rcl = rcl
+        self.__connection_handler = connection_handler
+        self.__receive_data_handler = receive_data_handler
+
+        self.__config = config.get('server')
+        self.__max_bytes = self.__config['max_bytes_receive']
+
+        self.__max_in_flight = self.__config['max_in_flight_requests']
+        self.__max_queue_size = self.__config['max_queue_size']
+        self.__executor = ThreadPoolExecutor(self.__config['workers'], 'rcl-handler')
+
+        self.__keep_alive = self.__config['keep_alive']
+        self.__keep_alive_timeout = self.__config['keep_alive_timeout']
+        self.__keep_alive_max_requests = self.__config['keep_alive_max_requests']
+
+        self.__multiplexing = self.__keep_alive and self.__config['multiplexing']
+        self.__multiplexing_max_in_flight = self.__config['multiplexing_max_in_flight_requests']
+
+        self.__socket = TcpServer.create(self.__config)
+
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__stop: Optional[asyncio.Event] = None
+        self.__in_flight: Optional[asyncio.Semaphore] = None
+        self.__queued = 0
+
+    def __debug(self, message: str):
+        self.__logger.debug(message, {"object": self})
+
+    def close(self):
+        self.__socket.close()
+
+    def terminate(self):
+        if self.__loop and self.__stop:
+            self.__loop.call_soon_threadsafe(self.__stop.set)
+            return
+
+        self.__socket.close()
+
+    def __create_error_response(self, message: str, data: Union[bytes, AbstractRequest]) -> bytes:
+        if isinstance(data, AbstractRequest):
+            request_id = data.request_id()
+        else:
+            request_id = RCLProtocol.get_headers(data)[RCLProtocol.RCL_HEADER_REQUEST_ID]
+
+        return self.__rcl.create_response(ResponseInternalError(message), request_id)
+
+    async def __read_stream(self, reader: asyncio.StreamReader, header: bytes) -> Optional[AbstractRequest]:
+        """
+        Parser writes big parameters to spool file, so it is fed by handlers pool instead of event loop.
+        Next block is received while previous one is being fed.
+        """
+        parser = self.__rcl.create_request_stream(header)
+        remaining = parser.remaining()
+        feeding: Optional[asyncio.Future] = None
+
+        try:
+            while remaining:
+                if not (data := await reader.read(min(remaining, self.__max_bytes))):
+                    raise asyncio.IncompleteReadError(b"", remaining)
+
+                remaining -= len(data)
+
+                if feeding is not None:
+                    await feeding
+
+                feeding = self.__loop.run_in_executor(self.__executor, parser.feed, data)
+
+            if feeding is not None:
+                await feeding
+        except BaseException as e:
+            # Spool file is not removed under running feed
+            if feeding is not None and not feeding.done():
+                await asyncio.wait([feeding])
+
+            parser.close()
+
+            if not isinstance(e, Exception) or isinstance(e, (asyncio.IncompleteReadError, ConnectionError)):
+                raise
+
+            self.__logger.error(f"Failed to receive request. {str(e)}", {"object": self})
+
+            return None
+
+        try:
+            return self.__rcl.parse_request_stream(header, parser)
+        except Exception as e:
+            self.__logger.error(f"Failed to parse request. {str(e)}", {"object": self})
+
+        return None
+
+    @staticmethod
+    async def __send(writer: asyncio.StreamWriter, lock: asyncio.Lock, data: bytes):
+        async with lock:
+            writer.write(data)
+            await writer.drain()
+
+    @staticmethod
+    async def __read_body(reader: asyncio.StreamReader, header: bytes) -> bytes:
+        return header + await reader.readexactly(RCLProtocol.get_message_length(header) - len(header))
+
+    async def __read_chunked(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+            lock: asyncio.Lock,
+            data: bytes
+    ) -> Optional[AbstractRequest]:
+        assembler = None
+
+        try:
+            assembler = self.__rcl.create_chunk_assembler(data)
+
+            while True:
+                # Chunks of call message are fed to parser which writes spool file
+                if assembler.parser() is not None:
+                    sequence = await self.__loop.run_in_executor(self.__executor, assembler.add, data)
+                else:
+                    sequence = assembler.add(data)
+
+                if sequence is not None:
+                    await self.__send(writer, lock, self.__rcl.chunk_corrupted(assembler.request_id(), sequence))
+
+                if assembler.done():
+                    break
+
+                data = await self.__read_body(reader, await reader.readexactly(RCLProtocol.RCL_HEADERS_LENGTH))
+
+            return self.__rcl.parse_chunked_request(assembler)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            if assembler:
+                assembler.close()
+
+            raise
+        except Exception as e:
+            if assembler:
+                assembler.close()
+
+            self.__logger.error(f"Failed to receive chunked request. {str(e)}", {"object": self})
+
+        return None
+
+    async def __read_message(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+            lock: asyncio.Lock,
+            sent_chunks: SentChunks
+    ) -> Union[bytes, AbstractRequest, None]:
+        while True:
+            header = reader.readexactly(RCLProtocol.RCL_HEADERS_LENGTH)
+
+            if self.__keep_alive:
+                header = asyncio.wait_for(header, self.__keep_alive_timeout)
+
+            header = await header
+
+            if not RCLProtocol.check_rcl_protocol(header[:RCLProtocol.RCL_HEADER_LEN_START_BYTES]):
+                return None
+
+            if self.__rcl.can_stream_request(header):
+                return await self.__read_stream(reader, header)
+
+            data = await self.__read_body(reader, header)
+
+            if RCLProtocol.get_headers(header)[RCLProtocol.RCL_HEADER_MESSAGE_TYPE] == RCLProtocol.RCL_MESSAGE_TYPE_CHUNK:
+                return await self.__read_chunked(reader, writer, lock, data)
+
+            if not SentChunks.is_resend_request(data):
+                return data
+
+            # Chunk resend is not a request, next message is read
+            if chunk := sent_chunks.resend(data):
+                await self.__send(writer, lock, chunk)
+
+    def __handle(self, data: Union[bytes, AbstractRequest]) -> Union[bytes, Iterator[bytes]]:
+        try:
+            if isinstance(data, AbstractRequest):
+                return self.__receive_data_handler.handle_request(data)
+
+            return self.__receive_data_handler.handle(data)
+        except Exception as e:
+            self.__logger.error(f"Failed to handle request. {str(e)}", {"object": self})
+
+            return self.__create_error_response(self.MESSAGE_HANDLE_FAILED, data)
+
+    @staticmethod
+    def __close_stream(response: Iterator[bytes]):
+        try:
+            response.close()
+        except ValueError:
+            # Stream is still producing message in handlers pool (server is stopping)
+            pass
+
+    async def __send_response(
+            self,
+            writer: asyncio.StreamWriter,
+            lock: asyncio.Lock,
+            response: Union[bytes, Iterator[bytes]],
+            sent_chunks: SentChunks
+    ):
+        if isinstance(response, (bytes, bytearray)):
+            sent_chunks.store(response)
+            await self.__send(writer, lock, response)
+            return
+
+        # Streamed response. Closing of stream stops producing of data if client is gone
+        try:
+            while (message := await self.__loop.run_in_executor(self.__executor, next, response, None)) is not None:
+                await self.__send(writer, lock, message)
+        finally:
+            await self.__loop.run_in_executor(self.__executor, self.__close_stream, response)
+
+    async def __dispatch(
+            self,
+            data: Union[bytes, AbstractRequest],
+            writer: asyncio.StreamWriter,
+            lock: asyncio.Lock,
+            sent_chunks: SentChunks
+    ):
+        if self.__queued >= self.__max_queue_size:
+            self.__logger.warning("Requests queue is full. Request refused.", {"object": self})
+
+            if isinstance(data, AbstractRequest):
+                data.close()
+
+            response = self.__create_error_response(self.MESSAGE_SERVER_BUSY, data)
+            await self.__send_response(writer, lock, response, sent_chunks)
+            return
+
+        self.__queued += 1
+
+        try:
+            await self.__in_flight.acquire()
+        finally:
+            self.__queued -= 1
+
+        try:
+            response = await self.__loop.run_in_executor(self.__executor, self.__handle, data)
+
+            await self.__send_response(writer, lock, response, sent_chunks)
+        finally:
+            self.__in_flight.release()
+
+    def __can_keep_alive(self, requests_count: int) -> bool:
+        if not self.__keep_alive:
+            return False
+
+        if not self.__keep_alive_max_requests:
+            return True
+
+        return requests_count < self.__keep_alive_max_requests
+
+    async def __serve_sequential(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+            lock: asyncio.Lock,
+            sent_chunks: SentChunks
+    ):
+        requests_count = 0
+
+        while data := await self.__read_message(reader, writer, lock, sent_chunks):
+            await self.__dispatch(data, writer, lock, sent_chunks)
+
+            requests_count += 1
+
+            if not self.__can_keep_alive(requests_count):
+                break
+
+    async def __respond(
+            self,
+            data: Union[bytes, AbstractRequest],
+            writer: asyncio.StreamWriter,
+            lock: asyncio.Lock,
+            slots: asyncio.Semaphore,
+            sent_chunks: SentChunks
+    ):
+        try:
+            await self.__dispatch(data, writer, lock, sent_chunks)
+        except ConnectionError as e:
+            self.__debug(f"Cannot send response. {str(e)}")
+        finally:
+            slots.release()
+
+    async def __serve_multiplexed(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+            lock: asyncio.Lock,
+            sent_chunks: SentChunks
+    ):
+        slots = asyncio.Semaphore(self.__multiplexing_max_in_flight)
+        tasks = set()
+        requests_count = 0
+
+        try:
+            while True:
+                try:
+                    data = await self.__read_message(reader, writer, lock, sent_chunks)
+                except asyncio.TimeoutError:
+                    # Connection is not idle while requests are handled
+                    if tasks:
+                        continue
+
+                    raise
+
+                if not data:
+                    break
+
+                await slots.acquire()
+
+                task = asyncio.create_task(self.__respond(data, writer, lock, slots, sent_chunks))
+                task.add_done_callback(tasks.discard)
+                tasks.add(task)
+
+                requests_count += 1
+
+                if not self.__can_keep_alive(requests_count):
+                    break
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks)
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        address, port = writer.get_extra_info('peername')[:2]
+
+        if not self.__connection_handler.handle(address, port):
+            self.__debug(f"Connection refused: {address}, {port}")
+            writer.close()
+            return
+
+        self.__debug(f"Open connection. Address: {address}; Port: {port};")
+
+        lock = asyncio.Lock()
+
+        try:
+            if self.__multiplexing:
+                await self.__serve_multiplexed(reader, writer, lock, SentChunks(self.__multiplexing_max_in_flight))
+            else:
+                await self.__serve_sequential(reader, writer, lock, SentChunks(1))
+        except asyncio.TimeoutError:
+            self.__debug(f"Keep alive timeout. Address: {address}; Port: {port};")
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                self.__debug(f"Connection lost. Address: {address}; Port: {port}; {str(e)}")
+        except ConnectionError as e:
+            self.__debug(f"Connection lost. Address: {address}; Port: {port}; {str(e)}")
+        finally:
+            writer.close()
+
+            self.__debug(f"Close connection. Address: {address}; Port: {port};")
+
+    async def __serve(self):
+        self.__loop = asyncio.get_running_loop()
+        self.__stop = asyncio.Event()
+        self.__in_flight = asyncio.Semaphore(self.__max_in_flight)
+
+        server = await asyncio.start_server(self.__handle_connection, sock=self.__socket)
+
+        async with server:
+            await self.__stop.wait()
+
+    def run(self):
+        try:
+            asyncio.run(self.__serve())
+        finally:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__socket.close()
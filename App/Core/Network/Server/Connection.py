@@ -1,24 +1,39 @@
 from socket import socket, error
 from threading import Thread
-from typing import Tuple, Callable, Optional
+from typing import Tuple, Callable, Iterator, Optional, Union
 
 from App.Core.Abstract import AbstractReceiveDataHandler
-from App.Core.Network.Protocol import RCLProtocol
+from App.Core.Network.Protocol import RCL
+from App.Core.Network.Protocol.Requests import AbstractRequest
+
+from .MessageReceiver import MessageReceiver
+from .SentChunks import SentChunks
 
 
 class Connection(Thread):
-    def __init__(self, sock: socket, client: Tuple[str, int], handler: AbstractReceiveDataHandler, recv_bytes: int):
+    def __init__(
+            self,
+            sock: socket,
+            client: Tuple[str, int],
+            handler: AbstractReceiveDataHandler,
+            recv_bytes: int,
+            rcl: RCL
+    ):
         super().__init__()
 
         self.__client = client
 
         self.__socket: socket = sock
         self.__handler = handler
-        self.__received_data: bytes = b""
+        self.__receiver = MessageReceiver(sock, recv_bytes, rcl)
+        self.__sent_chunks = SentChunks(1)
+        self.__received_data: Union[memoryview, AbstractRequest, None] = None
         self.__opened: bool = True
-        self.__max_bytes_receive: int = recv_bytes
-        self.__accepted = False
-        self.__receive_len = None
+
+        self.__keep_alive = False
+        self.__keep_alive_timeout: Optional[float] = None
+        self.__keep_alive_max_requests = 0
+        self.__requests_count = 0
 
         self.__close_callback: Optional[Callable[[Tuple[str, int]], None]] = None
 
@@ -31,6 +46,11 @@ class Connection(Thread):
     def set_close_callback(self, callback: Callable[[Tuple[str, int]], None]):
         self.__close_callback = callback
 
+    def set_keep_alive(self, timeout: Optional[float], max_requests: int = 0):
+        self.__keep_alive = True
+        self.__keep_alive_timeout = timeout
+        self.__keep_alive_max_requests = max_requests
+
     def close(self) -> None:
         if self.__close_callback:
             self.__close_callback(self.__client)
@@ -39,49 +59,74 @@ class Connection(Thread):
 
         self.__socket.close()
 
-    def __recv_segment(self) -> bytes:
-        return self.__socket.recv(self.__max_bytes_receive)
+    def __can_keep_alive(self) -> bool:
+        if not self.__keep_alive:
+            return False
 
-    def __determinate_len(self):
-        start_index = RCLProtocol.RCL_HEADER_INDEX_DATA_LENGTH
-        end_index = start_index + RCLProtocol.RCL_HEADER_LEN_DATA_LENGTH
+        if not self.__keep_alive_max_requests:
+            return True
 
-        _len = int.from_bytes(self.__received_data[start_index:end_index], 'big')
+        return self.__requests_count < self.__keep_alive_max_requests
 
-        self.__receive_len = RCLProtocol.RCL_HEADERS_LENGTH + _len + 4
+    def __resend_chunk(self) -> bool:
+        if isinstance(self.__received_data, AbstractRequest):
+            return False
 
-    def __try_accept(self):
-        try:
-            if segment := self.__recv_segment():
-                self.__received_data += segment
+        if not SentChunks.is_resend_request(self.__received_data):
+            return False
 
-                self.__determinate_len()
+        if chunk := self.__sent_chunks.resend(self.__received_data):
+            self.__socket.sendall(chunk)
 
-                while len(self.__received_data) < self.__receive_len:
-                    self.__received_data += self.__recv_segment()
+        return True
 
-                self.__accepted = True
+    def __handle(self) -> Union[bytes, Iterator[bytes]]:
+        if isinstance(self.__received_data, AbstractRequest):
+            return self.__handler.handle_request(self.__received_data)
 
-        except error as e:
-            self.__error_message = str(e)
+        return self.__handler.handle(self.__received_data)
+
+    def __send(self, response: Union[bytes, Iterator[bytes]]):
+        if isinstance(response, (bytes, bytearray)):
+            self.__sent_chunks.store(response)
+            self.__socket.sendall(response)
+            return
+
+        # Streamed response. Closing of stream stops producing of data if client is gone
+        try:
+            for message in response:
+                self.__socket.sendall(message)
+        finally:
+            response.close()
 
     def run(self):
-        while True:
-            if not self.__opened:
+        if self.__keep_alive:
+            self.__socket.settimeout(self.__keep_alive_timeout)
+
+        while self.__opened:
+            if not self.__wait_receive():
                 break
 
-            if self.__wait_receive():
-                self.__socket.sendall(self.__handler.handle(self.__received_data))
+            try:
+                # Chunk resend is not a request, connection waits next message
+                if self.__resend_chunk():
+                    continue
 
-                self.close()
+                self.__send(self.__handle())
+            except error:
+                break
 
-    def __wait_receive(self) -> bool:
-        try:
-            self.__try_accept()
+            self.__requests_count += 1
 
-            return self.__accepted
+            if not self.__can_keep_alive():
+                break
 
+        self.close()
+
+    def __wait_receive(self) -> bool:
+        try:
+            self.__received_data = self.__receiver.receive()
         except error:
-            self.close()
+            return False
 
-        return False
+        return self.__received_data is not None
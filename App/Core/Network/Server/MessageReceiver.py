@@ -0,0 +1,113 @@
+from socket import socket
+from typing import Optional, Union
+
+from App.Core.Network.Protocol import RCL, RCLProtocol
+from App.Core.Network.Protocol.Requests import AbstractRequest
+
+
+class MessageReceiver:
+    """
+    Receives framed RCL messages from socket.
+
+    Header is received first. Message buffer is allocated once by 'data_length' header and filled by
+    'recv_into', so segments are not concatenated and message is not copied after receiving.
+    Socket is never read after message end, so next message of kept alive connection stays in socket.
+
+    Call messages longer than spool threshold are not buffered. They are parsed while receiving and
+    big parameters are written to spool files, so request is returned instead of message.
+
+    Chunked messages are assembled while receiving and returned as request too. Corrupted chunks are
+    requested from sender again.
+    """
+
+    def __init__(self, sock: socket, max_bytes_receive: int, rcl: RCL):
+        self.__socket = sock
+        self.__max_bytes_receive = max_bytes_receive
+        self.__rcl = rcl
+
+    def __receive_into(self, view: memoryview) -> bool:
+        while len(view):
+            if not (received := self.__socket.recv_into(view, min(len(view), self.__max_bytes_receive))):
+                return False
+
+            view = view[received:]
+
+        return True
+
+    def __receive_stream(self, header: bytearray) -> Optional[AbstractRequest]:
+        parser = self.__rcl.create_request_stream(header)
+        chunk = memoryview(bytearray(self.__max_bytes_receive))
+
+        try:
+            while not parser.done():
+                if not (received := self.__socket.recv_into(chunk, min(parser.remaining(), len(chunk)))):
+                    parser.close()
+                    return None
+
+                parser.feed(chunk[:received])
+        except BaseException:
+            parser.close()
+            raise
+
+        if not parser.valid():
+            parser.close()
+            return None
+
+        return self.__rcl.parse_request_stream(header, parser)
+
+    def __receive_chunked(self, data: memoryview) -> Optional[AbstractRequest]:
+        assembler = self.__rcl.create_chunk_assembler(data)
+
+        try:
+            while True:
+                if (sequence := assembler.add(data)) is not None:
+                    self.__socket.sendall(self.__rcl.chunk_corrupted(assembler.request_id(), sequence))
+
+                if assembler.done():
+                    break
+
+                if not (header := self.__receive_header()) or not (data := self.__receive_message(header)):
+                    assembler.close()
+                    return None
+        except BaseException:
+            assembler.close()
+            raise
+
+        return self.__rcl.parse_chunked_request(assembler)
+
+    def __receive_header(self) -> Optional[bytearray]:
+        header = bytearray(RCLProtocol.RCL_HEADERS_LENGTH)
+
+        if not self.__receive_into(memoryview(header)):
+            return None
+
+        if not RCLProtocol.check_rcl_protocol(header[:RCLProtocol.RCL_HEADER_LEN_START_BYTES]):
+            return None
+
+        return header
+
+    def __receive_message(self, header: bytearray) -> Optional[memoryview]:
+        buffer = bytearray(RCLProtocol.get_message_length(header))
+        buffer[:len(header)] = header
+
+        view = memoryview(buffer)
+
+        if not self.__receive_into(view[len(header):]):
+            return None
+
+        return view
+
+    def receive(self) -> Union[memoryview, AbstractRequest, None]:
+        if not (header := self.__receive_header()):
+            return None
+
+        if self.__rcl.can_stream_request(header):
+            return self.__receive_stream(header)
+
+        if not (data := self.__receive_message(header)):
+            return None
+
+        if RCLProtocol.get_headers(header)[RCLProtocol.RCL_HEADER_MESSAGE_TYPE] == RCLProtocol.RCL_MESSAGE_TYPE_CHUNK:
+            return self.__receive_chunked(data)
+
+        return data
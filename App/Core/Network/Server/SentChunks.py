@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from typing import Optional, Union, Dict
+
+from App.Core.Network.Protocol import RCLProtocol
+
+
+class SentChunks:
+    """
+    Chunks of last chunked responses sent by connection. Kept to resend chunk, that client received
+    corrupted and requested again by 'chunk_corrupted' message.
+    """
+
+    def __init__(self, size: int):
+        self.__size = size
+        self.__responses: OrderedDict[int, Dict[int, memoryview]] = OrderedDict()
+
+    def store(self, data: Union[bytes, bytearray]):
+        view = memoryview(data)
+
+        headers = RCLProtocol.get_headers(view)
+
+        if headers[RCLProtocol.RCL_HEADER_MESSAGE_TYPE] != RCLProtocol.RCL_MESSAGE_TYPE_CHUNK:
+            return
+
+        chunks = {}
+
+        while len(view):
+            _len = RCLProtocol.get_message_length(view)
+            chunk = RCLProtocol.get_chunk_headers(view)
+
+            chunks[chunk[RCLProtocol.RCL_CHUNK_HEADER_SEQUENCE]] = view[:_len]
+
+            view = view[_len:]
+
+        request_id = headers[RCLProtocol.RCL_HEADER_REQUEST_ID]
+
+        self.__responses.pop(request_id, None)
+        self.__responses[request_id] = chunks
+
+        while len(self.__responses) > self.__size:
+            self.__responses.popitem(last=False)
+
+    def resend(self, data: Union[bytes, memoryview]) -> Optional[bytes]:
+        headers = RCLProtocol.get_headers(data)
+
+        sequence = int.from_bytes(RCLProtocol.get_message(data, headers[RCLProtocol.RCL_HEADER_DATA_LENGTH]), 'big')
+
+        if not (chunk := self.__responses.get(headers[RCLProtocol.RCL_HEADER_REQUEST_ID], {}).get(sequence)):
+            return None
+
+        return bytes(chunk)
+
+    @staticmethod
+    def is_resend_request(data: Union[bytes, memoryview]) -> bool:
+        _type = RCLProtocol.get_headers(data)[RCLProtocol.RCL_HEADER_MESSAGE_TYPE]
+
+        return _type == RCLProtocol.RCL_MESSAGE_TYPE_CHUNK_CORRUPTED
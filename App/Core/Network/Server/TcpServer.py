@@ -5,6 +5,7 @@ from typing import List
 from App.Core.Abstract import AbstractConnectionHandler, AbstractReceiveDataHandler
 from App.Core.Logger import Log
 from App.Core import Config
+from App.Core.Network.Protocol import RCL
 
 from App import Application
 from App.Core import Platform
@@ -22,12 +23,14 @@ class TcpServer(Thread):
             self,
             config: Config,
             logger: Log,
+            rcl: RCL,
             connection_handler: AbstractConnectionHandler,
             receive_data_handler: AbstractReceiveDataHandler,
     ):
         super().__init__()
 
         self.__logger = logger
+        self.__rcl = rcl
         self.__connection_handler = connection_handler
         self.__receive_data_handler = receive_data_handler
 
@@ -75,8 +78,14 @@ class TcpServer(Thread):
                 self.__logger.debug(f"Connection refused: {address}, {port}")
                 continue
 
-            connection = Connection(sock, (address, port), self.__receive_data_handler, self.__max_bytes)
-            connection.set_close_callback(lambda x: self.__close_connection_handler(connection, x))
+            connection = Connection(sock, (address, port), self.__receive_data_handler, self.__max_bytes, self.__rcl)
+            connection.set_close_callback(lambda x, c=connection: self.__close_connection_handler(c, x))
+
+            if self.__config['keep_alive']:
+                connection.set_keep_alive(
+                    self.__config['keep_alive_timeout'],
+                    self.__config['keep_alive_max_requests']
+                )
 
             self.__connections.append(connection)
 
@@ -1,5 +1,7 @@
 from .TcpServer import TcpServer
+from .AsyncTcpServer import AsyncTcpServer
 
 __all__ = [
-    'TcpServer'
+    'TcpServer',
+    'AsyncTcpServer',
 ]
@@ -1,7 +1,8 @@
-from .Server import TcpServer
+from .Server import TcpServer, AsyncTcpServer
 from .NetworkManager import NetworkManager
 
 __all__ = [
     "TcpServer",
+    "AsyncTcpServer",
     "NetworkManager",
 ]
@@ -0,0 +1,240 @@
+import asyncio
+import inspect
+import os
+import signal
+import subprocess
+from concurrent.futures import Future
+from queue import Queue
+from threading import Lock, Thread
+from typing import Awaitable, Callable, Dict, Generator, List, Optional, Tuple
+
+from App.Core.Abstract.SingletonMeta import SingletonMeta
+
+
+class SubprocessRunner(metaclass=SingletonMeta):
+    """
+    Runs commands by asyncio in own event loop thread, so every command has timeout and hung process
+    is killed instead of holding handler thread forever.
+
+    Count of processes of the same binary running at the same time is limited by 'limits' of
+    subprocesses config. Output of process may be streamed by blocks while process is running.
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    # Blocks of streamed output waiting for consumer, then output is not read until consumer takes block
+    STREAM_QUEUE_SIZE = 16
+
+    # Seconds to wait for killed process
+    KILL_TIMEOUT = 5
+
+    def __init__(self, limits: Dict[str, int]):
+        self.__limits = limits
+        self.__semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        self.__lock = Lock()
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __get_loop(self) -> asyncio.AbstractEventLoop:
+        with self.__lock:
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+
+                Thread(target=self.__loop.run_forever, name='subprocesses', daemon=True).start()
+
+            return self.__loop
+
+    def __semaphore(self, binary: str) -> Optional[asyncio.Semaphore]:
+        if not (limit := self.__limits.get(binary)):
+            return None
+
+        # Semaphores are created and used only by thread of loop
+        if binary not in self.__semaphores:
+            self.__semaphores[binary] = asyncio.Semaphore(limit)
+
+        return self.__semaphores[binary]
+
+    @staticmethod
+    async def __read(
+        stream: asyncio.StreamReader,
+        on_output: Optional[Callable[[bytes], Optional[Awaitable]]]
+    ) -> bytes:
+        """
+        Returns whole output if it is not streamed. If 'on_output' returns awaitable, next block is not read
+        until it is done, so process blocks on full pipe instead of output piling up in memory.
+        """
+        chunks = []
+
+        while block := await stream.read(SubprocessRunner.BLOCK_SIZE):
+            if on_output is not None:
+                if inspect.isawaitable(result := on_output(block)):
+                    await result
+            else:
+                chunks.append(block)
+
+        return b''.join(chunks)
+
+    async def __communicate(
+        self,
+        cmd: List[str],
+        _input: Optional[bytes],
+        on_output: Optional[Callable[[bytes], Optional[Awaitable]]]
+    ) -> Tuple[asyncio.subprocess.Process, bytes, bytes]:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.PIPE if _input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            # Children of process (sh -c, wsl) are killed together with it by timeout
+            start_new_session=hasattr(os, 'killpg'),
+        )
+
+        async def write():
+            if _input is None:
+                return
+
+            try:
+                process.stdin.write(_input)
+                await process.stdin.drain()
+                process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                # Process exited without reading input, its result is returned
+                pass
+
+        try:
+            _, stdout, stderr = await asyncio.gather(
+                write(),
+                self.__read(process.stdout, on_output),
+                self.__read(process.stderr, None),
+            )
+
+            await process.wait()
+        except asyncio.CancelledError:
+            await self.__kill(process)
+            raise
+
+        return process, stdout, stderr
+
+    async def __kill(self, process: asyncio.subprocess.Process):
+        if process.returncode is not None:
+            return
+
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            return
+
+        try:
+            await asyncio.wait_for(process.wait(), self.KILL_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
+    async def __execute(
+        self,
+        binary: str,
+        cmd: List[str],
+        _input: Optional[bytes],
+        timeout: Optional[float],
+        on_output: Optional[Callable[[bytes], Optional[Awaitable]]]
+    ) -> Tuple[Optional[int], bytes, bytes]:
+        """
+        Return code is None if process has been killed by timeout. Streamed output is passed to 'on_output'
+        by thread of runner loop and it is not returned.
+        """
+        semaphore = self.__semaphore(binary)
+
+        if semaphore is not None:
+            await semaphore.acquire()
+
+        try:
+            process, stdout, stderr = await asyncio.wait_for(
+                self.__communicate(cmd, _input, on_output),
+                timeout or None
+            )
+        except asyncio.TimeoutError:
+            return None, b'', b''
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+        return process.returncode, stdout, stderr
+
+    async def execute(
+        self,
+        binary: str,
+        cmd: List[str],
+        _input: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+        on_output: Optional[Callable[[bytes], None]] = None
+    ) -> Tuple[Optional[int], bytes, bytes]:
+        """ Can be awaited by any event loop, process is run by loop of runner """
+        loop = self.__get_loop()
+        coroutine = self.__execute(binary, cmd, _input, timeout, on_output)
+
+        if asyncio.get_running_loop() is loop:
+            return await coroutine
+
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+    def submit(
+        self,
+        binary: str,
+        cmd: List[str],
+        _input: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+        on_output: Optional[Callable[[bytes], None]] = None
+    ) -> Future:
+        """ Starts process without waiting for it. Cancelling of future kills process """
+        coroutine = self.__execute(binary, cmd, _input, timeout, on_output)
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__get_loop())
+
+    def execute_sync(
+        self,
+        binary: str,
+        cmd: List[str],
+        _input: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+        on_output: Optional[Callable[[bytes], None]] = None
+    ) -> Tuple[Optional[int], bytes, bytes]:
+        """ Blocks calling thread (not thread of runner loop) until process is finished """
+        return self.submit(binary, cmd, _input, timeout, on_output).result()
+
+    def stream(
+        self,
+        binary: str,
+        cmd: List[str],
+        _input: Optional[bytes] = None,
+        timeout: Optional[float] = None
+    ) -> Generator[bytes, None, Tuple[Optional[int], bytes, bytes]]:
+        """
+        Yields blocks of stdout to calling thread while process is running and returns result as 'execute_sync'.
+        At most STREAM_QUEUE_SIZE blocks wait for slow consumer, then process is paused by full pipe.
+        Closing of generator kills process.
+        """
+        loop = self.__get_loop()
+        blocks = Queue()
+        free = asyncio.Semaphore(self.STREAM_QUEUE_SIZE)
+
+        async def put(block: bytes):
+            await free.acquire()
+            blocks.put(block)
+
+        future = asyncio.run_coroutine_threadsafe(self.__execute(binary, cmd, _input, timeout, put), loop)
+
+        # Blocks are put by runner before process is finished, so end of output is put after them
+        future.add_done_callback(lambda _: blocks.put(None))
+
+        try:
+            while (block := blocks.get()) is not None:
+                # Semaphore is used only by thread of loop
+                loop.call_soon_threadsafe(free.release)
+
+                yield block
+        finally:
+            future.cancel()
+
+        return future.result()
@@ -15,7 +15,7 @@ class Models:
             files = os.listdir(str(os.path.join(ROOT, namespace.replace('.', os.path.sep))))
 
             for model in files:
-                if not model.endswith('.py'):
+                if not model.endswith('.py') or model.startswith('__'):
                     continue
 
                 model = model[:-3]
@@ -0,0 +1,18 @@
+from enum import Enum
+
+
+class PrintJobStatus(Enum):
+    Queued = 'queued'
+    Converting = 'converting'
+    Printing = 'printing'
+    Done = 'done'
+    Failed = 'failed'
+    Cancelled = 'cancelled'
+
+    @staticmethod
+    def active() -> list:
+        return [PrintJobStatus.Queued, PrintJobStatus.Converting, PrintJobStatus.Printing]
+
+    @staticmethod
+    def cancellable() -> list:
+        return [PrintJobStatus.Queued, PrintJobStatus.Converting]
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class ScanJobStatus(Enum):
+    Queued = 'queued'
+    Scanning = 'scanning'
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Union
+
+
+class SpoolFile:
+    """
+    Temporary file for big binary value received by network. Value is written by parts as they arrive
+    and is never kept in memory.
+
+    Digest (sha256) of content is calculated while parts are written, so the file is not read to hash it.
+
+    File is removed by 'remove' unless it was moved to persistent place by 'save'.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+
+        fd, self.__path = tempfile.mkstemp(suffix='.spool', dir=directory)
+
+        self.__file = os.fdopen(fd, 'wb')
+        self.__size = 0
+        self.__saved = False
+        self.__digest = hashlib.sha256()
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def path(self) -> str:
+        return self.__path
+
+    def size(self) -> int:
+        return self.__size
+
+    def digest(self) -> str:
+        return self.__digest.hexdigest()
+
+    def write(self, data: Union[bytes, bytearray, memoryview]):
+        self.__digest.update(data)
+        self.__size += self.__file.write(data)
+
+    def close(self):
+        if not self.__file.closed:
+            self.__file.close()
+
+    def open(self) -> BinaryIO:
+        self.close()
+
+        return open(self.__path, 'rb')
+
+    def read(self) -> bytes:
+        with self.open() as file:
+            return file.read()
+
+    def save(self, path: str) -> str:
+        self.close()
+
+        # Spool directory and destination may be on different filesystems
+        shutil.move(self.__path, path)
+
+        self.__path = path
+        self.__saved = True
+
+        return path
+
+    def remove(self):
+        self.close()
+
+        if not self.__saved and os.path.exists(self.__path):
+            os.remove(self.__path)
@@ -11,6 +11,9 @@ from .DocumentOrder import DocumentOrder
 from .DocumentPagesUtil import DocumentPagesUtil
 from .MimeType import MimeType
 from .OfficeSuite import OfficeSuite
+from .SpoolFile import SpoolFile
+from .PrintJobStatus import PrintJobStatus
+from .ScanJobStatus import ScanJobStatus
 
 __all__ = {
     'DotPathAccessor',
@@ -26,4 +29,7 @@ __all__ = {
     'DocumentPagesUtil',
     'MimeType',
     'OfficeSuite',
+    'SpoolFile',
+    'PrintJobStatus',
+    'ScanJobStatus',
 }
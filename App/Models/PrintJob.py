@@ -0,0 +1,39 @@
+from App.Core.DB import Model
+from App.Core.DB.Columns import Auto, Varchar, Char, Enum, Timestamp
+from App.Core.Utils import PrintJobStatus
+
+
+class PrintJob(Model):
+    __tablename__ = 'print_jobs'
+
+    id = Auto(insert_default=None).col
+    status = Enum(PrintJobStatus, nullable=False, index=True, insert_default=PrintJobStatus.Queued).col
+    device = Varchar(255, nullable=False, insert_default=None).col
+
+    # Sha256 of document content
+    digest = Char(64, nullable=True, index=True, insert_default=None).col
+
+    # Printing parameters without document (json)
+    parameters = Varchar(4095, nullable=False, insert_default='{}').col
+
+    # Saved (converted) document
+    path = Varchar(1023, nullable=True, insert_default=None).col
+    message = Varchar(1023, nullable=True, insert_default=None).col
+
+    # Id of job in CUPS ('printer-123')
+    printer_job = Varchar(255, nullable=True, insert_default=None).col
+
+    created_at = Timestamp(insert_default=None).col
+    updated_at = Timestamp(insert_default=None).col
+
+    def to_dict(self) -> dict:
+        return {
+            "job": self.id,
+            "status": self.status.value,
+            "device": self.device,
+            "digest": self.digest,
+            "message": self.message,
+            "printer_job": self.printer_job,
+            "created_at": int(self.created_at.timestamp()) if self.created_at else None,
+            "updated_at": int(self.updated_at.timestamp()) if self.updated_at else None,
+        }
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from threading import Lock, get_ident
+from typing import Optional
+
+from App.Core import Config
+from App.Core.Logger import Log
+
+
+class ConversionCache:
+    """
+    Converted documents stored by content of source document.
+
+    Key of document is hash of source content, target format and convert tool, so the same form printed
+    again is not converted again. Documents are evicted in least recently used order when size of cache
+    is over 'conversion_cache_size' bytes.
+
+    Index (sizes and order of use) is stored in cache directory when document is added, so lookups do not
+    write to disk. Order of use changed by hits after last added document is lost on restart. Hit/miss
+    counters are kept in memory only.
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, log: Log, config: Config):
+        self.__log = log
+
+        self.__path = config.get('printing.conversion_cache_path')
+        self.__max_size = config.get('printing.conversion_cache_size')
+
+        self.__lock = Lock()
+
+        # Key => size. The least recently used document is first
+        self.__entries: OrderedDict = OrderedDict()
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+
+        self.__load()
+
+    @staticmethod
+    def key(digest: str, extension: str, tool: str) -> str:
+        """ Digest is sha256 of source document content (Filesystem.digest) """
+        key = hashlib.sha256(f"{digest}\x00{extension}\x00{tool}".encode()).hexdigest()
+
+        # Key is name of cached document
+        return f"{key}.{extension}"
+
+    def __file_path(self, key: str) -> str:
+        return os.path.join(self.__path, key)
+
+    def __load(self):
+        try:
+            with open(os.path.join(self.__path, self.INDEX_FILE)) as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        for key, size in index.get('entries', []):
+            # Documents removed outside of server are dropped from index
+            if os.path.exists(self.__file_path(key)):
+                self.__entries[key] = size
+                self.__size += size
+
+        # Size of cache may be decreased since last start
+        self.__evict()
+
+    def __store(self):
+        os.makedirs(self.__path, exist_ok=True)
+
+        path = os.path.join(self.__path, self.INDEX_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump({'entries': list(self.__entries.items())}, file)
+
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.__log.error(f"Cannot store conversion cache index. {str(e)}", {"object": self})
+
+    def __evict(self, keep: Optional[str] = None):
+        while self.__size > self.__max_size and self.__entries:
+            key, size = next(iter(self.__entries.items()))
+
+            # Just added document is returned to caller, so it is not evicted even if it is over budget
+            if key == keep:
+                break
+
+            del self.__entries[key]
+            self.__size -= size
+
+            try:
+                os.remove(self.__file_path(key))
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[str]:
+        with self.__lock:
+            if key not in self.__entries:
+                self.__misses += 1
+                return None
+
+            # Document removed outside of server
+            if not os.path.exists(self.__file_path(key)):
+                self.__size -= self.__entries.pop(key)
+                self.__misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+
+        return self.__file_path(key)
+
+    def put(self, key: str, path: str) -> str:
+        """ Moves converted document to cache. Returns path of cached document """
+        os.makedirs(self.__path, exist_ok=True)
+
+        cached = self.__file_path(key)
+
+        # Document is moved to temporary name, so other thread never reads half copied document
+        tmp_path = f"{cached}.{os.getpid()}.{get_ident()}.tmp"
+        shutil.move(path, tmp_path)
+        os.replace(tmp_path, cached)
+
+        with self.__lock:
+            self.__size -= self.__entries.pop(key, 0)
+
+            self.__entries[key] = os.path.getsize(cached)
+            self.__size += self.__entries[key]
+
+            self.__evict(key)
+            self.__store()
+
+        return cached
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'documents': len(self.__entries),
+                'size': self.__size,
+                'max_size': self.__max_size,
+            }
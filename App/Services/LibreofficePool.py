@@ -0,0 +1,86 @@
+import atexit
+import os
+from queue import Queue
+from threading import Lock
+from typing import List, Optional
+
+from App.Core import Config, Platform
+from App.Core.Logger import Log
+from App.Subprocesses.LibreofficeDaemon import LibreofficeDaemon
+from App.Subprocesses.LibreofficePdfConvert import LibreofficePdfConvert
+
+
+class LibreofficePool:
+    """
+    Pool of warm headless LibreOffice daemons converting documents to pdf.
+
+    Starting of soffice takes seconds, so daemons are started once and receive conversions through UNO.
+    Conversion takes free daemon and waits if all daemons are busy. Daemon is restarted after
+    'libreoffice_max_conversions' conversions or failed conversion.
+
+    Pool is not available without LibreOffice python bindings (uno), documents are converted by
+    separate soffice process in that case.
+    """
+
+    def __init__(self, log: Log, config: Config, platform: Platform):
+        self.__log = log
+
+        self.__size = config.get('printing.libreoffice_pool_size')
+        self.__port = config.get('printing.libreoffice_pool_port')
+        self.__profiles_path = config.get('printing.libreoffice_profiles_path')
+        self.__start_timeout = config.get('printing.libreoffice_start_timeout')
+        self.__max_conversions = config.get('printing.libreoffice_max_conversions')
+
+        self.__binary = LibreofficePdfConvert(log, config, platform).binary()
+
+        self.__daemons: List[LibreofficeDaemon] = []
+        self.__idle: Queue = Queue()
+        self.__lock = Lock()
+
+        atexit.register(self.stop)
+
+    def available(self) -> bool:
+        return bool(self.__size) and self.__binary is not None and LibreofficeDaemon.supported()
+
+    def size(self) -> int:
+        return self.__size
+
+    def start(self):
+        """ Starts daemons, so first conversions do not wait for LibreOffice start """
+        with self.__lock:
+            if self.__daemons:
+                return
+
+            for i in range(self.__size):
+                daemon = LibreofficeDaemon(
+                    self.__log,
+                    self.__binary,
+                    os.path.join(self.__profiles_path, str(i)),
+                    self.__port + i,
+                    self.__start_timeout,
+                )
+
+                daemon.start()
+
+                self.__daemons.append(daemon)
+                self.__idle.put(daemon)
+
+    def stop(self):
+        with self.__lock:
+            for daemon in self.__daemons:
+                daemon.stop()
+
+    def convert_to_pdf(self, path_from: str, path_to: str) -> Optional[str]:
+        self.start()
+
+        daemon: LibreofficeDaemon = self.__idle.get()
+
+        try:
+            ok = daemon.convert_to_pdf(path_from, path_to)
+
+            if self.__max_conversions and daemon.conversions() >= self.__max_conversions:
+                daemon.stop()
+        finally:
+            self.__idle.put(daemon)
+
+        return path_to if ok else None
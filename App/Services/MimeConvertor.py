@@ -1,16 +1,17 @@
-import hashlib
 import os
 from enum import Enum
-from typing import List, Optional, Union
+from typing import Callable, List, Optional, Union
 
 import img2pdf
 import docx2pdf
 
+from App import Application
 from App.Core import Filesystem, Config, MimeTypeConfig, Platform
 from App.Core.Logger import Log
 from App.Core.Utils import MimeType, OfficeSuite
 from App.Subprocesses.LibreofficePdfConvert import LibreofficePdfConvert
 from App.Subprocesses.AsposeConvert import AsposeConvert
+from App.Services.ConversionCache import ConversionCache
 
 
 class MimeConvertor:
@@ -20,6 +21,9 @@ class MimeConvertor:
         OfficeSuite.ASPOSE_LIBRAY.value: "Aspose (Restricted)"
     }
 
+    # Name of images convertor in key of conversion cache
+    IMAGE_CONVERT_TOOL = "img2pdf"
+
     def __init__(self, log: Log, _config: Config, mime: MimeTypeConfig, platform: Platform):
         self.__mime_type = mime
 
@@ -49,52 +53,63 @@ class MimeConvertor:
     def suites_values(none: bool = True) -> List[str]:
         return list(map(lambda x: x.value, MimeConvertor.suites(none)))
 
-    @staticmethod
-    def __get_unique_filename(path: str) -> str:
-        _hash = str(hashlib.md5((f := open(path, 'rb')).read()).hexdigest())
-        f.close()
+    def __convert_cached(
+        self,
+        path_from: str,
+        extension: str,
+        tool: str,
+        digest: Optional[str],
+        convert: Callable[[str], Optional[str]]
+    ) -> Optional[str]:
+        """
+        Convert function gets path for converted document and returns path of converted document.
+        Digest of source document is calculated by caller while document is received, file is hashed otherwise.
+        """
+        digest = digest or Filesystem.digest(path_from)
 
-        return _hash
+        if not self.__use_cached_docs:
+            return convert(Filesystem.create_tmp_path(f"{digest}.{extension}"))
 
-    def __get_unique_filepath(self, path_from: str, extension: str) -> str:
-        return Filesystem.create_tmp_path(self.__get_unique_filename(path_from) + f".{extension}")
+        cache: ConversionCache = Application().get('conversion.cache')
 
-    def __exists_path(self, path: str) -> bool:
-        if not self.__use_cached_docs:
-            return False
+        key = cache.key(digest, extension, tool)
 
-        return os.path.exists(path)
+        if cached := cache.get(key):
+            return cached
 
-    def __get_converted_image_to_pdf(self, path_from: str) -> Optional[str]:
-        path_to = self.__get_unique_filepath(path_from, MimeType.mime_extension(MimeType.PDF))
+        if not (path_to := convert(Filesystem.create_tmp_path(key))):
+            return None
 
-        if not self.__exists_path(path_to):
-            if not Filesystem.write_file(path_to, img2pdf.convert(path_from)):
-                return None
+        return cache.put(key, path_to)
 
-        return path_to
+    def __get_converted_image_to_pdf(self, path_from: str, digest: Optional[str]) -> Optional[str]:
+        def convert(path_to: str) -> Optional[str]:
+            return path_to if Filesystem.write_file(path_to, img2pdf.convert(path_from)) else None
 
-    def __get_converted_doc_by_aspose(self, path_from: str, extension: str) -> Optional[str]:
-        path_to = self.__get_unique_filepath(path_from, extension)
+        extension = MimeType.mime_extension(MimeType.PDF)
 
-        if not self.__exists_path(path_to):
-            if not self.__aspose_convertor.convert(path_from, path_to):
-                return None
+        return self.__convert_cached(path_from, extension, self.IMAGE_CONVERT_TOOL, digest, convert)
 
-        return path_to
+    def __get_converted_doc_by_aspose(self, path_from: str, extension: str, digest: Optional[str]) -> Optional[str]:
+        def convert(path_to: str) -> Optional[str]:
+            return path_to if self.__aspose_convertor.convert(path_from, path_to) else None
 
-    def __get_converted_doc_by_libreoffice(self, path_from: str, extension: str) -> Optional[str]:
-        path_to = Filesystem.create_tmp_path(path_from.split('/')[-1].split('.')[0] + f".{extension}")
+        return self.__convert_cached(path_from, extension, OfficeSuite.ASPOSE_LIBRAY.value, digest, convert)
 
-        if not self.__exists_path(path_to):
-            return self.__libreoffice_convert.docx_convert(path_from, Filesystem.get_tmp_path(), extension)
+    def __get_converted_doc_by_libreoffice(self, path_from: str, extension: str, digest: Optional[str]) -> Optional[str]:
+        def convert(path_to: str) -> Optional[str]:
+            pool = Application().get('libreoffice.pool')
 
-        return path_to
+            # Warm daemons convert without starting soffice for each document
+            if extension == MimeType.mime_extension(MimeType.PDF) and pool.available():
+                return pool.convert_to_pdf(path_from, path_to)
+
+            return self.__libreoffice_convert.docx_convert(path_from, Filesystem.get_tmp_path(), extension)
 
-    def __get_converted_doc_by_msword(self, path_from: str, extension: str) -> Optional[str]:
-        path_to = self.__get_unique_filepath(path_from, extension)
+        return self.__convert_cached(path_from, extension, OfficeSuite.LIBREOFFICE.value, digest, convert)
 
-        if not self.__exists_path(path_to):
+    def __get_converted_doc_by_msword(self, path_from: str, extension: str, digest: Optional[str]) -> Optional[str]:
+        def convert(path_to: str) -> Optional[str]:
             try:
                 docx2pdf.convert(path_from, path_to)
             except BaseException as e:
@@ -103,26 +118,39 @@ class MimeConvertor:
 
             return None if not os.path.exists(path_to) else path_to
 
-        return path_to
+        return self.__convert_cached(path_from, extension, OfficeSuite.MSWORD.value, digest, convert)
 
-    def __get_converted_doc(self, path_from: str, extension: str, suite: OfficeSuite) -> Optional[str]:
+    def __get_converted_doc(
+        self,
+        path_from: str,
+        extension: str,
+        suite: OfficeSuite,
+        digest: Optional[str]
+    ) -> Optional[str]:
         if suite == OfficeSuite.ASPOSE_LIBRAY:
-            return self.__get_converted_doc_by_aspose(path_from, extension)
+            return self.__get_converted_doc_by_aspose(path_from, extension, digest)
 
         if suite == OfficeSuite.MSWORD:
-            return self.__get_converted_doc_by_msword(path_from, extension)
+            return self.__get_converted_doc_by_msword(path_from, extension, digest)
 
         if suite == OfficeSuite.LIBREOFFICE:
-            return self.__get_converted_doc_by_libreoffice(path_from, extension)
+            return self.__get_converted_doc_by_libreoffice(path_from, extension, digest)
 
         return None
 
-    def convert_to_pdf(self, path: str, mime_type: MimeType, suite: OfficeSuite) -> Optional[str]:
+    def convert_to_pdf(
+        self,
+        path: str,
+        mime_type: MimeType,
+        suite: OfficeSuite,
+        digest: Optional[str] = None
+    ) -> Optional[str]:
+        """ Digest is sha256 of document content if it is known already """
         if mime_type in MimeType.doc_group():
-            return self.__get_converted_doc(path, MimeType.mime_extension(MimeType.PDF), suite)
+            return self.__get_converted_doc(path, MimeType.mime_extension(MimeType.PDF), suite, digest)
 
         if mime_type in MimeType.image_group():
-            return self.__get_converted_image_to_pdf(path)
+            return self.__get_converted_image_to_pdf(path, digest)
 
     def get_pdf(self, path: str, suite: OfficeSuite = OfficeSuite.NONE) -> Optional[str]:
         mime_type = self.__mime_type.get_mime_enum(path)
@@ -0,0 +1,74 @@
+import hashlib
+import json
+from concurrent.futures import Future
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, Tuple
+
+from App.Core import Config
+
+
+class PrintDeduplicator:
+    """
+    Suppresses printing of the same document with the same parameters received again within
+    'dedupe_window' seconds (client retries request on timeout).
+
+    Repeated request waits for printing in progress and gets its result, or gets result of finished
+    printing at once. Failed printing is not kept, so it is printed again by next request.
+    """
+
+    def __init__(self, config: Config):
+        self.__window = config.get('printing.dedupe_window')
+
+        self.__lock = Lock()
+        self.__entries: Dict[str, Tuple[float, Future]] = {}
+
+    @staticmethod
+    def key(parameters: dict, skip: Tuple[str, ...] = ('file',)) -> str:
+        """ Parameters must contain digest of document instead of document itself """
+        data = {key: value for key, value in parameters.items() if key not in skip}
+
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+    def __expire(self, now: float):
+        expired = [
+            key for key, (time, future) in self.__entries.items() if future.done() and now - time > self.__window
+        ]
+
+        for key in expired:
+            del self.__entries[key]
+
+    def run(self, key: str, _print: Callable[[], Tuple[bool, str]]) -> Tuple[bool, str]:
+        if not self.__window:
+            return _print()
+
+        with self.__lock:
+            now = monotonic()
+
+            self.__expire(now)
+
+            if entry := self.__entries.get(key):
+                _, future = entry
+            else:
+                self.__entries[key] = (now, future := Future())
+
+        # The same printing is in progress or is finished in window
+        if entry:
+            return future.result()
+
+        try:
+            result = _print()
+        except BaseException as e:
+            with self.__lock:
+                self.__entries.pop(key, None)
+
+            future.set_exception(e)
+            raise
+
+        if not result[0]:
+            with self.__lock:
+                self.__entries.pop(key, None)
+
+        future.set_result(result)
+
+        return result
@@ -0,0 +1,204 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Optional, Tuple, Union, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from App.Core import Config, MimeTypeConfig, Platform
+from App.Core.DB import Connection
+from App.Core.Logger import Log
+from App.Core.Utils import PrintJobStatus
+from App.Models.PrintJob import PrintJob
+from App.Subprocesses import PrintingSubprocess
+
+
+class PrintQueue:
+    """
+    Print jobs handled in background.
+
+    Document is saved and job is stored to 'print_jobs' table, then client gets id of job at once.
+    Conversion and sending to printer are done by queue workers, client asks status of job by its id.
+
+    On start jobs queued before server stop are pushed to workers again, jobs interrupted while
+    converting or printing are marked as failed.
+
+    The same document with the same parameters pushed again within 'dedupe_window' seconds is not
+    printed again, job created by first request is returned (failed and cancelled jobs are not reused).
+    """
+
+    DOCUMENT_PARAMETER = 'file'
+
+    def __init__(self, log: Log, config: Config, db: Connection, mime: MimeTypeConfig, platform: Platform):
+        self.__log = log
+        self.__config = config
+        self.__mime = mime
+        self.__platform = platform
+        self.__dedupe_window = config.get('printing.dedupe_window')
+
+        # Session of db connection is shared by handlers threads, so queue opens own session for each operation
+        self.__engine = db.driver().engine()
+        self.__lock = Lock()
+
+        self.__executor = ThreadPoolExecutor(config.get('printing.queue_workers'), 'print-queue')
+
+        self.__restore()
+
+    def __subprocess(self) -> PrintingSubprocess:
+        return PrintingSubprocess(self.__log, self.__config, self.__mime, self.__platform)
+
+    def __session(self) -> Session:
+        return Session(self.__engine, expire_on_commit=False)
+
+    def __get(self, job_id: int) -> Optional[PrintJob]:
+        with self.__session() as session:
+            return session.get(PrintJob, job_id)
+
+    def __update(self, job_id: int, statuses: Optional[List[PrintJobStatus]] = None, **values) -> bool:
+        """ Updates job if it is in one of statuses. Returns False if status of job has been changed before """
+        with self.__lock, self.__session() as session:
+            job = session.get(PrintJob, job_id)
+
+            if job is None or (statuses is not None and job.status not in statuses):
+                return False
+
+            for key, value in values.items():
+                setattr(job, key, value)
+
+            job.updated_at = datetime.now()
+
+            session.commit()
+
+        return True
+
+    def __restore(self):
+        with self.__lock, self.__session() as session:
+            jobs = session.scalars(select(PrintJob).where(PrintJob.status.in_(PrintJobStatus.active()))).all()
+
+            for job in jobs:
+                if job.status != PrintJobStatus.Queued:
+                    job.status = PrintJobStatus.Failed
+                    job.message = "Job has been interrupted by server stop"
+                    job.updated_at = datetime.now()
+
+            session.commit()
+
+        for job in jobs:
+            if job.status == PrintJobStatus.Queued:
+                self.__executor.submit(self.__run, job.id)
+
+    def __run(self, job_id: int):
+        try:
+            self.__process(job_id)
+        except Exception as e:
+            self.__log.error(f"Print job {job_id} failed. {str(e)}", {"object": self})
+
+            self.__update(job_id, None, status=PrintJobStatus.Failed, message=str(e))
+
+    def __process(self, job_id: int):
+        job = self.__get(job_id)
+
+        # Job has been cancelled while it was waiting in queue
+        if job is None or not self.__update(job_id, [PrintJobStatus.Queued], status=PrintJobStatus.Converting):
+            return
+
+        parameters = json.loads(job.parameters)
+
+        subprocess = self.__subprocess()
+
+        ok, res = subprocess.convert_document(job.path, parameters)
+
+        if not ok:
+            self.__update(job_id, None, status=PrintJobStatus.Failed, message=res)
+            return
+
+        # Job has been cancelled while document was converting
+        if not self.__update(job_id, [PrintJobStatus.Converting], status=PrintJobStatus.Printing, path=res):
+            return
+
+        ok, message = subprocess.print_document(res, parameters)
+
+        if not ok:
+            self.__update(job_id, None, status=PrintJobStatus.Failed, message=message)
+            return
+
+        self.__update(job_id, None, status=PrintJobStatus.Done, printer_job=message)
+
+    def __find_duplicate(self, session: Session, digest: str, parameters: str) -> Optional[PrintJob]:
+        if not self.__dedupe_window:
+            return None
+
+        query = select(PrintJob).where(
+            PrintJob.digest == digest,
+            PrintJob.parameters == parameters,
+            PrintJob.created_at >= datetime.now() - timedelta(seconds=self.__dedupe_window),
+            PrintJob.status.not_in([PrintJobStatus.Failed, PrintJobStatus.Cancelled]),
+        )
+
+        return session.scalars(query.order_by(PrintJob.id.desc()).limit(1)).first()
+
+    def push(self, parameters: dict) -> Tuple[bool, Union[dict, str]]:
+        """ Returns created job (or job of the same document pushed before) or error message """
+        digest = PrintingSubprocess.document_digest(parameters)
+
+        data = {key: value for key, value in parameters.items() if key != self.DOCUMENT_PARAMETER}
+        data = json.dumps(data, sort_keys=True)
+
+        with self.__lock, self.__session() as session:
+            if duplicate := self.__find_duplicate(session, digest, data):
+                return True, duplicate.to_dict()
+
+        ok, path = self.__subprocess().save_document(parameters)
+
+        if not ok:
+            return False, path
+
+        now = datetime.now()
+
+        with self.__lock, self.__session() as session:
+            # Document is saved without lock, so the same document may be pushed by other request meanwhile.
+            # Check and insert are done under one lock, only one of concurrent requests creates job
+            if duplicate := self.__find_duplicate(session, digest, data):
+                os.remove(path)
+
+                return True, duplicate.to_dict()
+
+            job = PrintJob(
+                device=parameters.get('device'),
+                digest=digest,
+                parameters=data,
+                path=path,
+                created_at=now,
+                updated_at=now,
+            )
+
+            session.add(job)
+            session.commit()
+
+        self.__executor.submit(self.__run, job.id)
+
+        return True, job.to_dict()
+
+    def status(self, job_id: int) -> Optional[dict]:
+        job = self.__get(job_id)
+
+        return job.to_dict() if job else None
+
+    def active(self) -> List[dict]:
+        with self.__session() as session:
+            query = select(PrintJob).where(PrintJob.status.in_(PrintJobStatus.active())).order_by(PrintJob.id)
+
+            return [job.to_dict() for job in session.scalars(query)]
+
+    def cancel(self, job_id: int) -> Tuple[bool, Optional[str]]:
+        """ Job can be cancelled before document is sent to printer """
+        if self.__update(job_id, PrintJobStatus.cancellable(), status=PrintJobStatus.Cancelled):
+            return True, None
+
+        if not (job := self.__get(job_id)):
+            return False, f"Print job {job_id} not found"
+
+        return False, f"Print job {job_id} cannot be cancelled in status '{job.status.value}'"
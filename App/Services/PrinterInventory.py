@@ -0,0 +1,90 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import monotonic
+from typing import List, Optional
+
+from App.Core import Config
+from App.Core.Cache import CacheManager
+from App.Core.Console import Output
+from App.Core.Logger import Log
+from App.Services.PrinterService import PrinterService
+
+
+class PrinterInventory:
+    """
+    List of printers refreshed in background.
+
+    Listing of devices (lpinfo) probes network and may take tens of seconds, so request gets last known
+    list at once and list older than 'devices_ttl' seconds is refreshed in background. Refreshes requested
+    while other refresh is running wait for it, so lpstat and lpinfo are never run concurrently.
+
+    Client waits for refresh only if list has never been fetched or update of list is forced.
+    """
+
+    def __init__(self, cache: CacheManager, log: Log, config: Config, console: Output):
+        self.__log = log
+        self.__cache = cache
+        self.__service = PrinterService(cache, log, config, console)
+
+        self.__ttl = config.get('printing.devices_ttl')
+        self.__use_cache_devices = config.get('printing.use_cached_devices')
+        self.__debug = config.get('printing.debug')
+
+        self.__lock = Lock()
+        self.__executor = ThreadPoolExecutor(1, 'printers-refresh')
+        self.__refreshing: Optional[Future] = None
+
+        self.__printers: Optional[List[dict]] = None
+        self.__updated_at: Optional[float] = None
+
+        # List saved by previous start is served until first refresh is finished
+        if self.__use_cache_devices and cache.has(PrinterService.CACHE_PRINTER_DATA):
+            self.__printers = cache.get(PrinterService.CACHE_PRINTER_DATA)
+
+    def __stale(self) -> bool:
+        return self.__updated_at is None or monotonic() - self.__updated_at > self.__ttl
+
+    def __fetch(self):
+        try:
+            printers = self.__service.fetch_printers()
+        except Exception as e:
+            self.__log.error(f"Cannot refresh printers list. {str(e)}", {"object": self})
+            printers = None
+
+        with self.__lock:
+            # Last known list is kept if refresh failed, so next request tries again
+            if printers is not None:
+                self.__printers = printers
+                self.__updated_at = monotonic()
+
+                if self.__use_cache_devices:
+                    self.__cache.set(PrinterService.CACHE_PRINTER_DATA, printers)
+
+            self.__refreshing = None
+
+    def refresh(self) -> Future:
+        """ Starts refresh of list or returns refresh in progress """
+        with self.__lock:
+            if self.__refreshing is None:
+                self.__refreshing = self.__executor.submit(self.__fetch)
+
+            return self.__refreshing
+
+    def get(self, force: bool = False) -> List[dict]:
+        if self.__debug:
+            return self.__service.get_printers()
+
+        with self.__lock:
+            printers = self.__printers
+            stale = self.__stale()
+
+        if force or printers is None:
+            self.refresh().result()
+
+            with self.__lock:
+                return self.__printers or []
+
+        if stale:
+            self.refresh()
+
+        return printers
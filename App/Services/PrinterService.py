@@ -1,7 +1,7 @@
 import os
 import re
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
 from App.Core import Config, Filesystem
 from App.Core.Cache import CacheManager
@@ -104,18 +104,25 @@ class PrinterService:
 
         return PrinterService.REGEX_SPACES.sub(" ", name)
 
-    def update_printers_cache(self) -> bool:
+    def fetch_printers(self) -> Optional[List[dict]]:
+        """ Runs lpstat and lpinfo (lpinfo probes network and may take tens of seconds) """
         ok, devices = LpstatSubprocess(self._logger, self._config).get_printers_list()
 
         if not ok:
-            return False
+            return None
 
         ok, dev = LpinfoSubprocess(self._logger, self._config).get_direct_devices()
 
         if not ok:
+            return None
+
+        return list(map(lambda x: self.__create_device_object(x, dev), devices))
+
+    def update_printers_cache(self) -> bool:
+        if (printers := self.fetch_printers()) is None:
             return False
 
-        self._cache.set(self.CACHE_PRINTER_DATA, list(map(lambda x: self.__create_device_object(x, dev), devices)))
+        self._cache.set(self.CACHE_PRINTER_DATA, printers)
 
         return True
 
@@ -0,0 +1,198 @@
+import atexit
+import io
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from threading import Lock
+from typing import Optional
+
+from PIL import Image
+
+from App.Core import Config
+
+
+class ScanPostProcessor:
+    """
+    Processing of scanned images on server: downscale, format conversion, compression and blank page detection.
+
+    Images are processed by pool of 'postprocess_workers' processes, so processing of big scans does not hold
+    GIL of server threads. Workers are not forked from multithreaded server, they are started by fork server
+    (or spawned where fork server is not available). Processing is requested by scan parameters (PARAMETERS), they are removed from
+    parameters of scanimage. Image is not encoded again if it is not changed.
+    """
+
+    PARAMETER_MAX_WIDTH = 'max-width'
+    PARAMETER_MAX_HEIGHT = 'max-height'
+    PARAMETER_OUTPUT_FORMAT = 'output-format'
+    PARAMETER_QUALITY = 'quality'
+    PARAMETER_OPTIMIZE = 'optimize'
+    PARAMETER_SKIP_BLANK = 'skip-blank'
+
+    PARAMETERS = [
+        PARAMETER_MAX_WIDTH,
+        PARAMETER_MAX_HEIGHT,
+        PARAMETER_OUTPUT_FORMAT,
+        PARAMETER_QUALITY,
+        PARAMETER_OPTIMIZE,
+        PARAMETER_SKIP_BLANK,
+    ]
+
+    JPEG_QUALITY = 85
+
+    # Pillow does not recommend JPEG quality above 95
+    QUALITY_MIN = 1
+    QUALITY_MAX = 95
+
+    # Blank page is checked on reduced gray copy without margins (shadows of scanner lid)
+    BLANK_SAMPLE_SIZE = 1024
+    BLANK_MARGIN = 0.03
+    BLANK_DARK_LEVEL = 192
+
+    def __init__(self, config: Config):
+        self.__workers = config.get('scan.postprocess_workers')
+        self.__blank_page_ink = config.get('scan.blank_page_ink')
+
+        self.__pool: Optional[ProcessPoolExecutor] = None
+        self.__lock = Lock()
+
+        atexit.register(self.stop)
+
+    @staticmethod
+    def __set(value) -> bool:
+        """ Flags sent as false are the same as not sent """
+        return value is not None and value is not False
+
+    def options(self, parameters: dict) -> Optional[dict]:
+        """ Removes processing parameters from scan parameters. Returns None if processing is not requested """
+        options = {key: parameters.pop(key) for key in self.PARAMETERS if key in parameters}
+        options = {key: value for key, value in options.items() if self.__set(value)}
+
+        return {**options, 'blank_page_ink': self.__blank_page_ink} if options else None
+
+    def check(self, parameters: dict) -> Optional[str]:
+        """ Returns error message if processing parameters are not valid """
+        quality = parameters.get(self.PARAMETER_QUALITY)
+
+        if quality is not None and not self.QUALITY_MIN <= quality <= self.QUALITY_MAX:
+            return f"Quality must be from {self.QUALITY_MIN} to {self.QUALITY_MAX}, '{quality}' given"
+
+        return None
+
+    def requested(self, parameters: dict) -> bool:
+        return any(self.__set(parameters.get(key)) for key in self.PARAMETERS)
+
+    @staticmethod
+    def __context():
+        if 'forkserver' not in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context('spawn')
+
+        context = multiprocessing.get_context('forkserver')
+
+        # Workers need only this module, server script is not imported by fork server
+        context.set_forkserver_preload([__name__])
+
+        return context
+
+    def __get_pool(self) -> ProcessPoolExecutor:
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = ProcessPoolExecutor(self.__workers, mp_context=self.__context())
+
+            return self.__pool
+
+    def start(self):
+        """ Starts workers before first scan, so first processing does not wait for them """
+        self.__get_pool().submit(int)
+
+    def stop(self):
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.shutdown(cancel_futures=True)
+
+            self.__pool = None
+
+    def submit(self, image: bytes, options: dict) -> Future:
+        """ Result of future is processed image or None if page is blank """
+        return self.__get_pool().submit(ScanPostProcessor.transform, image, options)
+
+    def process(self, image: bytes, options: dict) -> Optional[bytes]:
+        return self.submit(image, options).result()
+
+    @staticmethod
+    def blank(picture: Image.Image, ink: int) -> bool:
+        """ Page is blank if less than 'ink' of 10000 pixels are dark """
+        gray = picture.convert('L')
+        gray.thumbnail((ScanPostProcessor.BLANK_SAMPLE_SIZE, ScanPostProcessor.BLANK_SAMPLE_SIZE))
+
+        x = int(gray.width * ScanPostProcessor.BLANK_MARGIN)
+        y = int(gray.height * ScanPostProcessor.BLANK_MARGIN)
+
+        gray = gray.crop((x, y, gray.width - x, gray.height - y))
+
+        dark = sum(gray.histogram()[:ScanPostProcessor.BLANK_DARK_LEVEL])
+
+        return dark * 10000 < ink * gray.width * gray.height
+
+    @staticmethod
+    def __save_options(picture: Image.Image, _format: str, options: dict) -> dict:
+        optimize = options.get(ScanPostProcessor.PARAMETER_OPTIMIZE) or False
+
+        save_options = {'dpi': picture.info['dpi']} if 'dpi' in picture.info else {}
+
+        if _format == 'JPEG':
+            return {
+                **save_options,
+                'quality': options.get(ScanPostProcessor.PARAMETER_QUALITY, ScanPostProcessor.JPEG_QUALITY),
+                'optimize': optimize,
+                'progressive': optimize,
+            }
+
+        if _format == 'PNG':
+            return {**save_options, 'optimize': optimize}
+
+        if _format == 'TIFF' and optimize:
+            return {**save_options, 'compression': 'group4' if picture.mode == '1' else 'tiff_deflate'}
+
+        return save_options
+
+    @staticmethod
+    def transform(image: bytes, options: dict) -> Optional[bytes]:
+        """ Runs in worker process """
+        with Image.open(io.BytesIO(image)) as picture:
+            picture.load()
+
+            if options.get(ScanPostProcessor.PARAMETER_SKIP_BLANK) and ScanPostProcessor.blank(
+                picture, options['blank_page_ink']
+            ):
+                return None
+
+            source_format = picture.format
+            _format = (options.get(ScanPostProcessor.PARAMETER_OUTPUT_FORMAT) or source_format).upper()
+
+            max_width = options.get(ScanPostProcessor.PARAMETER_MAX_WIDTH) or picture.width
+            max_height = options.get(ScanPostProcessor.PARAMETER_MAX_HEIGHT) or picture.height
+
+            resized = picture.width > max_width or picture.height > max_height
+
+            changed = (
+                resized
+                or _format != source_format
+                or options.get(ScanPostProcessor.PARAMETER_QUALITY) is not None
+                or bool(options.get(ScanPostProcessor.PARAMETER_OPTIMIZE))
+            )
+
+            if not changed:
+                return image
+
+            save_options = ScanPostProcessor.__save_options(picture, _format, options)
+
+            if resized:
+                picture.thumbnail((max_width, max_height), Image.LANCZOS)
+
+            # JPEG has no lineart, palette and alpha channel
+            if _format == 'JPEG' and picture.mode not in ('L', 'RGB', 'CMYK'):
+                picture = picture.convert('L' if picture.mode in ('1', 'I', 'I;16') else 'RGB')
+
+            output = io.BytesIO()
+            picture.save(output, _format, **save_options)
+
+            return output.getvalue()
@@ -0,0 +1,169 @@
+import itertools
+from datetime import datetime
+from threading import Lock
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from App import Application
+from App.Core import Config
+from App.Core.Logger import Log
+from App.Core.Utils import ScanJobStatus
+from App.Services.ScanPostProcessor import ScanPostProcessor
+from App.Subprocesses.ScanImage import ScanImage
+
+
+class ScanQueue:
+    """
+    Scan jobs waiting for scanner.
+
+    Scanner scans one document at a time, so jobs of the same device are run one by one. Jobs of
+    different devices are run at the same time. Every job scans to own file.
+
+    Scan is returned to client by request which pushed job, so only not finished jobs are kept.
+
+    Processing of scan (ScanPostProcessor) is done after scanner is released, so next job does not wait for it.
+    Pages of batch are processed one by one while feeder is scanning.
+    """
+
+    DEFAULT_DEVICE = ''
+
+    def __init__(self, log: Log, config: Config):
+        self.__log = log
+        self.__config = config
+
+        self.__lock = Lock()
+        self.__ids = itertools.count(1)
+
+        self.__devices: Dict[str, Lock] = {}
+        self.__jobs: Dict[int, dict] = {}
+
+    def __device_lock(self, device: str) -> Lock:
+        with self.__lock:
+            if device not in self.__devices:
+                self.__devices[device] = Lock()
+
+            return self.__devices[device]
+
+    def __push(self, device: str) -> dict:
+        with self.__lock:
+            job = {
+                'job': next(self.__ids),
+                'device': device,
+                'status': ScanJobStatus.Queued.value,
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+            }
+
+            self.__jobs[job['job']] = job
+
+        return job
+
+    def __set_status(self, job_id: int, status: ScanJobStatus, **values):
+        with self.__lock:
+            self.__jobs[job_id].update(status=status.value, **values)
+
+    def __remove(self, job_id: int):
+        with self.__lock:
+            self.__jobs.pop(job_id, None)
+
+    def __start(self, job: dict, device: str):
+        self.__set_status(job['job'], ScanJobStatus.Scanning, started_at=datetime.now().isoformat())
+
+        self.__log.debug(f"Scan job {job['job']} started ({device or 'default device'})", {"object": self})
+
+    @staticmethod
+    def __postprocessor() -> ScanPostProcessor:
+        return Application().get('scan.postprocessor')
+
+    def __scan(self, parameters: dict) -> Tuple[bool, Union[str, bytes]]:
+        device = parameters.get('device') or self.DEFAULT_DEVICE
+
+        job = self.__push(device)
+
+        try:
+            with self.__device_lock(device):
+                self.__start(job, device)
+
+                return ScanImage(self.__log, self.__config).scan(parameters)
+        finally:
+            self.__remove(job['job'])
+
+    def check(self, parameters: dict) -> Optional[str]:
+        """ Returns error message if scan parameters are not valid """
+        return self.__postprocessor().check(parameters)
+
+    def scan(self, parameters: dict) -> Tuple[bool, Union[str, bytes]]:
+        """ Waits for scanner of job and returns scanned document or error message """
+        options = self.__postprocessor().options(parameters)
+
+        ok, res = self.__scan(parameters)
+
+        if not ok or options is None:
+            return ok, res
+
+        try:
+            res = self.__postprocessor().process(res, options)
+        except Exception as e:
+            self.__log.error(message := f"Cannot process scanned image. {str(e)}", {"object": self})
+            return False, message
+
+        if res is None:
+            return False, "Scanned page is blank"
+
+        return True, res
+
+    def __scan_processed(self, parameters: dict) -> Iterator[bytes]:
+        ok, res = self.scan(parameters)
+
+        if not ok:
+            raise Exception(res)
+
+        yield res
+
+    def __scan_blocks(self, parameters: dict, scan: Callable[[ScanImage], Iterator[bytes]]) -> Iterator[bytes]:
+        """
+        Scanner is kept by job until last block is taken (or generator is closed), so next job is waiting
+        while client receives document.
+        """
+        device = parameters.get('device') or self.DEFAULT_DEVICE
+
+        job = self.__push(device)
+
+        try:
+            with self.__device_lock(device):
+                self.__start(job, device)
+
+                yield from scan(ScanImage(self.__log, self.__config))
+        finally:
+            self.__remove(job['job'])
+
+    def scan_stream(self, parameters: dict) -> Iterator[bytes]:
+        """
+        Waits for scanner of job and yields scanned document by blocks. Processed image needs whole scan,
+        so it is yielded at once
+        """
+        if self.__postprocessor().requested(parameters):
+            return self.__scan_processed(parameters)
+
+        # Processing flags sent as false are removed, they are not parameters of scanimage
+        self.__postprocessor().options(parameters)
+
+        return self.__scan_blocks(parameters, lambda scanimage: scanimage.scan_stream(parameters))
+
+    def scan_batch(self, parameters: dict, pdf: bool = False) -> Iterator[bytes]:
+        """ Waits for scanner of job and yields pages of document feeder (see ScanImage.scan_batch) """
+        process = None
+
+        if (options := self.__postprocessor().options(parameters)) is not None:
+            def process(image: bytes) -> Optional[bytes]:
+                return self.__postprocessor().process(image, options)
+
+        return self.__scan_blocks(parameters, lambda scanimage: scanimage.scan_batch(parameters, pdf, process))
+
+    def jobs(self, device: Optional[str] = None) -> List[dict]:
+        with self.__lock:
+            jobs = [dict(job) for job in self.__jobs.values()]
+
+        if device is not None:
+            jobs = [job for job in jobs if job['device'] == device]
+
+        return sorted(jobs, key=lambda job: job['job'])
@@ -0,0 +1,127 @@
+import atexit
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Event, Lock, Thread
+from time import monotonic, time
+from typing import List, Optional
+
+from App.Core import Config
+from App.Core.Cache import CacheManager
+from App.Core.Logger import Log
+from App.Subprocesses.ScanImage import ScanImage
+
+
+class ScannerInventory:
+    """
+    List of scanners probed in background.
+
+    SANE discovery takes seconds, so 'scan devices' gets list from memory at once. List is probed every
+    'devices_interval' seconds by background thread and list older than 'devices_ttl' seconds is refreshed
+    by request in background. Probes requested while other probe is running wait for it, so scanimage
+    is run once for all of them.
+
+    Client waits for probe only if list has never been probed or update of list is forced.
+    """
+
+    CACHE_DEVICES = 'devices'
+
+    def __init__(self, cache: CacheManager, log: Log, config: Config):
+        self.__log = log
+        self.__cache = cache
+        self.__config = config
+
+        self.__ttl = config.get('scan.devices_ttl')
+        self.__interval = config.get('scan.devices_interval')
+
+        self.__lock = Lock()
+        self.__executor = ThreadPoolExecutor(1, 'scanners-probe')
+        self.__probing: Optional[Future] = None
+
+        self.__scheduler: Optional[Thread] = None
+        self.__stop = Event()
+
+        self.__devices: Optional[List[dict]] = None
+        self.__updated_at: Optional[float] = None
+        self.__probed_at: Optional[float] = None
+
+        # List saved by previous start is served until first probe is finished
+        if cache.has(self.CACHE_DEVICES):
+            self.__devices = cache.get(self.CACHE_DEVICES)
+
+        atexit.register(self.stop)
+
+    def __stale(self) -> bool:
+        return self.__updated_at is None or monotonic() - self.__updated_at > self.__ttl
+
+    def __probe(self):
+        try:
+            devices = ScanImage(self.__log, self.__config).device_list()
+        except Exception as e:
+            self.__log.error(f"Cannot probe scanners. {str(e)}", {"object": self})
+            devices = None
+
+        with self.__lock:
+            # Last known list is kept if probe failed, empty list means that scanners are gone
+            if devices is not None:
+                self.__devices = devices
+                self.__updated_at = monotonic()
+                self.__probed_at = time()
+
+                self.__cache.set(self.CACHE_DEVICES, devices)
+
+            self.__probing = None
+
+    def __schedule(self):
+        while not self.__stop.wait(self.__interval):
+            self.refresh()
+
+    def start(self):
+        """ Probes scanners now and then every 'devices_interval' seconds """
+        self.refresh()
+
+        with self.__lock:
+            if not self.__interval or self.__scheduler is not None:
+                return
+
+            self.__scheduler = Thread(target=self.__schedule, name='scanners-schedule', daemon=True)
+            self.__scheduler.start()
+
+    def stop(self):
+        """ Stops scheduled probes. Probe in progress is not waited for """
+        self.__stop.set()
+
+        with self.__lock:
+            scheduler = self.__scheduler
+            self.__scheduler = None
+
+        if scheduler is not None:
+            scheduler.join()
+
+        self.__executor.shutdown(wait=False)
+
+    def refresh(self) -> Future:
+        """ Starts probe of scanners or returns probe in progress """
+        with self.__lock:
+            if self.__probing is None:
+                self.__probing = self.__executor.submit(self.__probe)
+
+            return self.__probing
+
+    def probed_at(self) -> Optional[float]:
+        """ Unix time of last successful probe """
+        return self.__probed_at
+
+    def get(self, force: bool = False) -> List[dict]:
+        with self.__lock:
+            devices = self.__devices
+            stale = self.__stale()
+
+        if force or devices is None:
+            self.refresh().result()
+
+            with self.__lock:
+                return self.__devices or []
+
+        if stale:
+            self.refresh()
+
+        return devices
@@ -1,9 +1,25 @@
 from .PrinterService import PrinterService
 from .MimeConvertor import MimeConvertor
 from .PDFService import PDFService
+from .PrintQueue import PrintQueue
+from .LibreofficePool import LibreofficePool
+from .ConversionCache import ConversionCache
+from .PrintDeduplicator import PrintDeduplicator
+from .PrinterInventory import PrinterInventory
+from .ScannerInventory import ScannerInventory
+from .ScanQueue import ScanQueue
+from .ScanPostProcessor import ScanPostProcessor
 
 __all__ = [
     'PrinterService',
     'MimeConvertor',
     'PDFService',
+    'PrintQueue',
+    'LibreofficePool',
+    'ConversionCache',
+    'PrintDeduplicator',
+    'PrinterInventory',
+    'ScannerInventory',
+    'ScanQueue',
+    'ScanPostProcessor',
 ]
\ No newline at end of file
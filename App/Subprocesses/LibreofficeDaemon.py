@@ -0,0 +1,181 @@
+import os
+import subprocess
+import time
+from typing import Optional
+
+from App.Core.Logger import Log
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+    PropertyValue = None
+
+
+class LibreofficeDaemon:
+    """
+    Headless LibreOffice process started once and converting documents through UNO socket.
+
+    Every daemon has own user profile directory, so daemons do not lock profile of each other.
+    Conversions are sent by LibreofficePool, daemon is used by one thread at a time.
+    """
+
+    CONNECTION = "socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"
+
+    PDF_FILTERS = {
+        "com.sun.star.sheet.SpreadsheetDocument": "calc_pdf_Export",
+        "com.sun.star.presentation.PresentationDocument": "impress_pdf_Export",
+        "com.sun.star.drawing.DrawingDocument": "draw_pdf_Export",
+    }
+
+    PDF_FILTER_DEFAULT = "writer_pdf_Export"
+
+    CONNECT_INTERVAL = 0.25
+
+    def __init__(self, log: Log, binary: str, profile_path: str, port: int, start_timeout: int):
+        self.__log = log
+        self.__binary = binary
+        self.__profile_path = profile_path
+        self.__connection = self.CONNECTION.format(port=port)
+        self.__start_timeout = start_timeout
+
+        self.__process: Optional[subprocess.Popen] = None
+        self.__desktop = None
+        self.__conversions = 0
+
+    @staticmethod
+    def supported() -> bool:
+        """ Python bindings of LibreOffice (uno) are installed """
+        return uno is not None
+
+    def conversions(self) -> int:
+        return self.__conversions
+
+    def running(self) -> bool:
+        return self.__process is not None and self.__process.poll() is None
+
+    def start(self):
+        os.makedirs(self.__profile_path, exist_ok=True)
+
+        self.__process = subprocess.Popen(
+            [
+                self.__binary,
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--nodefault",
+                "--norestore",
+                "--nolockcheck",
+                f"-env:UserInstallation={uno.systemPathToFileUrl(self.__profile_path)}",
+                f"--accept={self.__connection}",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        self.__desktop = None
+        self.__conversions = 0
+
+        self.__log.debug(f"Libreoffice daemon started ({self.__connection})", {"object": self})
+
+    def stop(self):
+        terminated = False
+
+        if self.__desktop is not None:
+            try:
+                terminated = self.__desktop.terminate()
+            except Exception:
+                pass
+
+        self.__desktop = None
+
+        if self.__process is None:
+            return
+
+        if not terminated:
+            self.__process.terminate()
+
+        try:
+            self.__process.wait(5)
+        except subprocess.TimeoutExpired:
+            self.__process.kill()
+            self.__process.wait()
+
+        self.__process = None
+
+    def __connect(self):
+        if self.__desktop is not None:
+            return self.__desktop
+
+        context = uno.getComponentContext()
+        resolver = context.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", context)
+
+        # First start of daemon creates profile, so it accepts connections after some seconds
+        deadline = time.monotonic() + self.__start_timeout
+
+        while True:
+            try:
+                remote = resolver.resolve(f"uno:{self.__connection}")
+                break
+            except Exception:
+                if time.monotonic() > deadline or not self.running():
+                    raise Exception("Libreoffice daemon does not accept connections")
+
+                time.sleep(self.CONNECT_INTERVAL)
+
+        self.__desktop = remote.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", remote)
+
+        return self.__desktop
+
+    @staticmethod
+    def __property(name: str, value) -> PropertyValue:
+        _property = PropertyValue()
+        _property.Name = name
+        _property.Value = value
+
+        return _property
+
+    def __pdf_filter(self, document) -> str:
+        for service, _filter in self.PDF_FILTERS.items():
+            if document.supportsService(service):
+                return _filter
+
+        return self.PDF_FILTER_DEFAULT
+
+    def convert_to_pdf(self, path_from: str, path_to: str) -> bool:
+        if not self.running():
+            self.start()
+
+        try:
+            desktop = self.__connect()
+
+            document = desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(path_from)),
+                "_blank",
+                0,
+                (self.__property("Hidden", True),),
+            )
+
+            if document is None:
+                self.__log.error(f"Libreoffice daemon cannot open document '{path_from}'", {"object": self})
+                return False
+
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(os.path.abspath(path_to)),
+                    (self.__property("FilterName", self.__pdf_filter(document)),),
+                )
+            finally:
+                document.close(True)
+        except Exception as e:
+            self.__log.error(f"Libreoffice daemon failed to convert. {str(e)}", {"object": self})
+
+            # Daemon is restarted by next conversion
+            self.stop()
+
+            return False
+
+        self.__conversions += 1
+
+        return os.path.exists(path_to)
@@ -1,4 +1,5 @@
 import os
+import shutil
 from typing import Optional
 
 from App.Core import Config, Platform
@@ -13,8 +14,12 @@ class LibreofficePdfConvert(AbstractSubprocess):
 
     def __init__(self, log: Log, config: Config, platform: Platform):
         self.__platform = platform
+        self.__bin_path = self.__determinate_bin_path()
 
-        super(LibreofficePdfConvert, self).__init__(log, config, self.__determinate_bin_path(), False)
+        super(LibreofficePdfConvert, self).__init__(log, config, self.__bin_path, False)
+
+    def binary(self) -> Optional[str]:
+        return self.__bin_path
 
     def __determinate_bin_path(self) -> Optional[str]:
         if self.__platform.is_darwin():
@@ -27,12 +32,7 @@ class LibreofficePdfConvert(AbstractSubprocess):
             return self.__determinate_linux_bin_path()
 
     def __determinate_linux_bin_path(self) -> Optional[str]:
-        ok, out = self.run(["command", "v", self.LINUX_LIBREOFFICE_COMMAND])
-
-        if not ok:
-            return out
-
-        return None
+        return shutil.which(self.LINUX_LIBREOFFICE_COMMAND)
 
     def __determinate_windows_bin_path(self) -> Optional[str]:
         if not os.path.exists(self.WINDOWS_LIBREOFFICE_BIN_PATH):
@@ -53,7 +53,7 @@ class LibreofficePdfConvert(AbstractSubprocess):
         return self.MACOS_LIBREOFFICE_BIN_PATH
 
     def docx_convert(self, path: str, tmp_dir: str, extension: str) -> Optional[str]:
-        if not (_bin := self.__determinate_bin_path()):
+        if not self.__bin_path:
             self._log.error("No binaries found for Libreoffice. Please install Libreoffice.", {"object": self})
             return None
 
@@ -1,11 +1,13 @@
 import hashlib
-from datetime import datetime
-from typing import Tuple
+import re
+import uuid
+from typing import Tuple, Optional
 
+from App import Application
 from App.Core import Config, MimeTypeConfig, Platform, Filesystem
 from App.Core.Abstract import AbstractSubprocess
 from App.Core.Logger import Log
-from App.Core.Utils import MimeType, DocumentOrder
+from App.Core.Utils import MimeType, DocumentOrder, SpoolFile
 from App.Core.Utils.DocumentPagesUtil import DocumentPagesUtil
 from App.Core.Utils.OfficeSuite import OfficeSuite
 from App.Services.MimeConvertor import MimeConvertor
@@ -14,6 +16,11 @@ from App.Services.MimeConvertor import MimeConvertor
 class PrintingSubprocess(AbstractSubprocess):
     COMMAND = 'lp'
 
+    BACKEND_IPP = 'ipp'
+    BACKEND_LP = 'lp'
+
+    REGEX_LP_REQUEST_ID = re.compile(r"request id is (\S+)")
+
     DEVICE_PRINTING_PARAMETER_PRINTER = "d"
     DEVICE_PRINTING_PARAMETER_COPIES = "n"
     DEVICE_PRINTING_PARAMETER_MEDIA = "media"
@@ -29,6 +36,9 @@ class PrintingSubprocess(AbstractSubprocess):
     _DEVICE_PRINTING_PARAMETER_TRANSPARENCY = "transparency"
     _DEVICE_PRINTING_PARAMETER_MIME_TYPE = "mime-type"
 
+    # Sha256 of document content, it is set by 'save_document' and used as key of converted document
+    DOCUMENT_DIGEST_PARAMETER = "digest"
+
     DEVICE_DOCUMENT_PARAMETERS = {
         DEVICE_PRINTING_PARAMETER_PRINTER: "device",
         DEVICE_PRINTING_PARAMETER_COPIES: "copies",
@@ -62,6 +72,7 @@ class PrintingSubprocess(AbstractSubprocess):
         self.set_multi_character_parameters_wrap(False)
 
         self._convert_tool = _config.get('printing.server_side_convert_tool')
+        self._backend = _config.get('printing.backend')
 
     def __resolve_media_type(self, parameters: dict):
         items = []
@@ -78,31 +89,60 @@ class PrintingSubprocess(AbstractSubprocess):
         if len(items):
             parameters.update({self.DEVICE_PRINTING_PARAMETER_MEDIA: ','.join(items)})
 
-    def __convert(self, path: str, mime_type: MimeType) -> Tuple[bool, str]:
+    def __convert(self, path: str, mime_type: MimeType, digest: Optional[str]) -> Tuple[bool, str]:
         suite = OfficeSuite(self._convert_tool)
 
-        path = self._convertor.convert_to_pdf(path, mime_type, suite)
+        path = self._convertor.convert_to_pdf(path, mime_type, suite, digest)
 
         if not path:
             return False, "Failed to convert to pdf"
 
         return True, path
 
-    def __resolve_file(self, parameters: dict) -> Tuple[bool, str]:
+    @staticmethod
+    def document_digest(parameters: dict) -> str:
+        """ Returns digest of received document and adds it to parameters """
+        if digest := parameters.get(PrintingSubprocess.DOCUMENT_DIGEST_PARAMETER):
+            return digest
+
+        content = parameters.get(PrintingSubprocess._DEVICE_PRINTING_PARAMETER_FILE)
+
+        # Spooled document is hashed while it is received, so big document is not read again
+        digest = content.digest() if isinstance(content, SpoolFile) else hashlib.sha256(content).hexdigest()
+
+        parameters.update({PrintingSubprocess.DOCUMENT_DIGEST_PARAMETER: digest})
+
+        return digest
+
+    def save_document(self, parameters: dict) -> Tuple[bool, str]:
+        """
+        Writes received document to tmp directory. Returns path of saved document.
+        Digest of document is added to parameters.
+        """
         mime_type = MimeType[parameters[self._DEVICE_PRINTING_PARAMETER_MIME_TYPE]]
 
         content = parameters.get(self._DEVICE_PRINTING_PARAMETER_FILE)
 
-        name = hashlib.md5(content + hashlib.md5(str(datetime.now()).encode()).digest()).hexdigest()
-        path = Filesystem.create_tmp_path(f"{name}.{MimeType.mime_extension(mime_type)}")
+        digest = self.document_digest(parameters)
+
+        # The same document may be printed by several requests at once
+        path = Filesystem.create_tmp_path(f"{digest}-{uuid.uuid4().hex[:8]}.{MimeType.mime_extension(mime_type)}")
 
-        if not Filesystem.write_file(path, content):
+        if isinstance(content, SpoolFile):
+            content.save(path)
+        elif not Filesystem.write_file(path, content):
             return False, "Failed to write file"
 
+        return True, path
+
+    def convert_document(self, path: str, parameters: dict) -> Tuple[bool, str]:
+        """ Converts saved document to pdf if it cannot be printed as is. Returns path of document for printing """
+        mime_type = MimeType[parameters[self._DEVICE_PRINTING_PARAMETER_MIME_TYPE]]
+
         if not MimeType.is_server_side_convert_type(mime_type.value):
             return True, path
 
-        return self.__convert(path, mime_type)
+        return self.__convert(path, mime_type, parameters.get(self.DOCUMENT_DIGEST_PARAMETER))
 
     def __resolve_page_ranges(self, parameters: dict):
         key = self.DEVICE_DOCUMENT_PARAMETERS[self.DEVICE_PRINTING_PARAMETER_PAGE_RANGES]
@@ -120,7 +160,43 @@ class PrintingSubprocess(AbstractSubprocess):
         if order is not None:
             parameters.update({key: DocumentOrder[order].value})
 
-    def print(self, parameters: dict) -> Tuple[bool, str]:
+    def __print_ipp(self, path: str, cli: dict) -> Optional[Tuple[bool, str]]:
+        """ Returns None if CUPS is not available by IPP """
+        options = dict(cli)
+
+        if not (printer := options.pop(self.DEVICE_PRINTING_PARAMETER_PRINTER, None)):
+            return None
+
+        options['copies'] = options.pop(self.DEVICE_PRINTING_PARAMETER_COPIES, None)
+
+        try:
+            job_id = Application().get('ipp.client').print_job(printer, path, options)
+        except OSError as e:
+            # Job is not sent, so it is not printed twice by lp
+            self._log.warning(f"IPP server is not available, document is printed by lp. {str(e)}", {"object": self})
+            return None
+        except Exception as e:
+            self._log.error(message := str(e), {"object": self})
+            return False, message
+
+        return True, f"{printer}-{job_id}"
+
+    def __print_lp(self, path: str, cli: dict) -> Tuple[bool, Optional[str]]:
+        ok, message = self.run(parameters=cli, options={"additional": [self.create_windows_path_for_linux(path)]})
+
+        if self._config['debug']:
+            return True, "Debug mode enabled"
+
+        if not ok:
+            self._log.error(message, {"object": self})
+            return False, message
+
+        request_id = self.REGEX_LP_REQUEST_ID.search(message)
+
+        return True, request_id.group(1) if request_id else None
+
+    def print_document(self, path: str, parameters: dict) -> Tuple[bool, Optional[str]]:
+        """ Returns id of job in CUPS ('printer-123') or error message """
         cli = {}
 
         self.__resolve_media_type(parameters)
@@ -142,17 +218,19 @@ class PrintingSubprocess(AbstractSubprocess):
 
             cli.update({key: option})
 
-        ok, res = self.__resolve_file(parameters)
+        if self._backend == self.BACKEND_IPP and not self._config['debug']:
+            if (result := self.__print_ipp(path, cli)) is not None:
+                return result
 
-        if not ok:
-            return False, res
+        return self.__print_lp(path, cli)
 
-        ok, message = self.run(parameters=cli, options={"additional": [self.create_windows_path_for_linux(res)]})
+    def print(self, parameters: dict) -> Tuple[bool, str]:
+        ok, path = self.save_document(parameters)
 
-        if self._config['debug']:
-            return True, "Debug mode enabled"
+        if ok:
+            ok, path = self.convert_document(path, parameters)
 
         if not ok:
-            self._log.error(message, {"object": self})
+            return False, path
 
-        return ok, message if not ok else None
+        return self.print_document(path, parameters)
@@ -1,5 +1,12 @@
 import os
-from typing import Tuple, Union
+import shutil
+import time
+import uuid
+from concurrent.futures import Future, wait
+from threading import Thread
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+import img2pdf
 
 from App.Core import Config, Filesystem
 from App.Core.Abstract import AbstractSubprocess
@@ -15,14 +22,30 @@ class ScanImage(AbstractSubprocess):
     SCANIMAGE_PARAMETER_X = 'x'
     SCANIMAGE_PARAMETER_Y = 'y'
     SCANIMAGE_PARAMETER_MEDIA = 'media'
+    SCANIMAGE_PARAMETER_BATCH = 'batch'
 
     FORMAT = ','.join(['%i', '%d', '%v', '%m', '%t%n'])
 
+    READ_BLOCK_SIZE = 64 * 1024
+
+    # scanimage replaces '%d' by number of page
+    BATCH_PAGE_NAME = 'page-%04d'
+    BATCH_PAGE_FIRST = 1
+
+    # Newer scanimage writes page to '<page>.part' and renames it when page is scanned
+    BATCH_PARTIAL_SUFFIX = '.part'
+
+    BATCH_POLL_INTERVAL = 0.2
+
+    # Page of batch is sent as [length of page][page]
+    BATCH_PAGE_LENGTH_SIZE = 4
+
     def __init__(self, log: Log, config: Config):
         super().__init__(log, config, 'scanimage')
 
         self.__file_path = config.get('scan.tmp_file')
         self.__scan_debug = config.get('scan.debug')
+        self.__batch_timeout = config.get('scan.batch_timeout')
 
         self.set_multi_character_parameters_delimiter('=')
 
@@ -44,8 +67,26 @@ class ScanImage(AbstractSubprocess):
             self._log.warning(f"Create scan tmp directory '{_dir}'")
             os.makedirs(os.path.dirname(self.__file_path), exist_ok=True)
 
+    def __create_scan_file_path(self) -> str:
+        """ Every scan has own file, so scans running at the same time do not overwrite each other """
+        return f"{self.__file_path}-{uuid.uuid4().hex}"
+
     def scan(self, parameters: dict) -> Tuple[bool, Union[str, bytes]]:
-        parameters.update({ScanImage.SCANIMAGE_PARAMETER_OUTPUT: self.create_windows_path_for_linux(self.__file_path)})
+        self.__create_scan_tmp_dir()
+
+        path = self.__create_scan_file_path()
+
+        parameters.update({ScanImage.SCANIMAGE_PARAMETER_OUTPUT: self.create_windows_path_for_linux(path)})
+
+        try:
+            return self.__scan(parameters, path)
+        finally:
+            if Filesystem.exists(path):
+                os.remove(path)
+
+    def __scan(self, parameters: dict, path: str) -> Tuple[bool, Union[str, bytes]]:
+        if self.__scan_debug:
+            return True, Filesystem.read_file(self.__debug_file_path(parameters), True)
 
         try:
             ok, message = self.run(parameters=self.__resolve_media_type(parameters))
@@ -53,32 +94,184 @@ class ScanImage(AbstractSubprocess):
             self._log.error(message := f"Cannot run scanimage. {e}")
             return False, message
 
+        if ok:
+            return True, Filesystem.read_file(path, True)
+
+        self._log.error(message := f'Failed to scan: {message}')
+
+        return False, message
+
+    def __debug_file_path(self, parameters: dict) -> str:
+        self._log.warning(f'Scan debug mode enabled. Return test data. Scanning parameters: {parameters}')
+
+        return str(os.path.join(CWD, "tests", "images", f"demo.{parameters['format']}"))
+
+    def scan_stream(self, parameters: dict) -> Iterator[bytes]:
+        """
+        Yields blocks of scanned image while scanner is scanning. Without 'output' parameter scanimage
+        writes image to stdout, so temporary file is not created. Raises Exception if scan failed.
+        """
+        parameters = self.__resolve_media_type(parameters)
+
         if self.__scan_debug:
-            self._log.warning(f'Scan debug mode enabled. Return test data. Scanning parameters: {parameters}')
+            path = self.__debug_file_path(parameters)
+
+            with open(path, 'rb') as file:
+                while block := file.read(self.READ_BLOCK_SIZE):
+                    yield block
+
+            return
+
+        yield from self.stream(parameters=parameters)
+
+    def __run_batch(self, parameters: dict, scanning: Future):
+        try:
+            scanning.set_result(self.run(parameters=parameters, options={'timeout': self.__batch_timeout}))
+        except Exception as e:
+            scanning.set_exception(e)
+
+    def __batch_page_path(self, directory: str, extension: str, number: int) -> str:
+        return os.path.join(directory, f"{self.BATCH_PAGE_NAME % number}.{extension}")
+
+    def __wait_batch_page(self, directory: str, extension: str, number: int, scanning: Future) -> Optional[str]:
+        """
+        Returns path of page when scanimage has finished its file (partial file of page is renamed, next page
+        is started or scanimage has exited). Returns None if there are no more pages.
+        """
+        path = self.__batch_page_path(directory, extension, number)
+        next_path = self.__batch_page_path(directory, extension, number + 1)
+
+        # Older scanimage writes page under its name, so page is finished only when next one is started
+        renamed = False
+
+        while True:
+            # Checked before files, so page written right before exit is not missed
+            finished = scanning.done()
+
+            renamed = renamed or Filesystem.exists(path + self.BATCH_PARTIAL_SUFFIX)
 
-            return True, Filesystem.read_file(str(os.path.join(CWD, "tests", "images", f"demo.{parameters['format']}")), True)
+            if Filesystem.exists(path) and (
+                renamed
+                or finished
+                or Filesystem.exists(next_path)
+                or Filesystem.exists(next_path + self.BATCH_PARTIAL_SUFFIX)
+            ):
+                return path
+
+            if finished:
+                return None
+
+            time.sleep(self.BATCH_POLL_INTERVAL)
+
+    def __batch_pages(self, directory: str, extension: str, scanning: Future) -> Iterator[str]:
+        """ Yields paths of pages as they are scanned. Raises Exception after last page if scan failed """
+        number = self.BATCH_PAGE_FIRST
+
+        while path := self.__wait_batch_page(directory, extension, number, scanning):
+            yield path
+
+            number += 1
+
+        ok, message = scanning.result()
+
+        if not ok:
+            self._log.error(message := f'Failed to scan batch: {message}')
+            raise Exception(message)
+
+    def __read_batch_page(self, path: str) -> Iterator[bytes]:
+        yield os.path.getsize(path).to_bytes(self.BATCH_PAGE_LENGTH_SIZE, 'big')
+
+        with open(path, 'rb') as file:
+            while block := file.read(self.READ_BLOCK_SIZE):
+                yield block
+
+    def __send_batch(
+        self,
+        paths: Iterable[str],
+        pdf: bool,
+        process: Optional[Callable[[bytes], Optional[bytes]]]
+    ) -> Iterator[bytes]:
+        pages: List[Union[str, bytes]] = []
+
+        for path in paths:
+            page = path
+
+            # Blank page is dropped by processing
+            if process is not None and (page := process(Filesystem.read_file(path, True))) is None:
+                continue
+
+            if pdf:
+                pages.append(page)
+            elif process is None:
+                yield from self.__read_batch_page(path)
+            else:
+                yield len(page).to_bytes(self.BATCH_PAGE_LENGTH_SIZE, 'big') + page
+
+        if pdf and pages:
+            yield img2pdf.convert(pages)
+
+    def scan_batch(
+        self,
+        parameters: dict,
+        pdf: bool = False,
+        process: Optional[Callable[[bytes], Optional[bytes]]] = None
+    ) -> Iterator[bytes]:
+        """
+        Scans all sheets of document feeder by one scanimage run. Every page is yielded as
+        [4 bytes big endian length][image] as soon as scanimage has finished its file.
+
+        With 'pdf' pages are assembled into one PDF document, which is yielded after last page.
+        Page is passed to 'process' before it is sent, page is dropped if 'process' returns None.
+        Raises Exception if scan failed (pages scanned before failure are yielded).
+        """
+        parameters = self.__resolve_media_type(parameters)
+
+        if self.__scan_debug:
+            yield from self.__send_batch([self.__debug_file_path(parameters)], pdf, process)
+            return
 
         self.__create_scan_tmp_dir()
 
-        if ok:
-            return True, Filesystem.read_file(self.__file_path, True)
+        directory = self.__create_scan_file_path()
+        os.makedirs(directory)
 
-        self._log.error(message := f'Failed to scan: {message}')
+        extension = parameters['format']
 
-        return False, message
+        parameters.update({
+            ScanImage.SCANIMAGE_PARAMETER_BATCH: self.create_windows_path_for_linux(
+                os.path.join(directory, f"{self.BATCH_PAGE_NAME}.{extension}")
+            ),
+        })
+
+        scanning = Future()
+
+        Thread(target=self.__run_batch, args=(parameters, scanning), name='scan-batch', daemon=True).start()
+
+        try:
+            yield from self.__send_batch(self.__batch_pages(directory, extension, scanning), pdf, process)
+        finally:
+            # Scanner finishes sheets of feeder even if client is gone, files are removed after that
+            wait([scanning])
+
+            shutil.rmtree(directory, ignore_errors=True)
 
     def device_list(self) -> list:
+        """ Raises Exception if scanimage failed, so empty list always means that no scanner is found """
         ok, content = self.run(parameters={
             self.SCANIMAGE_PARAMETER_DONT_SCAN: True,
             self.SCANIMAGE_PARAMETER_FORMAT_DEVICE_LIST: self.FORMAT
         })
 
-        devices = []
-
         if not ok:
-            return devices
+            raise Exception(f"Cannot get list of scanners. {content}")
+
+        devices = []
 
         for device_data in content.split('\n'):
+            # Format of list ends with new line
+            if not device_data.strip():
+                continue
+
             parameters = device_data.split(',')
 
             devices.append({
@@ -1,6 +1,7 @@
 from .PrintingSubprocess import PrintingSubprocess
 from .ScanImage import ScanImage
 from .LibreofficePdfConvert import LibreofficePdfConvert
+from .LibreofficeDaemon import LibreofficeDaemon
 from .AsposeConvert import AsposeConvert
 from .LpoptionsSubprocess import LpoptionsSubprocess
 from .LpstatSubprocess import LpstatSubprocess
@@ -10,6 +11,7 @@ __all__ = [
     'PrintingSubprocess',
     'ScanImage',
     'LibreofficePdfConvert',
+    'LibreofficeDaemon',
     'AsposeConvert',
     'LpoptionsSubprocess',
     'LpstatSubprocess',
@@ -4,6 +4,11 @@ from typing import Union, Any, Optional
 from App import Application
 from App.Core.Cache import CacheManager
 from App.Services.MimeConvertor import MimeConvertor
+from App.Services.PrintQueue import PrintQueue
+from App.Services.PrinterInventory import PrinterInventory
+from App.Services.ScannerInventory import ScannerInventory
+from App.Services.ScanPostProcessor import ScanPostProcessor
+from App.Services.LibreofficePool import LibreofficePool
 from App.Core.Utils.ExecLater import ExecLater
 from App.Core.Network import NetworkManager
 from App.Core.Console import Output
@@ -12,6 +17,7 @@ from App.Core.Logger import Log
 from App.Core import Platform, Machine, Config
 from App.Core import Event
 from App.Core import MimeTypeConfig
+from App.Core.Utils import OfficeSuite
 
 
 def app(_type: Application.ApplicationType = None) -> Application:
@@ -99,7 +105,39 @@ def mime_convertor() -> MimeConvertor:
     return app().get('mime.convertor')
 
 
+def print_queue() -> PrintQueue:
+    return app().get('print.queue')
+
+
+def libreoffice_pool() -> LibreofficePool:
+    return app().get('libreoffice.pool')
+
+
+def printer_inventory() -> PrinterInventory:
+    return app().get('printers.inventory')
+
+
+def scanner_inventory() -> ScannerInventory:
+    return app().get('scanners.inventory')
+
+
+def scan_postprocessor() -> ScanPostProcessor:
+    return app().get('scan.postprocessor')
+
+
 def start_server():
+    # Jobs left by previous start are restored before handling requests
+    if config('printing.queue'):
+        print_queue()
+
+    if config('printing.server_side_convert_tool') == OfficeSuite.LIBREOFFICE.value and libreoffice_pool().available():
+        libreoffice_pool().start()
+
+    # First 'printers list' request does not wait for lpinfo
+    printer_inventory().refresh()
+    scanner_inventory().start()
+    scan_postprocessor().start()
+
     app().call(['network.manager', 'start_server'])
 
 
@@ -52,7 +52,7 @@ CONFIG_FILE_SERVICES = os.path.join(CONFIGS_PATH, "container.yml")
 
 # Models
 DB_MODELS_NAMESPACES = [
-    # f"App.Models",
+    "App.Models",
 ]
 
 # Controllers paths
@@ -1,3 +1,6 @@
+import os
+
+from config import VAR, CACHE_PATH
 from App.helpers import env, platform
 
 
@@ -8,12 +11,56 @@ __CONFIG__ = {
     # Check document what has been convert previously
     "use_cached_docs": env("PRINTING_USE_CACHED_DOCUMENTS", False),
 
+    # Converted documents are stored by hash of source document content, target format and convert tool.
+    # Least recently used documents are removed when size of cache is over 'conversion_cache_size' bytes
+    "conversion_cache_path": env("PRINTING_CONVERSION_CACHE_PATH", os.path.join(CACHE_PATH, "conversions")),
+    "conversion_cache_size": env("PRINTING_CONVERSION_CACHE_SIZE", 512 * 1024 * 1024),
+
     # Save printer in cache for slow commands. Example: macOS local using.
     "use_cached_devices": env("PRINTING_USE_CACHED_DEVICES", False),
 
+    # Printers list older than this count of seconds is refreshed in background, request gets last known list
+    "devices_ttl": env("PRINTING_DEVICES_TTL", 300),
+
     "server_side_convert_tool": env(
         "PRINTING_SERVER_SIDE_CONVERT_TOOL",
         "msword" if platform().is_windows() else "libreoffice"
     ),
+
+    # Count of warm headless LibreOffice daemons converting documents (0 - start soffice for each document).
+    # Daemons need LibreOffice python bindings (uno), each daemon listens port 'libreoffice_pool_port' + index
+    "libreoffice_pool_size": env("PRINTING_LIBREOFFICE_POOL_SIZE", 2),
+    "libreoffice_pool_port": env("PRINTING_LIBREOFFICE_POOL_PORT", 2002),
+
+    # Every daemon has own profile in this directory, so daemons do not lock each other
+    "libreoffice_profiles_path": env("PRINTING_LIBREOFFICE_PROFILES_PATH", os.path.join(VAR, "libreoffice")),
+
+    # Seconds to wait for daemon accepting connections (first start creates profile)
+    "libreoffice_start_timeout": env("PRINTING_LIBREOFFICE_START_TIMEOUT", 30),
+
+    # Daemon is restarted after this count of conversions (0 - never)
+    "libreoffice_max_conversions": env("PRINTING_LIBREOFFICE_MAX_CONVERSIONS", 200),
+
+    # Documents are sent to CUPS by IPP (ipp) or by running lp for every document (lp).
+    # Document is printed by lp if CUPS is not available by IPP
+    "backend": env("PRINTING_BACKEND", "ipp"),
+
+    # Address of CUPS ('localhost:631') or path of CUPS unix socket ('/run/cups/cups.sock')
+    "ipp_server": env("PRINTING_IPP_SERVER", "localhost:631"),
+
+    # Seconds to wait for CUPS response
+    "ipp_timeout": env("PRINTING_IPP_TIMEOUT", 60),
+
+    # Return job id instead of waiting for printing. State of jobs is stored in database ('print_jobs' table)
+    "queue": env("PRINTING_QUEUE", False),
+
+    # Count of jobs converted and printed at the same time
+    "queue_workers": env("PRINTING_QUEUE_WORKERS", 1),
+
+    # The same document with the same parameters received again within this count of seconds is not printed again,
+    # request gets result (or job) of first one. It protects from clients repeating request on timeout, but
+    # server cannot tell retry from intended reprint: the same page printed twice on purpose within window is
+    # reported as printed and printed only once (0 - disable)
+    "dedupe_window": env("PRINTING_DEDUPE_WINDOW", 0),
 }
 
@@ -1,10 +1,46 @@
+import os.path
+
 from App.helpers import env
-from config import ROOT
+from config import ROOT, CACHE_PATH
 
 __CONFIG__ = {
     # Proto yaml file path
     "proto_file_path": env("PROTO_FILE_PATH", f"{ROOT}/proto.yaml"),
 
+    # Store parsed proto file in cache. Proto file is parsed again only if it is changed
+    "schema_cache": env("PROTO_SCHEMA_CACHE", True),
+
+    # Directory for parsed proto file
+    "schema_cache_path": env("PROTO_SCHEMA_CACHE_PATH", os.path.join(CACHE_PATH, "proto")),
+
     # Proto max packet size
     "max_packet_size": env("PROTO_MAX_PACKET_SIZE", 1024 * 16),
+
+    # Send messages longer than max packet size as sequence of chunks with own CRC. Corrupted chunk is
+    # requested again instead of whole message. Chunked messages are received regardless of this option
+    "chunked": env("PROTO_CHUNKED", False),
+
+    # Compress data of sent messages by zlib. Data is sent compressed only if it becomes shorter.
+    # Compressed messages are received regardless of this option
+    "compression": env("PROTO_COMPRESSION", False),
+
+    # Data shorter than this size (bytes) is not compressed
+    "compression_threshold": env("PROTO_COMPRESSION_THRESHOLD", 1024),
+
+    # Compression level from 1 (fastest) to 9 (smallest)
+    "compression_level": env("PROTO_COMPRESSION_LEVEL", 6),
+
+    # Max size (bytes) of decompressed message data. Longer message is rejected (0 - no limit)
+    "max_decompressed_size": env("PROTO_MAX_DECOMPRESSED_SIZE", 1024 * 1024 * 256),
+
+    # Encode list and map responses in compact binary form (with 'objects' of proto file as schema) instead
+    # of JSON. Binary responses are decoded regardless of this option
+    "binary_response": env("PROTO_BINARY_RESPONSE", False),
+
+    # Call parameters longer than this size (bytes) are received straight to spool file instead of memory.
+    # Controller gets SpoolFile object for such parameter (0 - disable spooling)
+    "spool_threshold": env("PROTO_SPOOL_THRESHOLD", 1024 * 1024),
+
+    # Directory for spool files
+    "spool_path": env("PROTO_SPOOL_PATH", os.path.join(CACHE_PATH, "spool")),
 }
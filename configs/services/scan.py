@@ -7,4 +7,18 @@ __CONFIG__ = {
     'tmp_file': env('SCAN_TMP_FILE_PATH', os.path.join(CACHE_PATH, "scan")),
 
     'debug': env('SCAN_DEBUG', False),
+
+    # Scanners are probed in background every 'devices_interval' seconds (0 - probe only by requests).
+    # List older than 'devices_ttl' seconds is probed again by 'scan devices', request gets last known list
+    'devices_interval': env('SCAN_DEVICES_INTERVAL', 600),
+    'devices_ttl': env('SCAN_DEVICES_TTL', 300),
+
+    # Time limit of scanning of all sheets of document feeder by 'scan batch' (seconds)
+    'batch_timeout': env('SCAN_BATCH_TIMEOUT', 3600),
+
+    # Processes of scanned images processing (resize, format conversion, blank pages detection)
+    'postprocess_workers': env('SCAN_POSTPROCESS_WORKERS', 2),
+
+    # Page is blank if less than 'blank_page_ink' of 10000 pixels are dark
+    'blank_page_ink': env('SCAN_BLANK_PAGE_INK', 20),
 }
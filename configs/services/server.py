@@ -1,6 +1,37 @@
 from App.helpers import env
 
 __CONFIG__ = {
+    # Server mode
+    # Modes: thread (thread per connection), asyncio (event loop with fixed size handlers pool)
+    "mode": env("SERVER_MODE", "thread"),
+
+    # Count of threads in handlers pool (asyncio mode)
+    "workers": env("SERVER_WORKERS", 4),
+
+    # Max requests handled at the same time (asyncio mode)
+    "max_in_flight_requests": env("SERVER_MAX_IN_FLIGHT_REQUESTS", 8),
+
+    # Count of threads handling calls of one batch request in parallel
+    "batch_workers": env("SERVER_BATCH_WORKERS", 4),
+
+    # Max requests waiting for handling. Requests over this limit are refused (asyncio mode)
+    "max_queue_size": env("SERVER_MAX_QUEUE_SIZE", 64),
+
+    # Keep connection opened after response to receive next requests
+    "keep_alive": env("SERVER_KEEP_ALIVE", False),
+
+    # Close kept alive connection if no requests received during this time (seconds)
+    "keep_alive_timeout": env("SERVER_KEEP_ALIVE_TIMEOUT", 15),
+
+    # Max requests received by one kept alive connection (0 - unlimited)
+    "keep_alive_max_requests": env("SERVER_KEEP_ALIVE_MAX_REQUESTS", 100),
+
+    # Handle requests of one kept alive connection concurrently and send responses out of order (asyncio mode)
+    "multiplexing": env("SERVER_MULTIPLEXING", False),
+
+    # Max requests handled at the same time for one multiplexed connection
+    "multiplexing_max_in_flight_requests": env("SERVER_MULTIPLEXING_MAX_IN_FLIGHT_REQUESTS", 16),
+
     # Socket listen
     "max_incoming_connections": env("SERVER_MAX_INCOMING_CONNECTION", 10),
 
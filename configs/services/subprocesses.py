@@ -5,4 +5,27 @@ __CONFIG__ = {
 
     # host, wsl
     'target_platform_cmd': env('TARGET_PLATFORM_CMD', 'host'),
+
+    # asyncio - processes are run by event loop thread with timeouts and limits, sync - blocking subprocess.run
+    # (streamed output, e.g. scan stream, is kept in memory until process is finished)
+    'runner': env('SUBPROCESSES_RUNNER', 'asyncio'),
+
+    # Seconds to wait for process, then process is killed (0 - wait forever)
+    'timeout': env('SUBPROCESSES_TIMEOUT', 600),
+
+    # Timeouts of binaries
+    'timeouts': {
+        'scanimage': env('SUBPROCESSES_SCANIMAGE_TIMEOUT', 600),
+        'soffice': env('SUBPROCESSES_SOFFICE_TIMEOUT', 180),
+        'lp': env('SUBPROCESSES_LP_TIMEOUT', 60),
+        'lpstat': env('SUBPROCESSES_LPSTAT_TIMEOUT', 30),
+        'lpinfo': env('SUBPROCESSES_LPINFO_TIMEOUT', 120),
+    },
+
+    # Max count of processes of binary running at the same time (asyncio runner only, 0 - unlimited)
+    'limits': {
+        'soffice': env('SUBPROCESSES_SOFFICE_LIMIT', 2),
+        'scanimage': env('SUBPROCESSES_SCANIMAGE_LIMIT', 0),
+        'lp': env('SUBPROCESSES_LP_LIMIT', 0),
+    },
 }